@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """
+    Cache of final supervisor answers keyed on the query embedding.
+    A lookup is a hit when the cosine similarity to a stored query is at
+    least `threshold`, so "symptoms of typhoid" can be served the answer
+    computed for "what are typhoid symptoms".
+
+    Each entry also carries a `scope` (the entity the router extracted, see
+    router.cache_scope) and only entries of the same scope can match: an
+    embedding alone cannot tell "Hepatitis B" from "Hepatitis C".
+
+    Embeddings live in a matrix of `max_size` rows allocated on the first
+    store; each entry owns one row (its slot), so a store writes one row
+    instead of rebuilding the matrix.
+
+    Entries expire after `ttl` seconds, the least recently used ones are
+    evicted beyond `max_size`, and everything is dropped when the graph
+    version changes (i.e. after a re-ingestion that changed data).
+    """
+
+    def __init__(self, threshold: float = 0.95, max_size: int = 1024, ttl: float = 3600):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+        self.graph_version = None
+        self._entries = OrderedDict()
+        self._matrix = None
+        self._live = np.zeros(max_size, dtype=bool)
+        self._scopes = np.zeros(max_size, dtype=np.int64)
+        self._scope_ids = {}
+        self._scope_counts = {}
+        self._next_scope = 0
+        self._slot_keys = [None] * max_size
+        self._free = list(range(max_size - 1, -1, -1))
+        self._next_key = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        slot, scope = entry["slot"], entry["scope"]
+        self._scope_counts[scope] -= 1
+        if not self._scope_counts[scope]:
+            # Scopes are free text ("best food for diabetes"): forget the ones no entry uses
+            del self._scope_ids[scope], self._scope_counts[scope]
+        self._live[slot] = False
+        self._slot_keys[slot] = None
+        self._free.append(slot)
+
+    def _reset(self):
+        self._entries.clear()
+        self._live[:] = False
+        self._scope_ids.clear()
+        self._scope_counts.clear()
+        self._slot_keys = [None] * self.max_size
+        self._free = list(range(self.max_size - 1, -1, -1))
+
+    def _sync_version(self, graph_version):
+        if graph_version != self.graph_version:
+            if self._entries:
+                self.invalidations += 1
+            self._reset()
+            self.graph_version = graph_version
+
+    def _drop_expired(self, now):
+        expired = [key for key, entry in self._entries.items() if now - entry["created_at"] > self.ttl]
+        for key in expired:
+            self._remove(key)
+
+    def lookup(self, embedding, graph_version=None, scope=""):
+        """Returns (entry, similarity) for the closest cached query of `scope` above the threshold, else None."""
+        with self._lock:
+            self._sync_version(graph_version)
+            self._drop_expired(time.time())
+            scope_id = self._scope_ids.get(scope)
+            if not self._entries or scope_id is None:
+                self.misses += 1
+                return None
+
+            similarities = self._matrix @ self._normalize(embedding)
+            similarities[~self._live | (self._scopes != scope_id)] = -np.inf
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+
+            key = self._slot_keys[best]
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key], similarity
+
+    def store(self, query, embedding, response, reasoning, graph_version=None, retrieval=None, scope=""):
+        vector = self._normalize(embedding)
+        with self._lock:
+            self._sync_version(graph_version)
+            if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+                # First store (or a new embedding model): allocate every row up front
+                self._reset()
+                self._matrix = np.zeros((self.max_size, vector.shape[0]), dtype=np.float32)
+            if not self._free:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+            slot = self._free.pop()
+            self._matrix[slot] = vector
+            self._live[slot] = True
+            if scope not in self._scope_ids:
+                self._scope_ids[scope] = self._next_scope
+                self._next_scope += 1
+            self._scopes[slot] = self._scope_ids[scope]
+            self._scope_counts[scope] = self._scope_counts.get(scope, 0) + 1
+            self._slot_keys[slot] = self._next_key
+            self._entries[self._next_key] = {
+                "query": query,
+                "scope": scope,
+                "slot": slot,
+                "response": response,
+                "reasoning": reasoning,
+                "retrieval": retrieval or [],
+                "created_at": time.time(),
+            }
+            self._next_key += 1
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "graph_version": self.graph_version,
+        }
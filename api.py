@@ -1,60 +1,558 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import contextlib
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
-from multi_agent import app as agent_app
+from typing import List, Optional
+import multi_agent
+from multi_agent import app as agent_app, tools as agent_tools, arouter_node, seeded_inputs, current_turn
+from concurrency import ConcurrencyLimiter, QueueFull
+from answer_cache import SemanticAnswerCache
+from sessions import SessionStore
+from reports import ReportCache, ReportService
+from singleflight import SingleFlight
+from embedding_cache import normalize_query
+from retrieval import summarize
+import db
+import graph_tools
+import router
+import telemetry
 
-app = FastAPI(title="Tanit Health AI", version="2.0")
+# --- Concurrency limits for the agent pipeline ---
+CHAT_MAX_CONCURRENCY = int(os.getenv("CHAT_MAX_CONCURRENCY", "32"))
+CHAT_MAX_QUEUE = int(os.getenv("CHAT_MAX_QUEUE", "64"))
+chat_limiter = ConcurrencyLimiter(CHAT_MAX_CONCURRENCY, CHAT_MAX_QUEUE)
+
+# --- Semantic answer cache (skips the whole LLM chain for near-duplicate questions) ---
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+answer_cache = SemanticAnswerCache(
+    threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95")),
+    max_size=int(os.getenv("ANSWER_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+)
+
+# --- Request coalescing: identical questions in flight at the same time share one pipeline run ---
+chat_flight = SingleFlight("chat")
+
+# --- Conversation sessions (follow-ups resume from a checkpointed thread) ---
+sessions = SessionStore(
+    multi_agent.workflow,
+    backend=os.getenv("SESSION_BACKEND", "memory"),
+    path=os.getenv("SESSION_DB_PATH", "data/sessions.sqlite"),
+    max_sessions=int(os.getenv("SESSION_MAX", "1000")),
+    ttl=float(os.getenv("SESSION_TTL", "3600")),
+    compact_every=int(os.getenv("SESSION_COMPACT_EVERY", "10")),
+)
+
+# --- Clinical reports (PDF, cached by content hash) ---
+reports = ReportService(
+    ReportCache(
+        max_bytes=int(os.getenv("REPORT_CACHE_MB", "64")) * 1024 * 1024,
+        max_items=int(os.getenv("REPORT_CACHE_SIZE", "1024")),
+    ),
+    workers=int(os.getenv("REPORT_WORKERS", "2")),
+    max_pending=int(os.getenv("REPORT_MAX_PENDING", "32")),
+)
+# Answers longer than this are rendered as a background job even without "background": true
+REPORT_BACKGROUND_CHARS = int(os.getenv("REPORT_BACKGROUND_CHARS", "20000"))
+REPORT_BATCH_MAX = int(os.getenv("REPORT_BATCH_MAX", "1000"))
+
+# --- Warm-up / readiness ---
+# The process starts serving right away ("/" answers); "/ready" turns 200 once warm-up is done
+readiness = {"ready": False, "checks": {}, "warmup_seconds": None}
+
+async def warm_up():
+    """Loads the embedding model, opens the Neo4j pool and creates the LLM client, off the event loop."""
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    checks = {}
+    for name, step in [
+        ("embedding_model", graph_tools.warm_up),
+        ("neo4j", db.health_check),
+        ("llm", multi_agent.get_llm),
+    ]:
+        try:
+            result = await loop.run_in_executor(None, step)
+            checks[name] = "ok" if result is not False else "unavailable"
+        except Exception as e:
+            checks[name] = f"error: {e}"
+    readiness.update(
+        ready=all(v == "ok" for v in checks.values()),
+        checks=checks,
+        warmup_seconds=round(time.perf_counter() - start, 2),
+    )
+    print(f"{'✅' if readiness['ready'] else '⚠️'} Warm-up finished in {readiness['warmup_seconds']}s: {checks}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: warm everything up in the background so the worker binds immediately
+    warmup_task = asyncio.create_task(warm_up())
+    yield
+    # Shutdown: release every pooled connection and the embedding/tool threads
+    warmup_task.cancel()
+    await sessions.close()
+    await db.close_async_driver()
+    db.close_driver()
+    graph_tools.embedding_executor.shutdown(wait=False)
+    multi_agent.tool_executor.shutdown(wait=False)
+    reports.close()
+
+app = FastAPI(title="Tanit Health AI", version="2.0", lifespan=lifespan)
 
 class ChatRequest(BaseModel):
     query: str
+    session_id: Optional[str] = None
+
+class BatchRequest(BaseModel):
+    queries: List[str]
+    max_parallel: Optional[int] = None
+
+class ReportRequest(BaseModel):
+    query: str
+    response: str
+    retrieval: List[dict] = []
+    background: bool = False
+
+class ReportBatchRequest(BaseModel):
+    reports: List[ReportRequest]
+
+@app.middleware("http")
+async def http_metrics(request, call_next):
+    if not telemetry.TELEMETRY_ENABLED:
+        return await call_next(request)
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Route template, not the raw path, so unknown URLs cannot blow up the label set
+    route = request.scope.get("route")
+    telemetry.HTTP_DURATION.observe(time.perf_counter() - start, path=getattr(route, "path", "unmatched"),
+                                    status=response.status_code)
+    return response
+
+@app.exception_handler(QueueFull)
+async def queue_full_handler(request, exc: QueueFull):
+    return JSONResponse(status_code=429, content=exc.to_dict(), headers={"Retry-After": "1"})
+
+def build_reasoning_steps(all_messages):
+    """Turns the intermediate agent messages into the reasoning log shown in the UI."""
+    reasoning_steps = []
+
+    for msg in all_messages[1:-1]:
+        step_type = "unknown"
+        content = msg.content
+
+        if isinstance(msg, ToolMessage):
+            step_type = "tool_result"
+            # Retrieval results are returned structured in `retrieval`:
+            # a one-line summary here instead of the multi-KB text the LLM saw.
+            if msg.artifact is not None:
+                content = summarize(msg.artifact)
+        elif isinstance(msg, AIMessage):
+            if msg.tool_calls:
+                step_type = "tool_call"
+                content = f"Calling Tool: {msg.tool_calls[0]['name']}"
+            else:
+                step_type = "intern_draft"
+
+        reasoning_steps.append({
+            "type": step_type,
+            "content": content
+        })
+    return reasoning_steps
+
+def collect_retrieval(all_messages):
+    """Compact retrieval records (disease, score, weighted symptoms, precautions) from every tool call."""
+    retrieval = []
+    for msg in all_messages:
+        if isinstance(msg, ToolMessage) and msg.artifact:
+            retrieval.extend(msg.artifact)
+    return retrieval
+
+def build_payload(all_messages, route="agent"):
+    """The body shared by /chat, the SSE `final` event and the answer cache (current turn only)."""
+    all_messages = current_turn(all_messages)
+    return {
+        "response": all_messages[-1].content,
+        "route": route,
+        "reasoning": build_reasoning_steps(all_messages),
+        "retrieval": collect_retrieval(all_messages),
+    }
+
+async def cached_answer(user_query: str):
+    """
+    Looks the query up in the answer cache.
+    Returns (payload or None, key) where key = (embedding, graph version, scope) for storing later.
+    Queries with numbers (BMI) are never cached: their embedding hardly moves when the numbers do.
+    """
+    scope = router.cache_scope(user_query)
+    if not ANSWER_CACHE_ENABLED or scope is None:
+        return None, None
+    try:
+        embedding = await graph_tools.aembed_query(user_query)
+        version = await graph_tools.aget_graph_version()
+    except Exception as e:
+        # The cache is an optimisation: never fail the request because of it
+        print(f"⚠️ Answer cache skipped: {e}")
+        return None, None
+    with telemetry.timed("answer_cache", name="lookup"):
+        hit = answer_cache.lookup(embedding, version, scope)
+    if hit is None:
+        return None, (embedding, version, scope)
+    return cache_hit_payload(*hit), None
+
+def cache_hit_payload(entry, similarity):
+    return {
+        "response": entry["response"],
+        "route": "cache",
+        "reasoning": entry["reasoning"],
+        "retrieval": entry["retrieval"],
+        "cache": {
+            "hit": True,
+            "similarity": round(similarity, 4),
+            "matched_query": entry["query"],
+            "age_seconds": round(time.time() - entry["created_at"], 1),
+        },
+    }
+
+def remember_answer(user_query, key, payload):
+    # A BMI answer is only right for its own numbers
+    if key is not None and payload["route"] != "fast_bmi":
+        embedding, version, scope = key
+        answer_cache.store(user_query, embedding, payload["response"], payload["reasoning"], version,
+                           retrieval=payload["retrieval"], scope=scope)
 
 @app.get("/")
 def home():
-    return {"status": "online", "system": "Multi-Agent"}
+    return {
+        "status": "online",
+        "system": "Multi-Agent",
+        "ready": readiness["ready"],
+        "load": chat_limiter.stats(),
+        "answer_cache": answer_cache.stats(),
+        "sessions": sessions.stats(),
+        "coalescing": {"chat": chat_flight.stats(), "retrieval": graph_tools.retrieval_flight.stats()},
+        "reports": reports.stats(),
+    }
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 503 until warm-up has loaded the model and reached Neo4j and the LLM client."""
+    if not readiness["ready"] and readiness["warmup_seconds"] is not None and readiness["checks"].get("neo4j") != "ok":
+        # Neo4j may have come up after warm-up: check again instead of staying unready forever
+        loop = asyncio.get_running_loop()
+        if await loop.run_in_executor(None, db.health_check):
+            readiness["checks"]["neo4j"] = "ok"
+            readiness["ready"] = all(v == "ok" for v in readiness["checks"].values())
+    return JSONResponse(status_code=200 if readiness["ready"] else 503, content=readiness)
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus exposition of the stage, payload, token and HTTP histograms."""
+    return PlainTextResponse(telemetry.render(), media_type="text/plain; version=0.0.4")
 
 @app.post("/chat")
-def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest, x_debug_timing: Optional[str] = Header(None)):
+    if not x_debug_timing:
+        return await answer_chat(request.query, request.session_id)
+    # Debug header: attach this request's own stage-by-stage breakdown
+    with telemetry.request_trace() as trace:
+        payload = await answer_chat(request.query, request.session_id)
+    return {**payload, "timing": telemetry.summarize_trace(trace)}
+
+@app.delete("/chat/session/{session_id}")
+async def end_session(session_id: str):
+    """Forgets a conversation (its checkpointed history)."""
+    if not await sessions.end(session_id):
+        raise HTTPException(status_code=404, detail="Unknown session")
+    return {"session_id": session_id, "ended": True}
+
+async def answer_session_turn(user_query: str, session_id: str):
+    """
+    One turn of a conversation: only the new question is sent, the graph
+    resumes from the session's checkpoint. Follow-ups depend on the history,
+    so the answer cache is not used.
+    """
+    session_app, config, lock = await sessions.turn(session_id)
+    async with lock, chat_limiter.slot():
+        try:
+            inputs = {"messages": [HumanMessage(content=user_query)]}
+            result = await session_app.ainvoke(inputs, {**config, "callbacks": telemetry.callbacks()},
+                                               durability="exit")
+            await sessions.finish_turn(session_id, config)
+            payload = build_payload(result["messages"], result.get("route", "agent"))
+            return {**payload, "session_id": session_id, "cache": {"hit": False}}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+async def seed_session(session_id, user_query, payload):
+    """Opens a session with a first turn answered statelessly (cache / coalescing)."""
     try:
-        user_query = request.query
-        
-        # Run the Multi-Agent System
-        inputs = {"messages": [HumanMessage(content=user_query)]}
-        result = agent_app.invoke(inputs)
-        
-        all_messages = result["messages"]
-        final_response = all_messages[-1].content
-        
-        reasoning_steps = []
-        
-        for msg in all_messages[1:-1]:
-            step_type = "unknown"
-            content = msg.content
-            
-            if isinstance(msg, ToolMessage):
-                step_type = "tool_result"
-                # CRITICAL FIX: We do NOT truncate here anymore. 
-                # We send the full text so the UI can parse all diseases.
-            elif isinstance(msg, AIMessage):
-                if msg.tool_calls:
-                    step_type = "tool_call"
-                    content = f"Calling Tool: {msg.tool_calls[0]['name']}"
-                else:
-                    step_type = "intern_draft"
-            
-            reasoning_steps.append({
-                "type": step_type,
-                "content": content
+        await sessions.seed(session_id, [HumanMessage(content=user_query), AIMessage(content=payload["response"])])
+    except Exception as e:
+        print(f"⚠️ Session {session_id} not seeded: {e}")
+
+async def answer_chat(user_query: str, session_id: Optional[str] = None):
+    if session_id and not await sessions.is_new(session_id):
+        return await answer_session_turn(user_query, session_id)
+    if session_id:
+        # A first question has no history: answer it like a stateless one, then start the session from it
+        payload = await answer_chat(user_query)
+        await seed_session(session_id, user_query, payload)
+        return {**payload, "session_id": session_id}
+    if not graph_tools.COALESCING_ENABLED:
+        return await answer_query(user_query)
+    # A burst of the same question runs the cache lookup and the pipeline once
+    payload, shared = await chat_flight.do(normalize_query(user_query), answer_query, user_query)
+    return {**payload, "coalesced": True} if shared else payload
+
+async def answer_query(user_query: str):
+    # Cache hits are served without taking a pipeline slot
+    cached, cache_key = await cached_answer(user_query)
+    if cached is not None:
+        return cached
+
+    # Rejected with 429 (+ queue depth) when every slot and the queue are taken
+    async with chat_limiter.slot():
+        try:
+            # Run the Multi-Agent System without holding a threadpool worker
+            inputs = {"messages": [HumanMessage(content=user_query)]}
+            result = await agent_app.ainvoke(inputs, {"callbacks": telemetry.callbacks()})
+
+            payload = build_payload(result["messages"], result.get("route", "agent"))
+            remember_answer(user_query, cache_key, payload)
+            if telemetry.TELEMETRY_ENABLED:
+                telemetry.record_size("chat_response", len(json.dumps(payload, default=str)))
+            return {**payload, "cache": {"hit": False}}
+
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+# --- Streaming (Server-Sent Events) ---
+TOOL_NAMES = {t.name for t in agent_tools}
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def stream_agent_events(user_query: str, cache_key=None, graph=None, config=None, new_session_id=None):
+    """
+    Maps LangGraph events to typed SSE events:
+    tool_call -> tool_result -> intern_draft -> token (supervisor) ... -> final.
+    `graph`/`config` select a session's checkpointed graph and thread;
+    `new_session_id` is a session started by this (stateless) answer.
+    """
+    inputs = {"messages": [HumanMessage(content=user_query)]}
+    session_id = (config or {}).get("configurable", {}).get("thread_id") or new_session_id
+    run_config = {**(config or {}), "callbacks": telemetry.callbacks()}
+    extra = {"durability": "exit"} if session_id else {}
+
+    async for event in (graph or agent_app).astream_events(inputs, run_config, version="v2", **extra):
+        kind = event["event"]
+        node = event.get("metadata", {}).get("langgraph_node")
+
+        if kind == "on_tool_start" and event["name"] in TOOL_NAMES:
+            yield sse_event("tool_call", {
+                "tool": event["name"],
+                "input": event["data"].get("input"),
+                "content": f"Calling Tool: {event['name']}",
             })
+        elif kind == "on_tool_end" and event["name"] in TOOL_NAMES:
+            output = event["data"].get("output")
+            artifact = getattr(output, "artifact", None)
+            yield sse_event("tool_result", {
+                "tool": event["name"],
+                "content": summarize(artifact) if artifact is not None else getattr(output, "content", str(output)),
+                "retrieval": artifact or [],
+            })
+        elif kind == "on_chain_end" and event["name"] == "medical_intern":
+            for msg in event["data"]["output"]["messages"]:
+                if isinstance(msg, AIMessage) and not msg.tool_calls:
+                    yield sse_event("intern_draft", {"content": msg.content})
+        elif kind == "on_chat_model_stream" and node == "supervisor":
+            chunk = event["data"]["chunk"]
+            if chunk.content:
+                yield sse_event("token", {"content": chunk.content})
+        elif kind == "on_chain_end" and not event.get("parent_ids"):
+            # The root run finished: send the same payload as /chat
+            output = event["data"]["output"]
+            payload = build_payload(output["messages"], output.get("route", "agent"))
+            remember_answer(user_query, cache_key, payload)
+            if new_session_id:
+                await seed_session(new_session_id, user_query, payload)
+            yield sse_event("final", {**payload, **({"session_id": session_id} if session_id else {}),
+                                      "cache": {"hit": False}})
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    # The first turn of a session has no history: it takes the stateless (cached) path and starts the session
+    new_session_id = request.session_id if request.session_id and await sessions.is_new(request.session_id) else None
+    if request.session_id and not new_session_id:
+        cached, cache_key = None, None
+        session_app, config, lock = await sessions.turn(request.session_id)
+    else:
+        cached, cache_key = await cached_answer(request.query)
+        session_app, config, lock = None, None, None
+    if cached is None:
+        # Reject up front (429) while we can still set the status code
+        chat_limiter.check_capacity()
+
+    async def event_stream():
+        try:
+            if cached is not None:
+                if new_session_id:
+                    await seed_session(new_session_id, request.query, cached)
+                yield sse_event("final", {**cached, **({"session_id": new_session_id} if new_session_id else {})})
+            else:
+                async with lock or contextlib.nullcontext(), chat_limiter.slot():
+                    async for chunk in stream_agent_events(request.query, cache_key, session_app, config,
+                                                           new_session_id):
+                        yield chunk
+                    if config is not None:
+                        # The run (and its exit checkpoint) is complete once the stream is drained
+                        await sessions.finish_turn(request.session_id, config)
+        except QueueFull as e:
+            yield sse_event("error", {"status": 429, **e.to_dict()})
+        except Exception as e:
+            yield sse_event("error", {"status": 500, "detail": str(e)})
+        yield sse_event("done", {})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# --- Batch (NDJSON) ---
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "5000"))
+BATCH_MAX_PARALLEL = int(os.getenv("BATCH_MAX_PARALLEL", "8"))
+# How long an item waits for a pipeline slot while /chat traffic saturates the limiter, before its 429
+BATCH_SLOT_WAIT = float(os.getenv("BATCH_SLOT_WAIT", "30"))
 
-        return {
-            "response": final_response,
-            "reasoning": reasoning_steps
-        }
-        
+def ndjson_line(data: dict) -> str:
+    return json.dumps(data, default=str) + "\n"
+
+async def answer_batch_item(index, user_query, embedding=None, matches=None, version=None):
+    """
+    One batch item: answer cache -> fast path -> agent run seeded with the batch
+    retrieval. Any failure is reported on the item itself, never on the batch.
+    """
+    start = time.perf_counter()
+    item = {"index": index, "query": user_query}
+    try:
+        scope = router.cache_scope(user_query)
+        cacheable = ANSWER_CACHE_ENABLED and embedding is not None and scope is not None
+        cache_key = (embedding, version, scope) if cacheable else None
+        if cache_key is not None:
+            hit = answer_cache.lookup(embedding, version, scope)
+            if hit is not None:
+                return {**item, **cache_hit_payload(*hit), "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+        # A batch is not interactive: wait for room rather than fail the item at the first busy moment
+        await chat_limiter.wait_for_capacity(BATCH_SLOT_WAIT)
+        async with chat_limiter.slot():
+            question = HumanMessage(content=user_query)
+            routed = await arouter_node({"messages": [question]})
+            if routed["route"] != "agent":
+                messages, route = [question] + routed["messages"], routed["route"]
+            else:
+                inputs = seeded_inputs(user_query, matches) if matches is not None else {"messages": [question]}
+                result = await agent_app.ainvoke(inputs, {"callbacks": telemetry.callbacks()})
+                messages, route = result["messages"], "agent"
+
+        payload = build_payload(messages, route)
+        remember_answer(user_query, cache_key, payload)
+        return {**item, **payload, "cache": {"hit": False},
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)}
+    except QueueFull as e:
+        return {**item, "error": {"status": 429, **e.to_dict()}}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        return {**item, "error": {"status": 500, "detail": str(e)}}
+
+@app.post("/chat/batch")
+async def chat_batch_endpoint(request: BatchRequest):
+    queries = request.queries
+    if not queries:
+        raise HTTPException(status_code=400, detail="queries must not be empty")
+    if len(queries) > BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_QUERIES} queries per batch")
+    parallel = max(1, min(request.max_parallel or BATCH_MAX_PARALLEL, BATCH_MAX_PARALLEL))
+
+    async def ndjson_stream():
+        # 1. Shared retrieval: one encode call for the cache misses, one search round trip
+        try:
+            embeddings, retrieved = await graph_tools.aretrieve_batch(queries)
+            version = await graph_tools.aget_graph_version() if ANSWER_CACHE_ENABLED else None
+        except Exception as e:
+            # Degrade to per-item retrieval by the Intern rather than failing the whole batch
+            print(f"⚠️ Batch retrieval failed, items will retrieve on their own: {e}")
+            embeddings, retrieved, version = [None] * len(queries), [None] * len(queries), None
+
+        # 2. Bounded fan-out of the LLM stages, streamed back in completion order
+        semaphore = asyncio.Semaphore(parallel)
+
+        async def run(i):
+            async with semaphore:
+                return await answer_batch_item(i, queries[i], embeddings[i], retrieved[i], version)
+
+        tasks = [asyncio.create_task(run(i)) for i in range(len(queries))]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield ndjson_line(await next_done)
+        finally:
+            # Client went away: stop the remaining items
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+
+# --- Clinical reports ---
+def job_accepted(job):
+    return JSONResponse(status_code=202, content={**job, "status_url": f"/report/jobs/{job['job_id']}"})
+
+@app.post("/report")
+async def report_endpoint(request: ReportRequest):
+    """PDF of one answer. Long answers (or "background": true) become a job: 202 + status URL."""
+    if request.background or len(request.response) > REPORT_BACKGROUND_CHARS:
+        return job_accepted(reports.submit([(request.query, request.response, request.retrieval)]))
+    key, data, hit = await reports.arender(request.query, request.response, request.retrieval)
+    return Response(content=data, media_type="application/pdf", headers={
+        "Content-Disposition": 'attachment; filename="tanit_report.pdf"',
+        "ETag": f'"{key}"',
+        "X-Report-Cache": "hit" if hit else "miss",
+    })
+
+@app.post("/report/batch")
+async def report_batch_endpoint(request: ReportBatchRequest):
+    """Export job: every report rendered (identical ones once) into one zip archive."""
+    if not request.reports:
+        raise HTTPException(status_code=400, detail="reports must not be empty")
+    if len(request.reports) > REPORT_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {REPORT_BATCH_MAX} reports per batch")
+    return job_accepted(reports.submit([(r.query, r.response, r.retrieval) for r in request.reports], archive=True))
+
+@app.get("/report/jobs/{job_id}")
+async def report_job(job_id: str):
+    job = reports.job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return {**job, "download_url": f"/report/jobs/{job_id}/download" if job["status"] == "done" else None}
+
+@app.get("/report/jobs/{job_id}/download")
+async def report_job_download(job_id: str):
+    job = reports.job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    result = reports.job_result(job_id)
+    if result is None:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}", headers={"Retry-After": "1"})
+    data, media_type, file_name = result
+    return Response(content=data, media_type=media_type,
+                    headers={"Content-Disposition": f'attachment; filename="{file_name}"'})
 
 if __name__ == "__main__":
     import uvicorn
     print("🚀 Starting Multi-Agent API...")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,92 @@
+"""
+Correctness of the semantic answer cache on near-duplicate questions whose
+answers differ, with a fake LLM and the in-memory graph (no Groq, no Neo4j).
+
+Each pair goes through `api.answer_query` in order on an empty cache: the
+second question must miss when only a number or a disease variant changed
+(the fake embedder ignores digits, so "70 kg" and "80 kg" embed identically),
+and must hit when only case or punctuation changed.
+
+Also times store() and lookup() on a full cache at a few sizes: a store
+writes one row of the preallocated matrix, so its cost must not grow with
+the cache size.
+
+    python -m benchmarks.bench_answer_cache
+    python -m benchmarks.bench_answer_cache --sizes 1024,8192 --dim 384
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.fakes import install_fakes
+
+# (first, second, second should be served from the cache)
+PAIRS = [
+    ("calculate my BMI, 70 kg 1.75 m", "calculate my BMI, 80 kg 1.75 m", False),
+    ("What is my BMI? I weigh 65 kg and I am 170 cm tall", "What is my BMI? I weigh 95 kg and I am 170 cm tall", False),
+    ("What are the precautions for Hepatitis B?", "What are the precautions for Hepatitis C?", False),
+    ("What are the symptoms of Hepatitis D?", "What are the symptoms of Hepatitis E?", False),
+    ("I have a skin rash and itching", "i have a skin rash and itching!", True),
+    ("What are the precautions for Malaria?", "what are the precautions for malaria", True),
+]
+
+
+async def run():
+    import api
+
+    api.ANSWER_CACHE_ENABLED = True
+    failures = 0
+    for first, second, should_hit in PAIRS:
+        api.answer_cache.clear()
+        await api.answer_query(first)
+        payload = await api.answer_query(second)
+        hit = payload["route"] == "cache"
+        ok = hit == should_hit
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {'hit ' if hit else 'miss'} {second!r} after {first!r}")
+    return failures
+
+
+def time_store(sizes, dim):
+    from answer_cache import SemanticAnswerCache
+
+    rng = np.random.default_rng(0)
+    print(f"{'entries':>8} | {'store us':>9} | {'lookup us':>10}")
+    for size in sizes:
+        cache = SemanticAnswerCache(max_size=size)
+        vectors = rng.standard_normal((2 * size, dim)).astype(np.float32)
+        for i in range(size):
+            cache.store(f"q{i}", vectors[i], "answer", [], "v1", scope=str(i % 50))
+        # The cache is full: every store below also evicts the oldest entry
+        start = time.perf_counter()
+        for i in range(size, 2 * size):
+            cache.store(f"q{i}", vectors[i], "answer", [], "v1", scope=str(i % 50))
+        t_store = (time.perf_counter() - start) / size
+        start = time.perf_counter()
+        for i in range(100):
+            cache.lookup(vectors[size + i], "v1", scope=str(i % 50))
+        t_lookup = (time.perf_counter() - start) / 100
+        print(f"{size:>8} | {t_store * 1e6:>9.1f} | {t_lookup * 1e6:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1024,4096")
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+
+    time_store([int(s) for s in args.sizes.split(",")], args.dim)
+    print()
+    install_fakes(llm_latency=0.0, db_latency=0.0)
+    failures = asyncio.run(run())
+    if failures:
+        print(f"\n❌ {failures}/{len(PAIRS)} pairs served the wrong answer from the cache.")
+        sys.exit(1)
+    print(f"\n✅ {len(PAIRS)}/{len(PAIRS)} pairs hit or missed the cache as expected.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+/chat one query at a time vs. one /chat/batch call, with a fake LLM and the
+in-memory graph (no Groq, no Neo4j).
+
+Reports wall time, model.encode calls and retrieval round trips for both,
+and checks that the NDJSON stream returns every item exactly once, in
+completion order, with an injected failure isolated to its own item.
+Then, with a pipeline limit of one slot and no queue, a batch must still
+answer every item (items wait for a slot instead of failing with 429),
+and items only get a 429 once BATCH_SLOT_WAIT runs out.
+
+    python -m benchmarks.bench_batch
+    python -m benchmarks.bench_batch --queries 1000 --max-parallel 16 --llm-latency 0.2
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import httpx
+
+from benchmarks.fakes import install_fakes
+
+NOTES = [
+    "Patient reports a skin rash and itching",
+    "fever and chills since yesterday",
+    "persistent headache and nausea",
+    "stomach pain and vomiting after meals",
+    "yellow eyes and dark urine",
+    "cough with chest pain and breathlessness",
+    "joint pain and swelling in the knees",
+    "frequent urination and excessive thirst",
+]
+FAILING_NOTE = "FAIL: injected error"
+
+
+def make_queries(n):
+    # Unique texts, so neither the embedding cache nor the answer cache can help
+    queries = [f"{NOTES[i % len(NOTES)]} (intake note {i})" for i in range(n)]
+    queries[n // 2] = FAILING_NOTE
+    return queries
+
+
+def instrument(graph_tools):
+    """Counts retrieval round trips (single and batch)."""
+    counts = {"search": 0}
+    single, batch = graph_tools.asearch_diseases, graph_tools.asearch_diseases_batch
+
+    async def counted_single(*args, **kwargs):
+        counts["search"] += 1
+        return await single(*args, **kwargs)
+
+    async def counted_batch(*args, **kwargs):
+        counts["search"] += 1
+        return await batch(*args, **kwargs)
+
+    graph_tools.asearch_diseases = counted_single
+    graph_tools.asearch_diseases_batch = counted_batch
+    return counts
+
+
+async def post_batch(client, queries, max_parallel):
+    async with client.stream("POST", "/chat/batch", json={"queries": queries, "max_parallel": max_parallel}) as response:
+        return [json.loads(line) async for line in response.aiter_lines() if line]
+
+
+async def saturated(client, queries, max_parallel):
+    """(429 items with a 1-slot limiter, 429 items while that slot is held past BATCH_SLOT_WAIT)."""
+    import api
+    from concurrency import ConcurrencyLimiter
+
+    api.chat_limiter, limiter = ConcurrencyLimiter(1, 0), api.chat_limiter
+    try:
+        waited = await post_batch(client, queries, max_parallel)
+        api.BATCH_SLOT_WAIT, slot_wait = 0.05, api.BATCH_SLOT_WAIT
+        async with api.chat_limiter.slot():
+            timed_out = await post_batch(client, queries[:4], max_parallel)
+        api.BATCH_SLOT_WAIT = slot_wait
+    finally:
+        api.chat_limiter = limiter
+    count = lambda items: sum(1 for item in items if item.get("error", {}).get("status") == 429)
+    return count(waited), count(timed_out)
+
+
+async def run(queries, max_parallel):
+    import api
+    import graph_tools
+    from embedding_cache import EmbeddingCache
+
+    api.ANSWER_CACHE_ENABLED = False
+    counts = instrument(graph_tools)
+    seeded_inputs = api.seeded_inputs
+
+    def flaky_seeded_inputs(user_query, matches):
+        if user_query == FAILING_NOTE:
+            raise RuntimeError("injected failure")
+        return seeded_inputs(user_query, matches)
+
+    api.seeded_inputs = flaky_seeded_inputs
+
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # 1. One request per note, sequentially (today's nightly job)
+        encode_before, counts["search"] = graph_tools.model.calls, 0
+        start = time.perf_counter()
+        for query in queries:
+            if query != FAILING_NOTE:
+                (await client.post("/chat", json={"query": query})).raise_for_status()
+        sequential = (time.perf_counter() - start, graph_tools.model.calls - encode_before, counts["search"])
+
+        # 2. One batch call
+        graph_tools.embedding_cache = EmbeddingCache("offline-benchmark")
+        encode_before, counts["search"] = graph_tools.model.calls, 0
+        items, first_item = [], None
+        start = time.perf_counter()
+        async with client.stream("POST", "/chat/batch", json={"queries": queries, "max_parallel": max_parallel}) as response:
+            async for line in response.aiter_lines():
+                if line:
+                    items.append(json.loads(line))
+                    first_item = first_item or time.perf_counter() - start
+        batch = (time.perf_counter() - start, graph_tools.model.calls - encode_before, counts["search"])
+
+        # 3. Saturated pipeline limit
+        rejected = await saturated(client, [q for q in queries if q != FAILING_NOTE][:32], max_parallel)
+
+    return sequential, batch, first_item, items, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--max-parallel", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake LLM call")
+    parser.add_argument("--db-latency", type=float, default=0.005, help="seconds per fake graph query")
+    args = parser.parse_args()
+
+    install_fakes(llm_latency=args.llm_latency, db_latency=args.db_latency)
+    import api
+    api.BATCH_MAX_PARALLEL = max(api.BATCH_MAX_PARALLEL, args.max_parallel)
+    queries = make_queries(args.queries)
+    sequential, batch, first_item, items, rejected = asyncio.run(run(queries, args.max_parallel))
+
+    print(f"📦 {len(queries)} intake notes, max parallel {args.max_parallel}\n")
+    print(f"{'':<22}{'wall (s)':>10}{'encode calls':>14}{'search trips':>14}")
+    print(f"{'sequential /chat':<22}{sequential[0]:>10.2f}{sequential[1]:>14}{sequential[2]:>14}")
+    print(f"{'/chat/batch':<22}{batch[0]:>10.2f}{batch[1]:>14}{batch[2]:>14}")
+    print(f"\nFirst NDJSON line after {first_item * 1000:.0f} ms, {sequential[0] / batch[0]:.1f}x faster overall")
+
+    failures = []
+    indices = [item["index"] for item in items]
+    if sorted(indices) != list(range(len(queries))):
+        failures.append("items missing or duplicated")
+    errors = [item for item in items if "error" in item]
+    if [e["query"] for e in errors] != [FAILING_NOTE]:
+        failures.append(f"expected exactly the injected failure, got {len(errors)} errors")
+    if batch[1] > 1 or batch[2] > 1:
+        failures.append("batch did more than one encode call / search round trip")
+    print(f"Completion order differs from input order: {indices != sorted(indices)}")
+    print(f"1-slot limiter: {rejected[0]} items rejected while waiting, {rejected[1]}/4 after BATCH_SLOT_WAIT ran out")
+    if rejected[0]:
+        failures.append("batch items were rejected with 429 instead of waiting for a slot")
+    if rejected[1] != 4:
+        failures.append("items did not get a 429 after BATCH_SLOT_WAIT")
+
+    if failures:
+        print(f"❌ {', '.join(failures)}")
+        sys.exit(1)
+    print("✅ Batch returned every item once, with the failure isolated to its own line.")
+
+
+if __name__ == "__main__":
+    main()
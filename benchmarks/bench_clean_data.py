@@ -0,0 +1,137 @@
+"""
+ETL benchmark: the original per-disease filter + iterrows() loop vs. the
+melt/groupby transform and the chunked streaming transform in clean_data.py,
+on synthetically scaled-up copies of dataset.csv.
+
+The vectorized and streaming outputs must be byte-for-byte identical to
+each other. The legacy loop collected symptoms in a set (hash-seed
+dependent order), so it is compared on content only.
+
+    python -m benchmarks.bench_clean_data
+    python -m benchmarks.bench_clean_data --scales 1,10,100 --legacy-max-scale 10
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+import clean_data
+from symptom_lexicon import SymptomLexicon
+
+
+def legacy_transform(data_dir):
+    """The original clean_data.main body (O(diseases x rows) + iterrows)."""
+    df_dataset = pd.read_csv(os.path.join(data_dir, "dataset.csv"))
+    df_desc = pd.read_csv(os.path.join(data_dir, "symptom_Description.csv"))
+    df_prec = pd.read_csv(os.path.join(data_dir, "symptom_precaution.csv"))
+    df_sev = pd.read_csv(os.path.join(data_dir, "Symptom-severity.csv"))
+
+    df_dataset = df_dataset.map(clean_data.clean_text)
+    df_desc['Disease'] = df_desc['Disease'].apply(clean_data.clean_text)
+    df_prec['Disease'] = df_prec['Disease'].apply(clean_data.clean_text)
+    df_sev['Symptom'] = df_sev['Symptom'].apply(clean_data.clean_text)
+    # Symptom spellings resolved like clean_data does now (the original used hard-coded replacements)
+    lexicon = SymptomLexicon(df_sev['Symptom'])
+    columns = [c for c in clean_data.SYMPTOM_COLUMNS if c in df_dataset.columns]
+    df_dataset[columns] = df_dataset[columns].map(lambda s: (lexicon.resolve(s, fuzzy=False) or s) if isinstance(s, str) else s)
+
+    graph_data = []
+    for disease in df_dataset['Disease'].unique():
+        desc_row = df_desc[df_desc['Disease'] == disease]
+        description = desc_row.iloc[0]['Description'] if not desc_row.empty else "No description available."
+
+        prec_row = df_prec[df_prec['Disease'] == disease]
+        precautions = []
+        if not prec_row.empty:
+            p_list = prec_row.iloc[0][clean_data.PRECAUTION_COLUMNS].dropna().tolist()
+            precautions = [p for p in p_list if isinstance(p, str)]
+
+        d_rows = df_dataset[df_dataset['Disease'] == disease]
+        all_symptoms = set()
+        for _, row in d_rows.iterrows():
+            for i in range(1, 18):
+                col_name = f"Symptom_{i}"
+                if col_name in row and pd.notna(row[col_name]):
+                    all_symptoms.add(row[col_name])
+
+        final_symptoms = []
+        for sym in all_symptoms:
+            weight_row = df_sev[df_sev['Symptom'] == sym]
+            weight = int(weight_row.iloc[0]['weight']) if not weight_row.empty else 1
+            final_symptoms.append({"name": sym, "weight": weight})
+
+        graph_data.append({
+            "name": disease,
+            "description": description,
+            "symptoms": final_symptoms,
+            "precautions": precautions,
+        })
+    return graph_data
+
+
+def _canonical(graph_data):
+    """Order-insensitive view of the symptoms, for comparing against the legacy set order."""
+    return [{**d, "symptoms": sorted((s["name"], s["weight"]) for s in d["symptoms"])} for d in graph_data]
+
+
+def make_scaled_copy(scale, workdir):
+    """Copies the data folder with dataset.csv repeated `scale` times."""
+    target = os.path.join(workdir, f"x{scale}")
+    os.makedirs(target, exist_ok=True)
+    for name in ("symptom_Description.csv", "symptom_precaution.csv", "Symptom-severity.csv"):
+        shutil.copy(os.path.join(clean_data.DATA_DIR, name), target)
+    with open(os.path.join(clean_data.DATA_DIR, "dataset.csv"), "r") as f:
+        header, *rows = f.read().splitlines()
+    with open(os.path.join(target, "dataset.csv"), "w") as f:
+        f.write(header + "\n")
+        for _ in range(scale):
+            f.write("\n".join(rows) + "\n")
+    return target, len(rows) * scale
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="1,10,100")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--legacy-max-scale", type=int, default=10, help="skip the slow legacy loop above this scale")
+    args = parser.parse_args()
+
+    with open(clean_data.OUTPUT_FILE, "r") as f:
+        committed = f.read()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"{'scale':>6} | {'rows':>8} | {'legacy s':>9} | {'vectorized s':>12} | {'streaming s':>11} | identical")
+        for scale in (int(s) for s in args.scales.split(",")):
+            data_dir, n_rows = make_scaled_copy(scale, workdir)
+            lookups = clean_data.load_lookups(data_dir)
+            dataset_path = os.path.join(data_dir, "dataset.csv")
+
+            vectorized, t_vec = _timed(lambda: clean_data.transform(pd.read_csv(dataset_path), lookups))
+            streaming, t_stream = _timed(
+                lambda: clean_data.transform_streaming(dataset_path, lookups, args.chunk_size))
+            identical = json.dumps(vectorized, indent=2) == json.dumps(streaming, indent=2)
+            if scale == 1:
+                identical = identical and json.dumps(vectorized, indent=2) == committed
+
+            t_legacy = "skipped"
+            if scale <= args.legacy_max_scale:
+                legacy, t = _timed(lambda: legacy_transform(data_dir))
+                identical = identical and _canonical(legacy) == _canonical(vectorized)
+                t_legacy = f"{t:.2f}"
+
+            print(f"{scale:>6} | {n_rows:>8} | {t_legacy:>9} | {t_vec:>12.2f} | {t_stream:>11.2f} | "
+                  f"{'✅' if identical else '❌'}")
+
+
+if __name__ == "__main__":
+    main()
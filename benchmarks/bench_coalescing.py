@@ -0,0 +1,119 @@
+"""
+Bursty duplicate traffic against /chat, with a fake LLM and the in-memory
+graph (no Groq, no Neo4j), coalescing off vs. on.
+
+Each burst sends `--burst` copies of one question at once (with case and
+punctuation variations), for `--distinct` different questions interleaved.
+The answer cache is off so only in-flight coalescing is measured. Reports
+LLM calls, model.encode calls and search round trips per request, p50/p95
+latency, and the per-key coalescing stats from `/`.
+
+    python -m benchmarks.bench_coalescing
+    python -m benchmarks.bench_coalescing --bursts 20 --burst 100 --distinct 3
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+from benchmarks.bench_batch import instrument
+from benchmarks.fakes import install_fakes
+
+QUESTIONS = [
+    "What are the symptoms of dengue",
+    "I have a skin rash and itching",
+    "fever and chills after travelling",
+    "stomach pain and vomiting",
+]
+VARIANTS = [str, str.lower, str.upper, lambda q: q + "?", lambda q: f"  {q}!  "]
+
+
+async def burst_traffic(client, bursts, burst, distinct):
+    latencies = []
+
+    async def one(query):
+        start = time.perf_counter()
+        response = await client.post("/chat", json={"query": query})
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        return response.json()
+
+    coalesced = 0
+    for b in range(bursts):
+        # A new wording per burst so the embedding cache cannot serve later bursts
+        queries = [VARIANTS[i % len(VARIANTS)](f"{QUESTIONS[(i + b) % distinct]} (alert {b})")
+                   for i in range(burst * distinct)]
+        results = await asyncio.gather(*(one(q) for q in queries))
+        coalesced += sum(1 for r in results if r.get("coalesced"))
+    return latencies, coalesced
+
+
+async def run(bursts, burst, distinct, fake_llm):
+    import api
+    import graph_tools
+
+    api.ANSWER_CACHE_ENABLED = False
+    counts = instrument(graph_tools)
+    results = {}
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for label, enabled in [("coalescing off", False), ("coalescing on", True)]:
+            graph_tools.COALESCING_ENABLED = enabled
+            llm_before, encode_before, counts["search"] = fake_llm.calls, graph_tools.model.calls, 0
+            latencies, coalesced = await burst_traffic(client, bursts, burst, distinct)
+            results[label] = {
+                "requests": len(latencies),
+                "llm_calls": fake_llm.calls - llm_before,
+                "encode_calls": graph_tools.model.calls - encode_before,
+                "searches": counts["search"],
+                "coalesced": coalesced,
+                "p50_ms": statistics.median(latencies) * 1000,
+                "p95_ms": sorted(latencies)[int(len(latencies) * 0.95)] * 1000,
+            }
+        stats = (await client.get("/")).json()["coalescing"]
+    return results, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bursts", type=int, default=10)
+    parser.add_argument("--burst", type=int, default=50, help="copies of each question per burst")
+    parser.add_argument("--distinct", type=int, default=2, help="different questions per burst")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake LLM call")
+    parser.add_argument("--db-latency", type=float, default=0.005, help="seconds per fake graph query")
+    args = parser.parse_args()
+
+    fake_llm = install_fakes(llm_latency=args.llm_latency, db_latency=args.db_latency)
+    import api
+    import multi_agent
+    multi_agent.FAST_PATH_ENABLED = False  # every request would hit the LLM
+    api.chat_limiter = api.ConcurrencyLimiter(args.burst * args.distinct, args.burst * args.distinct)
+    results, stats = asyncio.run(run(args.bursts, args.burst, min(args.distinct, len(QUESTIONS)), fake_llm))
+
+    print(f"🌊 {args.bursts} bursts x {args.distinct} questions x {args.burst} copies\n")
+    print(f"{'':<16}{'LLM/req':>9}{'encode/req':>12}{'search/req':>12}{'coalesced':>11}{'p50':>10}{'p95':>10}")
+    for label, r in results.items():
+        n = r["requests"]
+        print(f"{label:<16}{r['llm_calls'] / n:>9.2f}{r['encode_calls'] / n:>12.2f}{r['searches'] / n:>12.2f}"
+              f"{r['coalesced']:>11}{r['p50_ms']:>8.0f}ms{r['p95_ms']:>8.0f}ms")
+    print(f"\n/chat flight: {stats['chat']['leaders']} leaders, {stats['chat']['shared']} shared "
+          f"({stats['chat']['shared_rate']:.1%}); busiest keys: {stats['chat']['top_keys'][:3]}")
+
+    off, on = results["coalescing off"], results["coalescing on"]
+    expected_leaders = args.bursts * min(args.distinct, len(QUESTIONS))
+    failures = []
+    if on["llm_calls"] >= off["llm_calls"]:
+        failures.append("coalescing did not reduce LLM calls")
+    if stats["chat"]["leaders"] > expected_leaders:
+        failures.append(f"{stats['chat']['leaders']} pipeline runs for {expected_leaders} distinct burst questions")
+    if failures:
+        print(f"❌ {', '.join(failures)}")
+        sys.exit(1)
+    print(f"✅ {off['llm_calls'] / max(on['llm_calls'], 1):.0f}x fewer LLM calls under duplicate bursts.")
+
+
+if __name__ == "__main__":
+    main()
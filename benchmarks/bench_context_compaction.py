@@ -0,0 +1,130 @@
+"""
+Input tokens per /chat request with and without context compaction, with a
+fake LLM and the in-memory graph (no Groq, no Neo4j).
+
+1. Tool text only: estimated tokens of the full get_medical_context text
+   vs. the compacted one, diseases kept, and whether the top disease and the
+   user's matched symptoms survive.
+2. Whole request: approximate tokens of every prompt sent to the LLM
+   (Intern turns + Supervisor), CONTEXT_COMPACTION off vs. on.
+
+Token counts use the same 4-chars-per-token estimate as langchain_core.
+
+    python -m benchmarks.bench_context_compaction
+    python -m benchmarks.bench_context_compaction --budget 250 --queries 500
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+
+import httpx
+
+from benchmarks.bench_symptom_matcher import make_queries
+from benchmarks.fakes import install_fakes
+
+
+def track_llm_input(multi_agent):
+    """Approximate tokens of every Intern and Supervisor prompt, by wrapping the prompt builders."""
+    sizes = []
+
+    def measured(build):
+        def wrapper(*args):
+            prompt = build(*args)
+            sizes.append(multi_agent.count_tokens_approximately(prompt))
+            return prompt
+        return wrapper
+
+    multi_agent.intern_prompt = measured(multi_agent.intern_prompt)
+    multi_agent.supervisor_prompt = measured(multi_agent.supervisor_prompt)
+    return sizes
+
+
+def tool_text_pass(graph_tools, compaction, queries, budget):
+    rows = []
+    for text, _ in queries:
+        matches = graph_tools.retrieve(text)
+        graph_tools.CONTEXT_COMPACTION = False
+        full_text, _ = graph_tools.render_context(matches, text)
+        graph_tools.CONTEXT_COMPACTION = True
+        compact_text, records = graph_tools.render_context(matches, text)
+        matched = {compaction.canonical(s) for s in matches[0].matched_symptoms}
+        rows.append({
+            "full": compaction.estimate_tokens(full_text),
+            "compact": compaction.estimate_tokens(compact_text),
+            "kept": len(records),
+            "top_kept": bool(records) and records[0]["disease"] == matches[0].disease,
+            "matched_kept": all(s in compact_text for s in matched),
+            "over_budget": compaction.estimate_tokens(compact_text) > budget,
+        })
+    return rows
+
+
+async def request_pass(graph_tools, queries, n_requests, llm_sizes):
+    import api
+
+    results = {}
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for label, compaction in [("compaction off", False), ("compaction on", True)]:
+            graph_tools.CONTEXT_COMPACTION = compaction
+            per_request = []
+            for i in range(n_requests):
+                before = len(llm_sizes)
+                response = await client.post("/chat", json={"query": queries[i % len(queries)][0]})
+                response.raise_for_status()
+                per_request.append(sum(llm_sizes[before:]))
+            results[label] = per_request
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--budget", type=int, default=None, help="CONTEXT_TOKEN_BUDGET (default: the configured one)")
+    args = parser.parse_args()
+
+    install_fakes(llm_latency=0.0, db_latency=0.0)
+    import api
+    import compaction
+    import graph_tools
+    import multi_agent
+
+    api.ANSWER_CACHE_ENABLED = False
+    multi_agent.FAST_PATH_ENABLED = False
+    if args.budget:
+        graph_tools.CONTEXT_TOKEN_BUDGET = args.budget
+    budget = graph_tools.CONTEXT_TOKEN_BUDGET
+    queries = make_queries(args.queries, 3)
+
+    rows = tool_text_pass(graph_tools, compaction, queries, budget)
+    full, compact = statistics.mean(r["full"] for r in rows), statistics.mean(r["compact"] for r in rows)
+    print(f"🗜️ {len(rows)} queries, token budget {budget}\n")
+    print(f"Tool text tokens: full {full:.0f}, compacted {compact:.0f} ({(1 - compact / full) * 100:.0f}% fewer)")
+    print(f"Diseases kept per query: {statistics.mean(r['kept'] for r in rows):.2f}")
+    print(f"Top disease kept: {sum(r['top_kept'] for r in rows) / len(rows):.1%}, "
+          f"matched symptoms kept: {sum(r['matched_kept'] for r in rows) / len(rows):.1%}")
+
+    llm_sizes = track_llm_input(multi_agent)
+    results = asyncio.run(request_pass(graph_tools, queries, args.requests, llm_sizes))
+    print("\nLLM input tokens per /chat request (Intern turns + Supervisor):")
+    baseline = statistics.mean(results["compaction off"])
+    for label, sizes in results.items():
+        mean = statistics.mean(sizes)
+        print(f"  {label:<16} mean {mean:>6.0f}  p95 {sorted(sizes)[int(len(sizes) * 0.95)]:>6}"
+              f"  ({(mean / baseline - 1) * 100:+.0f}%)")
+
+    failures = []
+    if any(r["over_budget"] and r["kept"] > 1 for r in rows):
+        failures.append("compacted text over budget with diseases left to drop")
+    if not all(r["top_kept"] for r in rows):
+        failures.append("compaction dropped the top disease")
+    if failures:
+        print(f"❌ {', '.join(failures)}")
+        sys.exit(1)
+    print("✅ Compacted context stays within budget and keeps the top disease.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Per-call overhead of the Neo4j access layer.
+
+Compares the old graph_tools pattern (new driver + handshake + close on every
+tool call) with the shared, pooled driver from db.py.
+
+By default it runs against an in-process Neo4j stand-in that charges a
+simulated bolt handshake + auth for every new connection and a round trip
+for every query. Use --live to run against the database configured in .env.
+
+    python -m benchmarks.bench_driver_pool
+    python -m benchmarks.bench_driver_pool --handshake-ms 15 --rtt-ms 1
+    python -m benchmarks.bench_driver_pool --live --calls 200
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+
+QUERY = "RETURN 1 AS ok"
+
+
+# --- Neo4j stand-in ---
+class _StandInSession:
+    def __init__(self, driver):
+        self.driver = driver
+        self.connection = None
+
+    def __enter__(self):
+        self.connection = self.driver._acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.driver._release(self.connection)
+
+    def close(self):
+        pass
+
+    def run(self, query, parameters=None, **kwargs):
+        time.sleep(self.driver.rtt)
+        return [{"ok": 1}]
+
+
+class _StandInDriver:
+    """Mimics the parts of neo4j.Driver that db.py uses, with a real idle pool."""
+
+    def __init__(self, handshake, rtt):
+        self.handshake = handshake
+        self.rtt = rtt
+        self.idle = []
+        self.lock = threading.Lock()
+        self.connections_opened = 0
+
+    def _acquire(self):
+        with self.lock:
+            if self.idle:
+                return self.idle.pop()
+            self.connections_opened += 1
+        time.sleep(self.handshake)  # TCP + bolt HELLO + auth
+        return object()
+
+    def _release(self, connection):
+        with self.lock:
+            self.idle.append(connection)
+
+    def session(self, **kwargs):
+        return _StandInSession(self)
+
+    def verify_connectivity(self):
+        with self.session():
+            pass
+
+    def close(self):
+        self.idle.clear()
+
+
+class StandInGraphDatabase:
+    handshake = 0.010
+    rtt = 0.001
+    drivers = []
+
+    @classmethod
+    def driver(cls, uri, auth=None, **config):
+        drv = _StandInDriver(cls.handshake, cls.rtt)
+        cls.drivers.append(drv)
+        return drv
+
+
+# --- Benchmark ---
+def _legacy_call(graph_database, uri, auth):
+    """The pre-pooling pattern: one driver per tool call."""
+    driver = graph_database.driver(uri, auth=auth)
+    with driver.session() as session:
+        list(session.run(QUERY))
+    driver.close()
+
+
+def _time_calls(fn, calls):
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<22} mean {statistics.mean(timings):8.3f} ms | "
+          f"p50 {statistics.median(timings):8.3f} ms | p95 {p95:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--handshake-ms", type=float, default=10.0)
+    parser.add_argument("--rtt-ms", type=float, default=1.0)
+    parser.add_argument("--live", action="store_true", help="use the Neo4j server from .env")
+    args = parser.parse_args()
+
+    if not args.live:
+        os.environ.setdefault("NEO4J_URI", "bolt://stand-in:7687")
+        os.environ.setdefault("NEO4J_USERNAME", "neo4j")
+        os.environ.setdefault("NEO4J_PASSWORD", "stand-in")
+
+    import db
+
+    if not args.live:
+        StandInGraphDatabase.handshake = args.handshake_ms / 1000
+        StandInGraphDatabase.rtt = args.rtt_ms / 1000
+        db.GraphDatabase = StandInGraphDatabase
+
+    backend = "live Neo4j" if args.live else f"stand-in (handshake {args.handshake_ms} ms, rtt {args.rtt_ms} ms)"
+    print(f"📏 {args.calls} calls against {backend}\n")
+
+    legacy = _time_calls(lambda: _legacy_call(db.GraphDatabase, db.URI, db.AUTH), args.calls)
+    db.run_query(QUERY)  # warm the pool once, as the API lifespan does
+    pooled = _time_calls(lambda: db.run_query(QUERY), args.calls)
+    db.close_driver()
+
+    _report("driver per call", legacy)
+    _report("shared pooled driver", pooled)
+    saved = statistics.mean(legacy) - statistics.mean(pooled)
+    print(f"\n⚡ Per-call overhead removed: {saved:.3f} ms "
+          f"({statistics.mean(legacy) / max(statistics.mean(pooled), 1e-9):.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
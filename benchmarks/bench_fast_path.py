@@ -0,0 +1,105 @@
+"""
+Latency split between the fast-path router and the full agent loop, with a
+fake LLM and the in-memory graph (no Groq, no Neo4j).
+
+Each query runs through `multi_agent.app` with the router on and off; the
+table shows the route taken, LLM calls and latency percentiles per group.
+Deterministic requests (BMI, one named disease) should skip every LLM call;
+ambiguous ones ("what is hepatitis": B, C, D or E?) must go to the agent.
+
+    python -m benchmarks.bench_fast_path
+    python -m benchmarks.bench_fast_path --llm-latency 0.3 --rounds 20
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+from benchmarks.fakes import install_fakes
+
+QUERIES = [
+    # Deterministic: answered by the router
+    "calculate my BMI, 80 kg 1.8 m",
+    "What is my BMI? I weigh 65 kg and I am 170 cm tall",
+    "What are the precautions for Malaria?",
+    "What are the symptoms of Typhoid?",
+    "tell me about piles",
+    # Open-ended: need the agent
+    "I have a skin rash and itching",
+    "fever and chills for three days",
+    "what is the best food for diabetes",
+    # Ambiguous: several diseases share the name
+    "what is hepatitis",
+    "precautions for hepatitis",
+]
+AMBIGUOUS = {"what is hepatitis", "precautions for hepatitis"}
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))] if values else 0.0
+
+
+async def run(fake_llm, rounds, fast_path):
+    import multi_agent
+    from langchain_core.messages import HumanMessage
+
+    multi_agent.FAST_PATH_ENABLED = fast_path
+    latencies, llm_calls, routes = defaultdict(list), defaultdict(list), {}
+
+    for _ in range(rounds):
+        for query in QUERIES:
+            before = fake_llm.calls
+            start = time.perf_counter()
+            result = await multi_agent.app.ainvoke({"messages": [HumanMessage(content=query)]})
+            latencies[query].append(time.perf_counter() - start)
+            llm_calls[query].append(fake_llm.calls - before)
+            routes[query] = result.get("route", "agent")
+    return latencies, llm_calls, routes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--llm-latency", type=float, default=0.1, help="seconds per fake LLM call")
+    parser.add_argument("--db-latency", type=float, default=0.002, help="seconds per fake graph query")
+    args = parser.parse_args()
+
+    fake_llm = install_fakes(llm_latency=args.llm_latency, db_latency=args.db_latency)
+    baseline, baseline_calls, _ = asyncio.run(run(fake_llm, args.rounds, fast_path=False))
+    routed, routed_calls, routes = asyncio.run(run(fake_llm, args.rounds, fast_path=True))
+
+    print(f"🚦 Fast-path router, {args.rounds} rounds, fake LLM at {args.llm_latency * 1000:.0f} ms/call\n")
+    print(f"{'query':<52}{'route':<14}{'LLM calls':>10}{'agent p50':>11}{'routed p50':>12}{'p95':>9}")
+    by_route = defaultdict(lambda: {"agent": [], "routed": []})
+    for query in QUERIES:
+        route = routes[query]
+        by_route[route]["agent"] += baseline[query]
+        by_route[route]["routed"] += routed[query]
+        calls = f"{statistics.mean(baseline_calls[query]):.0f} -> {statistics.mean(routed_calls[query]):.0f}"
+        print(f"{query[:50]:<52}{route:<14}{calls:>10}"
+              f"{statistics.median(baseline[query]) * 1000:>9.1f}ms"
+              f"{statistics.median(routed[query]) * 1000:>10.1f}ms"
+              f"{_percentile(routed[query], 0.95) * 1000:>7.1f}ms")
+
+    print()
+    for route, timings in sorted(by_route.items()):
+        speedup = statistics.median(timings["agent"]) / statistics.median(timings["routed"])
+        print(f"{route:<14} p50 {statistics.median(timings['agent']) * 1000:.1f} ms -> "
+              f"{statistics.median(timings['routed']) * 1000:.1f} ms ({speedup:.1f}x)")
+
+    fast = [q for q in QUERIES if routes[q] != "agent"]
+    guessed = [q for q in AMBIGUOUS if routes[q] != "agent"]
+    if guessed:
+        print(f"❌ Ambiguous disease questions answered by the router: {guessed}")
+        sys.exit(1)
+    if any(max(routed_calls[q]) for q in fast):
+        print("❌ A fast-path request still called the LLM.")
+        sys.exit(1)
+    print(f"\n✅ {len(fast)}/{len(QUERIES)} queries routed without any LLM call, ambiguous ones went to the agent.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Knowledge-graph export for the viewer: the legacy NetworkX + PyVis page vs.
+the paged export, NumPy layout and sharded JSON payload (no Neo4j needed:
+pages are built from data/medical_graph_data.json, replicated --scale times).
+
+Reports export time, layout time (computed, then reused from the cache),
+payload bytes, and what the page has to load and parse before its first
+render (graph.json vs. the whole PyVis HTML). Browser render time itself is
+not measured here; the new page draws only the disease nodes, without
+physics, until a node is expanded.
+
+    python -m benchmarks.bench_graph_export
+    python -m benchmarks.bench_graph_export --scale 20 --page-size 500
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.fakes import set_offline_env
+
+
+def scaled_pages(scale, page_size):
+    """Pages like visualize_graph.iter_pages for `scale` renamed copies of the graph."""
+    import visualize_graph
+
+    base = [row for page in visualize_graph.iter_json_pages(page_size=10_000) for row in page]
+    rows = [{
+        "source": f"{row['source']} #{copy}" if copy else row["source"],
+        "edges": [{**e, "target": f"{e['target']} #{copy}" if copy else e["target"]} for e in row["edges"]],
+    } for copy in range(scale) for row in base]
+    rows.sort(key=lambda row: row["source"])
+    for i in range(0, len(rows), page_size):
+        yield rows[i:i + page_size]
+
+
+def legacy_export(pages, path):
+    """The previous visualize_graph: NetworkX row by row, then a physics-driven PyVis page."""
+    import networkx as nx
+    from pyvis.network import Network
+
+    color_map = {"Disease": "#ff5733", "Symptom": "#33ff57", "Precaution": "#3357ff"}
+    G = nx.DiGraph()
+    for page in pages:
+        for row in page:
+            G.add_node(row["source"], label=row["source"], title="Disease", color=color_map["Disease"])
+            for e in row["edges"]:
+                G.add_node(e["target"], label=e["target"], title=e["type"], color=color_map.get(e["type"], "gray"))
+                G.add_edge(row["source"], e["target"], title=e["rel"])
+    net = Network(height="750px", width="100%", bgcolor="#222222", font_color="white", notebook=False)
+    net.from_nx(G)
+    net.show_buttons(filter_=["physics"])
+    net.save_graph(path)
+    return os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=10, help="copies of the graph")
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=150, help="layout iterations")
+    args = parser.parse_args()
+
+    set_offline_env()
+    import visualize_graph
+
+    workdir = tempfile.mkdtemp(prefix="graph-export-")
+    try:
+        print(f"🕸️ Graph x{args.scale}, {args.page_size} diseases per page\n")
+
+        start = time.perf_counter()
+        n_pages = 0
+
+        def counted(pages):
+            nonlocal n_pages
+            for page in pages:
+                n_pages += 1
+                yield page
+
+        graph = visualize_graph.build_arrays(counted(scaled_pages(args.scale, args.page_size)))
+        export_s = time.perf_counter() - start
+        print(f"Export: {len(graph['names'])} nodes, {len(graph['src'])} edges in {n_pages} pages, {export_s:.2f}s")
+
+        layout_file = os.path.join(workdir, "layout.npz")
+        start = time.perf_counter()
+        positions, _ = visualize_graph.get_layout(graph, layout_file, args.iterations)
+        layout_s = time.perf_counter() - start
+        start = time.perf_counter()
+        _, recomputed = visualize_graph.get_layout(graph, layout_file, args.iterations)
+        reuse_s = time.perf_counter() - start
+        print(f"Layout: {layout_s:.2f}s computed, {reuse_s * 1000:.1f} ms reused (recomputed: {recomputed})")
+
+        output = os.path.join(workdir, "graph_export")
+        start = time.perf_counter()
+        written = visualize_graph.write_payload(graph, positions, output)
+        payload_s = time.perf_counter() - start
+        index_path = os.path.join(output, "graph.json")
+        start = time.perf_counter()
+        with open(index_path, "r", encoding="utf-8") as f:
+            json.load(f)
+        parse_ms = (time.perf_counter() - start) * 1000
+        shard_sizes = [os.path.getsize(os.path.join(output, "neighbors", name))
+                       for name in os.listdir(os.path.join(output, "neighbors"))]
+        print(f"Payload: {written / 1024:.0f} KB in {payload_s:.2f}s; first render loads graph.json "
+              f"{os.path.getsize(index_path) / 1024:.0f} KB (parse {parse_ms:.1f} ms), "
+              f"then one ~{sum(shard_sizes) / len(shard_sizes) / 1024:.0f} KB shard per expanded neighborhood")
+
+        try:
+            start = time.perf_counter()
+            legacy_bytes = legacy_export(scaled_pages(args.scale, args.page_size), os.path.join(workdir, "legacy.html"))
+            legacy_s = time.perf_counter() - start
+            print(f"\nLegacy NetworkX + PyVis (no LIMIT): {legacy_s:.2f}s, {legacy_bytes / 1024:.0f} KB HTML "
+                  f"loaded and laid out by physics in the browser before anything is shown")
+            print(f"New export + layout + payload: {export_s + layout_s + payload_s:.2f}s "
+                  f"(next runs reuse the layout: {export_s + reuse_s + payload_s:.2f}s)")
+        except ImportError:
+            print("\n(networkx/pyvis not installed: legacy comparison skipped)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
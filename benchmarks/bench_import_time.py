@@ -0,0 +1,81 @@
+"""
+Cold-start regression check: how long `import api` takes in a fresh
+interpreter, and which modules dominate (`python -X importtime`).
+
+Fails if the median import is over the budget, or if a module that should
+only load lazily (torch, sentence_transformers, langchain_groq) is pulled
+in at import time.
+
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --budget 1.5 --runs 5 --top 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.fakes import OFFLINE_ENV
+
+LAZY_MODULES = ("torch", "sentence_transformers", "transformers", "langchain_groq", "groq")
+
+
+def import_once(module):
+    """Runs `python -X importtime -c 'import module'`; returns {module: (self_us, cumulative_us)}."""
+    env = {**os.environ, **OFFLINE_ENV}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env,
+    )
+    if result.returncode != 0:
+        sys.exit(f"❌ import {module} failed:\n{result.stderr[-2000:]}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if self_us.isdigit():
+            timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="api")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=1.0, help="cold-start budget in seconds")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [import_once(args.module) for _ in range(args.runs)]
+    totals = [run[args.module][1] / 1e6 for run in runs]
+    total = statistics.median(totals)
+
+    # Top-level packages by cumulative time (last run; first-level names only)
+    last = runs[-1]
+    packages = {}
+    for name, (_, cumulative) in last.items():
+        if "." not in name:
+            packages[name] = max(packages.get(name, 0), cumulative)
+
+    print(f"⏱️ import {args.module}: median {total:.3f}s over {args.runs} runs (budget {args.budget:.2f}s)\n")
+    print(f"{'package':<32}{'cumulative (ms)':>16}")
+    for name, cumulative in sorted(packages.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"{name:<32}{cumulative / 1000:>16.1f}")
+
+    failures = []
+    eager = sorted(m for m in LAZY_MODULES if m in last)
+    if eager:
+        failures.append(f"loaded at import time: {', '.join(eager)}")
+    if total > args.budget:
+        failures.append(f"import took {total:.3f}s, over the {args.budget:.2f}s budget")
+
+    if failures:
+        print(f"\n❌ {'; '.join(failures)}")
+        sys.exit(1)
+    print(f"\n✅ Cold start within budget; {', '.join(LAZY_MODULES)} stay lazy.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+One Intern step with several tool calls (three retrievals + a BMI), with a
+fake LLM and the in-memory graph (no Groq, no Neo4j).
+
+Compares the tools node run serially (TOOL_MAX_PARALLEL=1, no merged
+retrieval: what LangGraph's ToolNode did with the sync tools) against the
+concurrent node with merged retrieval: tools-node latency, model.encode
+calls and search round trips. Also checks that ToolMessages come back in
+tool_call order and that a tool over its timeout yields an error message
+instead of stalling the step.
+
+    python -m benchmarks.bench_parallel_tools
+    python -m benchmarks.bench_parallel_tools --requests 100 --db-latency 0.05
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from benchmarks.fakes import install_fakes
+
+STEP = [
+    {"name": "consult_medical_database", "args": {"symptom_description": "skin rash and itching"}},
+    {"name": "calculate_bmi", "args": {"weight_kg": 80.0, "height_m": 1.8}},
+    {"name": "consult_medical_database", "args": {"symptom_description": "fever and chills"}},
+    {"name": "consult_medical_database", "args": {"symptom_description": "stomach pain and vomiting"}},
+]
+
+
+def multi_tool_script(query):
+    # Unique descriptions per request so the embedding cache does not hide the encode calls
+    return [{**c, "args": {k: f"{v} ({query})" if isinstance(v, str) else v for k, v in c["args"].items()}}
+            for c in STEP]
+
+
+def instrument(graph_tools):
+    counts = {"search": 0}
+    for name in ("search_diseases", "search_diseases_batch", "asearch_diseases", "asearch_diseases_batch"):
+        original = getattr(graph_tools, name)
+        if name.startswith("a"):
+            async def counted(*args, _original=original, **kwargs):
+                counts["search"] += 1
+                return await _original(*args, **kwargs)
+        else:
+            def counted(*args, _original=original, **kwargs):
+                counts["search"] += 1
+                return _original(*args, **kwargs)
+        setattr(graph_tools, name, counted)
+    return counts
+
+
+async def run(multi_agent, graph_tools, counts, n_requests, sync):
+    from langchain_core.messages import HumanMessage
+
+    latencies, encodes, searches, orders_ok = [], [], [], True
+    for i in range(n_requests):
+        state = {"messages": [HumanMessage(content=f"request {i}")]}
+        step = await multi_agent.get_llm_with_tools().ainvoke(multi_agent.intern_prompt(state))
+        state["messages"].append(step)
+        encode_before, search_before = graph_tools.model.calls, counts["search"]
+        start = time.perf_counter()
+        if sync:
+            result = await asyncio.to_thread(multi_agent.tools_node, state, {})
+        else:
+            result = await multi_agent.atools_node(state, {})
+        latencies.append(time.perf_counter() - start)
+        encodes.append(graph_tools.model.calls - encode_before)
+        searches.append(counts["search"] - search_before)
+        ids = [m.tool_call_id for m in result["messages"]]
+        orders_ok &= ids == [c["id"] for c in step.tool_calls]
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "encode_calls": statistics.mean(encodes),
+        "search_trips": statistics.mean(searches),
+        "order_ok": orders_ok,
+    }
+
+
+async def timeout_check(multi_agent, db_latency):
+    """A retrieval slower than its timeout must not hold up the BMI result."""
+    from langchain_core.messages import HumanMessage
+
+    # Unmerged, so each retrieval runs (and times out) inside its own tool call
+    multi_agent.TOOL_MERGE_RETRIEVAL = False
+    multi_agent.TOOL_TIMEOUT = db_latency / 2
+    state = {"messages": [HumanMessage(content="timeout check")]}
+    state["messages"].append(await multi_agent.get_llm_with_tools().ainvoke(multi_agent.intern_prompt(state)))
+    start = time.perf_counter()
+    result = await multi_agent.atools_node(state, {})
+    elapsed = time.perf_counter() - start
+    multi_agent.TOOL_TIMEOUT = 15.0
+    statuses = [(m.name, m.status) for m in result["messages"]]
+    return elapsed, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--db-latency", type=float, default=0.02, help="seconds per fake graph query")
+    args = parser.parse_args()
+
+    install_fakes(llm_latency=0.0, db_latency=args.db_latency, script=multi_tool_script)
+    import graph_tools
+    import multi_agent
+
+    counts = instrument(graph_tools)
+    results = {}
+    for label, parallel, merge, sync in [
+        ("serial", 1, False, False),
+        ("concurrent", 4, False, False),
+        ("concurrent + merged", 4, True, False),
+        ("sync, merged", 4, True, True),
+    ]:
+        multi_agent.TOOL_MAX_PARALLEL = parallel
+        multi_agent.TOOL_MERGE_RETRIEVAL = merge
+        results[label] = asyncio.run(run(multi_agent, graph_tools, counts, args.requests, sync))
+
+    print(f"🧰 {len(STEP)} tool calls per step ({sum(c['name'] == 'consult_medical_database' for c in STEP)} "
+          f"retrievals + BMI), {args.requests} steps, db latency {args.db_latency * 1000:.0f} ms\n")
+    print(f"{'':<22}{'p50':>10}{'encode':>10}{'searches':>10}{'order':>8}")
+    for label, r in results.items():
+        print(f"{label:<22}{r['p50_ms']:>8.1f}ms{r['encode_calls']:>10.1f}{r['search_trips']:>10.1f}"
+              f"{'ok' if r['order_ok'] else 'WRONG':>8}")
+
+    elapsed, statuses = asyncio.run(timeout_check(multi_agent, args.db_latency))
+    print(f"\nTimeout check ({args.db_latency / 2 * 1000:.0f} ms budget): step took {elapsed * 1000:.0f} ms, {statuses}")
+
+    failures = []
+    if not all(r["order_ok"] for r in results.values()):
+        failures.append("ToolMessage order differs from tool_call order")
+    if results["concurrent + merged"]["search_trips"] > 1:
+        failures.append("merged step did more than one search round trip")
+    if ("calculate_bmi", "success") not in statuses or ("consult_medical_database", "error") not in statuses:
+        failures.append("timeout did not isolate the slow tool")
+    if failures:
+        print(f"❌ {', '.join(failures)}")
+        sys.exit(1)
+    print("✅ Tool calls ran concurrently, in order, with one merged retrieval per step.")
+
+
+if __name__ == "__main__":
+    main()
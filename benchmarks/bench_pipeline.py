@@ -0,0 +1,241 @@
+"""
+End-to-end benchmark of the agent graphs (`multi_agent.app` and `agent.app`)
+with a scripted fake LLM and the in-memory graph (no Groq, no Neo4j).
+
+1. Latency pass: every query set at the given concurrency -> p50/p95/p99,
+   throughput and per-node latency (medical_intern, tools, supervisor, ...).
+2. Allocation pass: one request per query, sequentially, under tracemalloc
+   -> net and peak allocations per node.
+
+Results are written to benchmarks/results/pipeline-<timestamp>.json;
+--compare prints the change against an earlier results file.
+
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --pipelines multi_agent --requests 500 --concurrency 32
+    python -m benchmarks.bench_pipeline --compare benchmarks/results/pipeline-20260101-120000.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from benchmarks.fakes import install_fakes
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+
+QUERY_SETS = {
+    "symptoms": [
+        "I have a skin rash and itching",
+        "fever and chills for three days",
+        "stomach pain and vomiting after meals",
+        "yellow eyes and dark urine",
+        "cough with chest pain and breathlessness",
+    ],
+    "disease": [
+        "What are the precautions for Malaria?",
+        "What are the symptoms of Typhoid?",
+        "tell me about piles",
+    ],
+    "bmi": [
+        "calculate my BMI, 80 kg 1.8 m",
+        "What is my BMI? I weigh 65 kg and I am 170 cm tall",
+    ],
+}
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))] if values else 0.0
+
+
+def _summary_ms(values):
+    return {
+        "p50": round(_percentile(values, 0.50) * 1000, 2),
+        "p95": round(_percentile(values, 0.95) * 1000, 2),
+        "p99": round(_percentile(values, 0.99) * 1000, 2),
+        "mean": round(statistics.mean(values) * 1000, 2) if values else 0.0,
+    }
+
+
+class NodeProfiler(BaseCallbackHandler):
+    """Times every LangGraph node run; with `track_memory`, also records tracemalloc deltas."""
+
+    run_inline = True
+
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.durations = {}
+        self.allocations = {}
+        self.peaks = {}
+        self._open = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        # Only the node's own run, not the runnables nested inside it
+        if node is None or kwargs.get("name") != node:
+            return
+        if self.track_memory:
+            tracemalloc.reset_peak()
+            self._open[run_id] = (node, time.perf_counter(), tracemalloc.get_traced_memory()[0])
+        else:
+            self._open[run_id] = (node, time.perf_counter(), 0)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        opened = self._open.pop(run_id, None)
+        if opened is None:
+            return
+        node, start, memory_before = opened
+        self.durations.setdefault(node, []).append(time.perf_counter() - start)
+        if self.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            self.allocations.setdefault(node, []).append(current - memory_before)
+            self.peaks.setdefault(node, []).append(peak - memory_before)
+
+    on_chain_error = on_chain_end
+
+
+def load_pipeline(name, fake_llm, fast_path):
+    if name == "multi_agent":
+        import multi_agent
+        multi_agent.FAST_PATH_ENABLED = fast_path
+        return multi_agent.app
+    import agent
+    agent.llm = fake_llm
+    agent.llm_with_tools = fake_llm
+    return agent.app
+
+
+async def latency_pass(app, queries, n_requests, concurrency, fake_llm):
+    from langchain_core.messages import HumanMessage
+
+    profiler = NodeProfiler()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, routes = [], {}
+
+    async def one(i):
+        query = queries[i % len(queries)]
+        async with semaphore:
+            start = time.perf_counter()
+            result = await app.ainvoke({"messages": [HumanMessage(content=query)]}, {"callbacks": [profiler]})
+            latencies.append(time.perf_counter() - start)
+            route = result.get("route", "agent")
+            routes[route] = routes.get(route, 0) + 1
+
+    calls_before = fake_llm.calls
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n_requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": n_requests,
+        "latency_ms": _summary_ms(latencies),
+        "throughput_rps": round(n_requests / elapsed, 2),
+        "llm_calls_per_request": round((fake_llm.calls - calls_before) / n_requests, 2),
+        "routes": routes,
+    }, profiler
+
+
+async def allocation_pass(app, queries):
+    from langchain_core.messages import HumanMessage
+
+    profiler = NodeProfiler(track_memory=True)
+    # Warm-up run so one-off imports and caches are not charged to the first node
+    await app.ainvoke({"messages": [HumanMessage(content=queries[0])]})
+    tracemalloc.start()
+    try:
+        for query in queries:
+            await app.ainvoke({"messages": [HumanMessage(content=query)]}, {"callbacks": [profiler]})
+    finally:
+        tracemalloc.stop()
+    return profiler
+
+
+def node_report(timing, memory):
+    nodes = {}
+    for node, durations in timing.durations.items():
+        nodes[node] = {"calls": len(durations), **{f"{k}_ms": v for k, v in _summary_ms(durations).items()}}
+        if node in memory.allocations:
+            nodes[node]["alloc_kb_mean"] = round(statistics.mean(memory.allocations[node]) / 1024, 1)
+            nodes[node]["peak_kb_max"] = round(max(memory.peaks[node]) / 1024, 1)
+    return nodes
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def print_results(results, previous=None):
+    for pipeline, by_set in results["pipelines"].items():
+        print(f"\n🔬 {pipeline}")
+        print(f"{'query set':<12}{'p50':>9}{'p95':>9}{'p99':>9}{'req/s':>9}{'LLM/req':>9}  routes")
+        for query_set, stats in by_set.items():
+            lat = stats["latency_ms"]
+            delta = ""
+            if previous:
+                old = previous.get("pipelines", {}).get(pipeline, {}).get(query_set)
+                if old:
+                    delta = f"  (p50 {lat['p50'] - old['latency_ms']['p50']:+.1f} ms vs. {previous.get('commit')})"
+            print(f"{query_set:<12}{lat['p50']:>7.1f}ms{lat['p95']:>7.1f}ms{lat['p99']:>7.1f}ms"
+                  f"{stats['throughput_rps']:>9.1f}{stats['llm_calls_per_request']:>9.1f}  {stats['routes']}{delta}")
+            for node, n in stats["nodes"].items():
+                alloc = f"  alloc {n['alloc_kb_mean']:.1f} KB, peak {n['peak_kb_max']:.1f} KB" if "alloc_kb_mean" in n else ""
+                print(f"    {node:<16}{n['calls']:>6} calls  p50 {n['p50_ms']:.1f} ms  p95 {n['p95_ms']:.1f} ms{alloc}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pipelines", default="multi_agent,agent", help="comma-separated: multi_agent, agent")
+    parser.add_argument("--requests", type=int, default=200, help="requests per query set")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake LLM call")
+    parser.add_argument("--db-latency", type=float, default=0.002, help="seconds per fake graph query")
+    parser.add_argument("--no-fast-path", action="store_true", help="send every multi_agent request through the LLM loop")
+    parser.add_argument("--output", default=RESULTS_DIR)
+    parser.add_argument("--compare", help="earlier results file to diff against")
+    args = parser.parse_args()
+
+    fake_llm = install_fakes(llm_latency=args.llm_latency, db_latency=args.db_latency)
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "pipelines": {},
+    }
+
+    for pipeline in args.pipelines.split(","):
+        # agent.py prints a line per tool call: keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            app = load_pipeline(pipeline, fake_llm, fast_path=not args.no_fast_path)
+            by_set = {}
+            for query_set, queries in QUERY_SETS.items():
+                stats, timing = asyncio.run(latency_pass(app, queries, args.requests, args.concurrency, fake_llm))
+                memory = asyncio.run(allocation_pass(app, queries))
+                stats["nodes"] = node_report(timing, memory)
+                by_set[query_set] = stats
+        results["pipelines"][pipeline] = by_set
+
+    previous = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            previous = json.load(f)
+    print_results(results, previous)
+
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"pipeline-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
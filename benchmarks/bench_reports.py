@@ -0,0 +1,179 @@
+"""
+Clinical report PDFs: the Streamlit-side create_pdf (rebuilt on every
+response render) vs. the API's ReportService (content-hash cache, renders
+off the event loop, background jobs and batches). No Groq or Neo4j needed.
+
+Reports per-report latency cold and cached, how long the event loop stalls
+while a long report renders (inline vs. arender), and a batch export job
+with duplicate answers. Jobs submitted beyond `max_pending` must be
+rejected (QueueFull, a 429 in the API).
+
+    python -m benchmarks.bench_reports
+    python -m benchmarks.bench_reports --renders 200 --batch 500 --distinct 20
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+PARAGRAPH = ("Based on the reported symptoms – high fever, chills and nausea – the most likely "
+             "condition is “Malaria”. Other possibilities include Typhoid and Dengue… "
+             "**Precautions:** consult nearest hospital, avoid oily food, keep mosquitos out. ")
+
+
+def legacy_create_pdf(user_input, response_text):
+    """ui.create_pdf as it was: run by Streamlit for every answer it displayed."""
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    pdf.set_font("Arial", 'B', 16)
+    pdf.cell(200, 10, txt="Tanit Health AI - Clinical Report", ln=1, align='C')
+    pdf.set_font("Arial", size=12)
+    pdf.cell(200, 10, txt=f"Subject: {user_input}", ln=1, align='L')
+    pdf.ln(10)
+    clean_text = response_text.replace("*", "").encode('latin-1', 'replace').decode('latin-1')
+    pdf.multi_cell(0, 10, txt=clean_text)
+    pdf.ln(20)
+    pdf.set_font("Arial", 'I', 10)
+    pdf.cell(0, 10, txt="Generated by AI Agent. Consult a Doctor.", ln=1, align='C')
+    return pdf.output(dest='S').encode('latin-1', 'replace')
+
+
+def answer(i, paragraphs=3):
+    return f"Case {i}. " + PARAGRAPH * paragraphs
+
+
+RETRIEVAL = [{"disease": "Malaria", "score": 0.91, "symptoms": [{"name": "chills", "weight": 5}, {"name": "high fever", "weight": 7}]},
+             {"disease": "Typhoid", "score": 0.84, "symptoms": [{"name": "nausea", "weight": 5}]}]
+
+
+def timed_ms(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+async def loop_stall(render):
+    """Longest gap between 1 ms ticks of the event loop while `render()` runs."""
+    gaps, running = [], True
+
+    async def ticker():
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    await render()
+    running = False
+    await tick
+    return max(gaps) * 1000
+
+
+async def run(args):
+    from reports import ReportCache, ReportService
+
+    service = ReportService(ReportCache(), workers=2)
+    query = "I have high fever, chills, and nausea."
+
+    # 1. Per render: legacy rebuild vs. cold / cached service render
+    legacy = [timed_ms(legacy_create_pdf, query, answer(i % args.distinct)) for i in range(args.renders)]
+    cold = [timed_ms(service.render, query, answer(i), RETRIEVAL) for i in range(args.distinct)]
+    cached = [timed_ms(service.render, query, answer(i % args.distinct), RETRIEVAL) for i in range(args.renders)]
+
+    # 2. Event loop stall during one long report
+    long_answer = answer("long", paragraphs=args.long_paragraphs)
+
+    async def inline():
+        legacy_create_pdf(query, long_answer)
+
+    async def offloaded():
+        await service.arender(query, long_answer, RETRIEVAL)
+
+    stall_inline = await loop_stall(inline)
+    stall_offloaded = await loop_stall(offloaded)
+
+    # 3. Batch export job: --batch reports, --distinct different answers
+    service.cache = ReportCache()
+    batch = [(query, answer(i % args.distinct), RETRIEVAL) for i in range(args.batch)]
+    start = time.perf_counter()
+    job = service.submit(batch, archive=True)
+    while service.job(job["job_id"])["status"] in ("queued", "running"):
+        await asyncio.sleep(0.005)
+    batch_s = time.perf_counter() - start
+    job = service.job(job["job_id"])
+    archive, _, _ = service.job_result(job["job_id"]) or (b"", None, None)
+    stats = service.stats()
+    service.close()
+
+    # 4. Pending cap: the third of three jobs submitted at once is rejected
+    from concurrency import QueueFull
+    capped = ReportService(ReportCache(), workers=1, max_pending=2)
+    accepted = rejected = 0
+    for i in range(3):
+        try:
+            capped.submit([(query, answer(f"cap {i}"), RETRIEVAL)])
+            accepted += 1
+        except QueueFull:
+            rejected += 1
+    while any(capped.job(j)["status"] in ("queued", "running") for j in list(capped._jobs)):
+        await asyncio.sleep(0.005)
+    capped.close()
+    return {
+        "legacy_ms": statistics.median(legacy),
+        "cold_ms": statistics.median(cold),
+        "cached_ms": statistics.median(cached),
+        "stall_inline_ms": stall_inline,
+        "stall_offloaded_ms": stall_offloaded,
+        "batch_s": batch_s,
+        "batch_status": job["status"],
+        "archive_kb": len(archive) / 1024,
+        "stats": stats,
+        "cap": (accepted, rejected),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=100, help="answer renders (Streamlit reruns)")
+    parser.add_argument("--distinct", type=int, default=10, help="different answers")
+    parser.add_argument("--batch", type=int, default=200, help="reports in the export job")
+    parser.add_argument("--long-paragraphs", type=int, default=400, help="size of the long report")
+    args = parser.parse_args()
+
+    r = asyncio.run(run(args))
+    print(f"📄 {args.renders} renders of {args.distinct} distinct answers\n")
+    print(f"Legacy create_pdf per render: {r['legacy_ms']:.2f} ms (every rerun, in the UI process)")
+    print(f"ReportService: {r['cold_ms']:.2f} ms cold, {r['cached_ms']:.3f} ms cached")
+    print(f"Long report ({args.long_paragraphs} paragraphs), longest event-loop stall: "
+          f"{r['stall_inline_ms']:.0f} ms inline vs. {r['stall_offloaded_ms']:.0f} ms with arender")
+    print(f"Batch job: {args.batch} reports -> {r['batch_status']} in {r['batch_s']:.2f}s, "
+          f"{r['stats']['misses']} rendered, zip {r['archive_kb']:.0f} KB")
+    print(f"Cache: {r['stats']['items']} items, {r['stats']['bytes'] / 1024:.0f} KB, "
+          f"hit rate {r['stats']['hit_rate']:.1%}")
+
+    print(f"Pending cap of 2: {r['cap'][0]} jobs accepted, {r['cap'][1]} rejected")
+
+    failures = []
+    if r["cap"] != (2, 1):
+        failures.append("jobs beyond max_pending were not rejected")
+    if r["batch_status"] != "done":
+        failures.append("batch job did not finish")
+    if r["cached_ms"] >= r["legacy_ms"]:
+        failures.append("cached reports are not faster than rebuilding them")
+    if r["stall_offloaded_ms"] >= r["stall_inline_ms"]:
+        failures.append("arender still blocks the event loop")
+    if failures:
+        print(f"❌ {', '.join(failures)}")
+        sys.exit(1)
+    print(f"✅ {r['legacy_ms'] / max(r['cached_ms'], 1e-3):.0f}x cheaper repeated reports, event loop kept free.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Latency and throughput of the retrieval backends.
+
+1. Local index (float32 and int8) on synthetic corpora of growing size.
+2. With --live: Neo4j's `disease_desc_index` vs. the local index loaded from
+   the same graph, on real query embeddings, including a check that
+   get_medical_context renders identical text for both backends.
+
+    python -m benchmarks.bench_retrieval_backends
+    python -m benchmarks.bench_retrieval_backends --sizes 41,10000,100000 --live
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from vector_index import LocalVectorIndex
+
+DIM = 384
+SAMPLE_QUERIES = [
+    "I have a skin rash and itching",
+    "fever and chills",
+    "I have a headache",
+    "stomach pain and vomiting after eating",
+    "yellow eyes and dark urine",
+    "cough with chest pain and breathlessness",
+    "joint pain and swelling in the knees",
+    "frequent urination and excessive thirst",
+]
+
+
+def _synthetic_index(size, quantize, rng):
+    embeddings = rng.standard_normal((size, DIM), dtype=np.float32)
+    names = [f"Disease {i}" for i in range(size)]
+    return LocalVectorIndex(names, names, embeddings, [[]] * size, [[]] * size, quantize=quantize)
+
+
+def _latency_ms(fn, queries):
+    timings = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), sorted(timings)[int(len(timings) * 0.95) - 1]
+
+
+def _throughput(fn, queries, seconds=1.0):
+    done, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        fn(queries[done % len(queries)])
+        done += 1
+    return done / (time.perf_counter() - start)
+
+
+def bench_local(sizes, n_queries, batch):
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((n_queries, DIM), dtype=np.float32)
+    print(f"{'corpus':>9} | {'storage':>7} | {'MiB':>7} | {'p50 ms':>8} | {'p95 ms':>8} | {'qps':>9} | {'batched qps':>11}")
+    for size in sizes:
+        for quantize in (False, True):
+            index = _synthetic_index(size, quantize, rng)
+            p50, p95 = _latency_ms(lambda q: index.search(q, 3), queries)
+            qps = _throughput(lambda q: index.search(q, 3), queries)
+            start = time.perf_counter()
+            for i in range(0, n_queries, batch):
+                index.search_batch(queries[i:i + batch], 3)
+            batched = n_queries / (time.perf_counter() - start)
+            print(f"{size:>9} | {'int8' if quantize else 'float32':>7} | {index.nbytes / 2**20:>7.2f} | "
+                  f"{p50:>8.3f} | {p95:>8.3f} | {qps:>9.0f} | {batched:>11.0f}")
+
+
+def bench_live(n_queries):
+    import db
+    import graph_tools
+
+    embeddings = [graph_tools.embed_query(q) for q in SAMPLE_QUERIES]
+    embeddings = (embeddings * (n_queries // len(embeddings) + 1))[:n_queries]
+    local = graph_tools.refresh_local_index()
+
+    def neo4j_search(e):
+        return db.run_query(graph_tools.VECTOR_SEARCH_QUERY, {"k": 3, "embedding": e.tolist()})
+
+    print(f"\n🔌 Live comparison on {len(local)} diseases ({n_queries} queries)")
+    for label, fn in (("neo4j", neo4j_search), ("local", lambda e: local.search(e, 3))):
+        fn(embeddings[0])
+        p50, p95 = _latency_ms(fn, embeddings)
+        print(f"{label:>6}: p50 {p50:.3f} ms | p95 {p95:.3f} ms | {_throughput(fn, embeddings):.0f} qps")
+
+    mismatches = 0
+    for query, embedding in zip(SAMPLE_QUERIES, embeddings):
+        remote_text = graph_tools.format_results(neo4j_search(embedding))
+        local_text = graph_tools.format_results(local.search(embedding, 3))
+        if remote_text != local_text:
+            mismatches += 1
+            print(f"⚠️ Output differs for: '{query}'")
+    print(f"{'✅' if not mismatches else '❌'} Identical get_medical_context output: "
+          f"{len(SAMPLE_QUERIES) - mismatches}/{len(SAMPLE_QUERIES)} queries")
+    db.close_driver()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="41,10000,100000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--live", action="store_true", help="also compare against Neo4j from .env")
+    args = parser.parse_args()
+
+    bench_local([int(s) for s in args.sizes.split(",")], args.queries, args.batch)
+    if args.live:
+        bench_live(args.queries)
+
+
+if __name__ == "__main__":
+    main()
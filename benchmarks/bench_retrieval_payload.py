@@ -0,0 +1,117 @@
+"""
+Size and parse cost of the /chat payload: full tool text + regex scraping
+(the old UI path) vs. a one-line reasoning summary + compact `retrieval`
+records.
+
+Retrieval results come from the local index built from
+data/medical_graph_data.json with the offline embedder, so no Neo4j or
+model download is needed.
+
+    python -m benchmarks.bench_retrieval_payload
+    python -m benchmarks.bench_retrieval_payload --k 5 --repeat 20000
+"""
+import argparse
+import json
+import re
+import time
+
+from benchmarks.fakes import DATA_FILE, FakeEmbedder
+from retrieval import DiseaseMatch, format_results, summarize
+from vector_index import LocalVectorIndex
+
+QUERIES = [
+    "I have a skin rash and itching",
+    "fever and chills",
+    "I have a headache",
+    "stomach pain and vomiting",
+    "yellow eyes and dark urine",
+    "cough with chest pain and breathlessness",
+]
+DRAFT = "Based on the medical database, the most likely condition is listed above."
+ANSWER = "**Disease** ... **What you can do:** 1. Rest. ⚠️ **Disclaimer:** I am an AI. Please consult a doctor."
+LEGACY_PATTERN = re.compile(r"Disease Found: (.*?) \(Similarity: (.*?)\)")
+
+
+def legacy_payload(matches):
+    """What /chat returned before: the full tool text inside the reasoning log."""
+    return {
+        "response": ANSWER,
+        "reasoning": [
+            {"type": "tool_call", "content": "Calling Tool: consult_medical_database"},
+            {"type": "tool_result", "content": format_results(matches)},
+            {"type": "intern_draft", "content": DRAFT},
+        ],
+    }
+
+
+def compact_payload(matches):
+    records = [m.to_compact() for m in matches]
+    return {
+        "response": ANSWER,
+        "reasoning": [
+            {"type": "tool_call", "content": "Calling Tool: consult_medical_database"},
+            {"type": "tool_result", "content": summarize(records)},
+            {"type": "intern_draft", "content": DRAFT},
+        ],
+        "retrieval": records,
+    }
+
+
+def parse_legacy(body):
+    data = json.loads(body)
+    diseases, scores = [], []
+    for step in data["reasoning"]:
+        if step["type"] == "tool_result":
+            for name, score in LEGACY_PATTERN.findall(step["content"]):
+                diseases.append(name)
+                scores.append(float(score))
+    return diseases, scores
+
+
+def parse_compact(body):
+    data = json.loads(body)
+    return [m["disease"] for m in data["retrieval"]], [m["score"] for m in data["retrieval"]]
+
+
+def _time_us(fn, bodies, repeat):
+    start = time.perf_counter()
+    for i in range(repeat):
+        fn(bodies[i % len(bodies)])
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5000)
+    args = parser.parse_args()
+
+    embedder = FakeEmbedder()
+    index = LocalVectorIndex.from_json(DATA_FILE, embedder.encode)
+    results = [[DiseaseMatch.from_record(r) for r in index.search(embedder.encode(q), args.k)] for q in QUERIES]
+
+    legacy = [json.dumps(legacy_payload(m)) for m in results]
+    compact = [json.dumps(compact_payload(m)) for m in results]
+
+    # Both paths must give the UI the same chart (legacy scores are rounded to 2 places in the text)
+    for old, new in zip(legacy, compact):
+        old_names, old_scores = parse_legacy(old)
+        new_names, new_scores = parse_compact(new)
+        assert old_names == new_names, (old_names, new_names)
+        assert all(abs(a - b) <= 0.005 for a, b in zip(old_scores, new_scores))
+
+    legacy_size = sum(len(b.encode()) for b in legacy) / len(legacy)
+    compact_size = sum(len(b.encode()) for b in compact) / len(compact)
+    legacy_us = _time_us(parse_legacy, legacy, args.repeat)
+    compact_us = _time_us(parse_compact, compact, args.repeat)
+
+    print(f"📦 /chat payload, k={args.k}, averaged over {len(QUERIES)} queries\n")
+    print(f"{'':<24}{'bytes':>10}{'parse (µs)':>14}")
+    print(f"{'full text + regex':<24}{legacy_size:>10.0f}{legacy_us:>14.1f}")
+    print(f"{'compact records':<24}{compact_size:>10.0f}{compact_us:>14.1f}")
+    print(f"\n✅ {1 - compact_size / legacy_size:.0%} smaller, parse {legacy_us / compact_us:.1f}x faster; "
+          f"charts identical (and compact records also carry symptom weights).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+50-turn conversations through /chat with a session_id, with a fake LLM and
+the in-memory graph (no Groq, no Neo4j).
+
+For every turn: request latency, the Intern's prompt size (approximate
+tokens) and the process' traced memory. Run once with the default
+HISTORY_TOKEN_BUDGET and once with trimming off (budget = infinity) to show
+that the prompt, latency and memory stay flat with it and grow without it.
+Finally checks that idle sessions are evicted beyond SESSION_MAX.
+
+    python -m benchmarks.bench_sessions
+    python -m benchmarks.bench_sessions --turns 100 --budget 1000 --llm-latency 0.02
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+
+import httpx
+
+from benchmarks.fakes import install_fakes
+
+FOLLOW_UPS = [
+    "I have a skin rash and itching on my arms",
+    "it also spreads to my legs, is that normal?",
+    "what precautions should I take for that?",
+    "and now I have a mild fever and chills",
+    "could it be something else?",
+]
+
+
+def track_prompts(multi_agent):
+    """Records the approximate token count of every Intern prompt."""
+    sizes = []
+    intern_prompt = multi_agent.intern_prompt
+
+    def measured(state):
+        prompt = intern_prompt(state)
+        sizes.append(multi_agent.count_tokens_approximately(prompt))
+        return prompt
+
+    multi_agent.intern_prompt = measured
+    return sizes
+
+
+async def conversation(client, turns, prompt_sizes):
+    session_id = uuid.uuid4().hex
+    rows = []
+    for turn in range(turns):
+        before = len(prompt_sizes)
+        start = time.perf_counter()
+        response = await client.post("/chat", json={"query": FOLLOW_UPS[turn % len(FOLLOW_UPS)],
+                                                    "session_id": session_id})
+        response.raise_for_status()
+        elapsed = time.perf_counter() - start
+        rows.append({
+            "latency_ms": elapsed * 1000,
+            "prompt_tokens": max(prompt_sizes[before:], default=0),
+            "memory_kb": tracemalloc.get_traced_memory()[0] / 1024,
+        })
+    return rows
+
+
+def window(rows, key, start, size=5):
+    return statistics.mean(r[key] for r in rows[start:start + size])
+
+
+async def run(turns, budget):
+    import api
+    import multi_agent
+
+    multi_agent.FAST_PATH_ENABLED = False  # every turn goes through the Intern
+    prompt_sizes = track_prompts(multi_agent)
+    results = {}
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for label, token_budget in [(f"budget {budget}", budget), ("no trimming", float("inf"))]:
+            multi_agent.HISTORY_TOKEN_BUDGET = token_budget
+            tracemalloc.start()
+            results[label] = await conversation(client, turns, prompt_sizes)
+            tracemalloc.stop()
+
+        # Eviction: open more sessions than SESSION_MAX allows
+        api.sessions.max_sessions = 5
+        for _ in range(20):
+            await client.post("/chat", json={"query": FOLLOW_UPS[0], "session_id": uuid.uuid4().hex})
+        stats = api.sessions.stats()
+    return results, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--budget", type=int, default=2000, help="HISTORY_TOKEN_BUDGET for the trimmed run")
+    parser.add_argument("--llm-latency", type=float, default=0.01, help="seconds per fake LLM call")
+    args = parser.parse_args()
+
+    install_fakes(llm_latency=args.llm_latency, db_latency=0.0)
+    import api
+    api.ANSWER_CACHE_ENABLED = False
+    results, stats = asyncio.run(run(args.turns, args.budget))
+
+    print(f"💬 {args.turns}-turn conversation, /chat with session_id\n")
+    print(f"{'':<14}{'turns':>12}{'latency':>12}{'prompt tok':>12}{'memory':>12}")
+    failures = []
+    last = args.turns - 5
+    for label, rows in results.items():
+        for start in (0, args.turns // 2, last):
+            print(f"{label:<14}{f'{start + 1}-{start + 5}':>12}{window(rows, 'latency_ms', start):>10.1f}ms"
+                  f"{window(rows, 'prompt_tokens', start):>12.0f}{window(rows, 'memory_kb', start):>10.0f}KB")
+        print()
+
+    trimmed = results[f"budget {args.budget}"]
+    if max(r["prompt_tokens"] for r in trimmed) > args.budget * 1.5:
+        failures.append("trimmed prompt exceeded the token budget")
+    if window(trimmed, "prompt_tokens", last) > window(trimmed, "prompt_tokens", args.turns // 2) * 1.2:
+        failures.append("trimmed prompt still growing in the last turns")
+    print(f"Sessions after opening 20 with SESSION_MAX=5: {stats}")
+    if stats["active"] > 5 or stats["evictions"] < 15:
+        failures.append("idle sessions were not evicted")
+
+    if failures:
+        print(f"❌ {', '.join(failures)}")
+        sys.exit(1)
+    print("✅ Per-turn prompt size stays bounded and idle sessions are evicted.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Cold start of the local retrieval index: medical_graph_data.json parsed and
+every description embedded at startup vs. the binary snapshot (columnar
+.npz + memory-mapped embedding matrix), on copies of the dataset scaled
+up N times.
+
+Embeddings come from the hashed bag-of-words FakeEmbedder so the numbers
+don't depend on a GPU; --real-model adds the actual SentenceTransformer
+encode time at the smallest scale. Both paths must load the same entries
+and return the same top-k scores for the sample queries, and a snapshot
+whose .npy was swapped for another build's matrix must refuse to load.
+
+    python -m benchmarks.bench_snapshot
+    python -m benchmarks.bench_snapshot --scales 1,100,1000 --real-model
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.fakes import DATA_FILE, FakeEmbedder
+from benchmarks.bench_retrieval_backends import SAMPLE_QUERIES
+from snapshot import EMBEDDING_MODEL, Snapshot, embeddings_path, write_snapshot
+from vector_index import LocalVectorIndex
+
+
+def scaled_data(scale):
+    with open(DATA_FILE, "r") as f:
+        data = json.load(f)
+    if scale == 1:
+        return data
+    return [{**d, "name": f"{d['name']} #{k}", "description": f"{d['description']} (variant {k})"}
+            for k in range(scale) for d in data]
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="1,10,100")
+    parser.add_argument("--real-model", action="store_true", help=f"also time {EMBEDDING_MODEL} at the first scale")
+    args = parser.parse_args()
+
+    embedder = FakeEmbedder()
+    queries = embedder.encode(SAMPLE_QUERIES)
+
+    failures = []
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"{'diseases':>9} | {'json KB':>8} | {'snapshot KB':>11} | {'json+encode s':>13} | "
+              f"{'snapshot s':>10} | {'first search ms':>15} | identical")
+        for scale in (int(s) for s in args.scales.split(",")):
+            data = scaled_data(scale)
+            json_path = os.path.join(workdir, f"x{scale}.json")
+            snapshot_path = os.path.join(workdir, f"x{scale}.npz")
+            with open(json_path, "w") as f:
+                json.dump(data, f, indent=2)
+            write_snapshot(data, embedder.encode([d["description"] for d in data]), snapshot_path)
+
+            # 1. Startup today: parse the JSON, embed every description, build the index
+            from_json, t_json = _timed(lambda: LocalVectorIndex.from_json(json_path, embedder.encode))
+
+            # 2. Startup from the snapshot: no parsing, no model, the matrix is mmap'd
+            def load():
+                snapshot = Snapshot.load(snapshot_path)
+                return snapshot, LocalVectorIndex.from_snapshot(snapshot)
+            (snapshot, from_snapshot), t_snapshot = _timed(load)
+            _, t_first = _timed(lambda: from_snapshot.search(queries[0], 3))
+
+            # Scaled copies embed identically (digits are not tokens), so ties are compared by score
+            identical = snapshot.entries() == data and all(
+                [round(r["score"], 5) for r in a] == [round(r["score"], 5) for r in b]
+                for a, b in zip(from_json.search_batch(queries, 3), from_snapshot.search_batch(queries, 3)))
+            failures += [] if identical else [f"{len(data)} diseases: snapshot and JSON index differ"]
+            sizes = os.path.getsize(snapshot_path) + os.path.getsize(embeddings_path(snapshot_path))
+            print(f"{len(data):>9} | {os.path.getsize(json_path) / 1024:>8.0f} | {sizes / 1024:>11.0f} | "
+                  f"{t_json:>13.3f} | {t_snapshot:>10.3f} | {t_first * 1000:>15.2f} | {'✅' if identical else '❌'}")
+
+        # A matrix of the right shape from another build (e.g. a writer caught between its renames)
+        data = scaled_data(1)
+        path_a, path_b = os.path.join(workdir, "a.npz"), os.path.join(workdir, "b.npz")
+        embeddings = embedder.encode([d["description"] for d in data])
+        write_snapshot(data, embeddings, path_a)
+        write_snapshot(data, embeddings[::-1], path_b)
+        shutil.copyfile(embeddings_path(path_b), embeddings_path(path_a))
+        try:
+            Snapshot.load(path_a, retries=0)
+            failures.append("a snapshot with another build's embeddings loaded")
+        except ValueError as e:
+            print(f"\nMismatched .npy rejected: {e}")
+
+    if args.real_model:
+        from sentence_transformers import SentenceTransformer
+        data = scaled_data(int(args.scales.split(",")[0]))
+        model, t_model = _timed(lambda: SentenceTransformer(EMBEDDING_MODEL))
+        _, t_encode = _timed(lambda: model.encode([d["description"] for d in data], batch_size=64))
+        print(f"\n{EMBEDDING_MODEL}: model load {t_model:.2f} s + encode {len(data)} descriptions {t_encode:.2f} s "
+              f"(what every worker pays at startup without a snapshot)")
+
+    if failures:
+        print(f"❌ {', '.join(failures)}")
+        sys.exit(1)
+    print("✅ Snapshot loads match the JSON index and mismatched files are rejected.")
+
+
+if __name__ == "__main__":
+    main()
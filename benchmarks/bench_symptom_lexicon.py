@@ -0,0 +1,164 @@
+"""
+SymptomLexicon throughput and accuracy on a synthetic query corpus built
+from dataset.csv: 1-4 symptoms per query, written as lay text, some replaced
+by synonyms and some misspelled (dropped, doubled or swapped letters), and
+some followed by a phrase that names no symptom ("high blood pressure",
+which shares a word with sinus_pressure). Pure Python, no model, database
+or pandas needed.
+
+Reports build time, extraction latency on unique queries (cold) and on
+repeated ones (memoized), queries per second, recall/precision of exact
+vs. fuzzy matching, and the ETL cost of resolving every dataset.csv cell.
+
+    python -m benchmarks.bench_symptom_lexicon
+    python -m benchmarks.bench_symptom_lexicon --queries 200000 --typo-rate 0.3
+"""
+import argparse
+import csv
+import os
+import random
+import statistics
+import sys
+import time
+
+from symptom_lexicon import SYMPTOM_SYNONYMS, SymptomLexicon
+
+DATA_DIR = "data"
+TEMPLATES = [
+    "I have {}",
+    "been having {} for three days",
+    "my son has {} since yesterday",
+    "{}",
+    "what could cause {}?",
+]
+# Medical-sounding text that must not resolve to any symptom
+NEGATIVES = [
+    "high blood pressure",
+    "my blood pressure is normal",
+    "I need a prescription refill",
+    "my heart rate is fine",
+    "after my flight",
+    "since my vaccination",
+    "my throat swab was negative",
+    "the pain medication helped",
+]
+
+
+def misspell(word, rng):
+    i = rng.randrange(1, len(word) - 1)
+    kind = rng.randrange(3)
+    if kind == 0:
+        return word[:i] + word[i + 1:]
+    if kind == 1:
+        return word[:i] + word[i] + word[i:]
+    return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+
+
+def make_corpus(n, typo_rate, synonym_rate, negative_rate, seed=7):
+    """[(query, set of canonical symptoms)] and the raw dataset.csv symptom cells."""
+    lexicon = SymptomLexicon.from_csv(os.path.join(DATA_DIR, "Symptom-severity.csv"))
+    with open(os.path.join(DATA_DIR, "dataset.csv"), newline="") as f:
+        rows = [[cell for cell in row[1:] if cell.strip()] for row in list(csv.reader(f))[1:]]
+    cells = [cell for row in rows for cell in row]
+    rows = [[lexicon.resolve(cell) for cell in row] for row in rows]
+    by_target = {}
+    for phrase, target in SYMPTOM_SYNONYMS.items():
+        by_target.setdefault(target, []).append(phrase)
+
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n):
+        row = rows[rng.randrange(len(rows))]
+        picked = rng.sample(row, min(rng.randint(1, 4), len(row)))
+        phrases = []
+        for name in picked:
+            if name in by_target and rng.random() < synonym_rate:
+                phrase = rng.choice(by_target[name])
+            else:
+                phrase = name.replace("_", " ").replace("(", "").replace(")", "")
+            if rng.random() < typo_rate:
+                parts = phrase.split()
+                long_words = [j for j, w in enumerate(parts) if len(w) >= 6]
+                if long_words:
+                    j = rng.choice(long_words)
+                    parts[j] = misspell(parts[j], rng)
+                phrase = " ".join(parts)
+            phrases.append(phrase)
+        text = ", ".join(phrases[:-1]) + " and " + phrases[-1] if len(phrases) > 1 else phrases[0]
+        if rng.random() < negative_rate:
+            text += f", {rng.choice(NEGATIVES)}"
+        corpus.append((rng.choice(TEMPLATES).format(text), set(picked)))
+    return corpus, cells
+
+
+def accuracy(lexicon, corpus, fuzzy):
+    found = expected = correct = 0
+    for text, truth in corpus:
+        names = set(lexicon.extract(text, fuzzy))
+        found += len(names)
+        expected += len(truth)
+        correct += len(names & truth)
+    return correct / expected, correct / max(found, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=100_000)
+    parser.add_argument("--typo-rate", type=float, default=0.2, help="share of symptoms misspelled")
+    parser.add_argument("--synonym-rate", type=float, default=0.3, help="share written as a lay synonym")
+    parser.add_argument("--negative-rate", type=float, default=0.2, help="share followed by a non-symptom phrase")
+    args = parser.parse_args()
+
+    corpus, cells = make_corpus(args.queries, args.typo_rate, args.synonym_rate, args.negative_rate)
+    start = time.perf_counter()
+    # Cache sized to the corpus, so the second pass measures hits rather than LRU evictions
+    lexicon = SymptomLexicon.from_csv(os.path.join(DATA_DIR, "Symptom-severity.csv"), cache_size=2 * len(corpus))
+    build_ms = (time.perf_counter() - start) * 1000
+    stats = lexicon.stats()
+    print(f"🔤 {len(corpus)} queries; lexicon {stats['names']} names, {stats['keys']} keys, "
+          f"{stats['trigrams']} trigrams, built in {build_ms:.1f} ms\n")
+
+    # 1. Latency: unique queries (cold), then the same queries again (memoized)
+    unique = list(dict.fromkeys(text for text, _ in corpus))
+    latencies = []
+    for text in unique:
+        t = time.perf_counter()
+        lexicon.extract(text)
+        latencies.append(time.perf_counter() - t)
+    start = time.perf_counter()
+    for text, _ in corpus:
+        lexicon.extract(text)
+    warm_s = time.perf_counter() - start
+    p50, p95 = statistics.median(latencies), sorted(latencies)[int(len(latencies) * 0.95)]
+    print(f"extract, unique queries: p50 {p50 * 1e6:.1f} µs, p95 {p95 * 1e6:.1f} µs, "
+          f"{len(unique) / sum(latencies):,.0f} queries/s")
+    print(f"extract, memoized:       {warm_s / len(corpus) * 1e6:.2f} µs, {len(corpus) / warm_s:,.0f} queries/s")
+
+    # 2. Accuracy against the symptoms each query was built from
+    sample = corpus[:20_000]
+    exact_recall, exact_precision = accuracy(SymptomLexicon(lexicon.names), sample, fuzzy=False)
+    fuzzy_recall, fuzzy_precision = accuracy(lexicon, sample, fuzzy=True)
+    print(f"\n{'':<10}{'recall':>9}{'precision':>11}")
+    print(f"{'exact':<10}{exact_recall:>9.1%}{exact_precision:>11.1%}")
+    print(f"{'fuzzy':<10}{fuzzy_recall:>9.1%}{fuzzy_precision:>11.1%}")
+    false_hits = {text: lexicon.extract(text) for text in NEGATIVES if lexicon.extract(text)}
+    print(f"non-symptom phrases resolved: {false_hits or 'none'}")
+
+    # 3. ETL: every symptom cell of dataset.csv onto the canonical vocabulary (exact only, like clean_data)
+    etl = SymptomLexicon(lexicon.names)
+    start = time.perf_counter()
+    resolved = [etl.resolve(cell, fuzzy=False) for cell in cells]
+    etl_s = time.perf_counter() - start
+    unresolved = sorted({cell.strip() for cell, name in zip(cells, resolved) if name is None})
+    respelled = sorted({(cell.strip(), name) for cell, name in zip(cells, resolved) if name and name != cell.strip()})
+    print(f"\nETL: {len(cells)} cells in {etl_s * 1000:.1f} ms ({etl_s / len(cells) * 1e6:.2f} µs/cell), "
+          f"respelled {respelled}, unresolved {unresolved}")
+
+    if unresolved or false_hits or fuzzy_recall <= exact_recall:
+        print("❌ dataset cells left unresolved, a non-symptom phrase matched, or fuzzy matching did not improve recall")
+        sys.exit(1)
+    print(f"✅ Fuzzy lookup recovers {fuzzy_recall - exact_recall:.1%} more symptoms at µs per query.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Ranking quality and latency of the weighted symptom matcher fused with the
+vector ranking (SYMPTOM_FUSION) vs. the vector-only top-3, on the in-memory
+graph (no Neo4j).
+
+Queries are built from data/dataset.csv rows: a few of the row's symptoms in
+lay wording ("skin rash, itching") with the row's disease as ground truth.
+Reports top-1 / top-3 accuracy, MRR@3 and per-query latency for both, plus
+the batch path (one sparse product for all queries).
+
+    python -m benchmarks.bench_symptom_matcher
+    python -m benchmarks.bench_symptom_matcher --queries 2000 --symptoms-per-query 2
+    python -m benchmarks.bench_symptom_matcher --real-embeddings
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import pandas as pd
+
+from benchmarks.fakes import install_fakes
+
+DATASET = "data/dataset.csv"
+
+
+def make_queries(n, symptoms_per_query, seed=7):
+    """[(query text, disease)] sampled from dataset.csv rows."""
+    df = pd.read_csv(DATASET)
+    rng = random.Random(seed)
+    rows = []
+    for _, row in df.iterrows():
+        symptoms = [str(s).strip().replace(" _", "_").replace("_", " ")
+                    for s in row.iloc[1:] if isinstance(s, str) and s.strip()]
+        rows.append((row["Disease"].strip(), symptoms))
+    queries = []
+    for _ in range(n):
+        disease, symptoms = rows[rng.randrange(len(rows))]
+        picked = rng.sample(symptoms, min(symptoms_per_query, len(symptoms)))
+        queries.append((f"I have {', '.join(picked)}", disease))
+    return queries
+
+
+def evaluate(graph_tools, queries, fusion):
+    graph_tools.SYMPTOM_FUSION = fusion
+    graph_tools.retrieve(queries[0][0])  # warm-up (builds the symptom index)
+    latencies, top1, top3, reciprocal = [], 0, 0, 0.0
+    for text, disease in queries:
+        start = time.perf_counter()
+        ranked = [m.disease for m in graph_tools.retrieve(text)]
+        latencies.append(time.perf_counter() - start)
+        if ranked[:1] == [disease]:
+            top1 += 1
+        if disease in ranked:
+            top3 += 1
+            reciprocal += 1 / (ranked.index(disease) + 1)
+    n = len(queries)
+    return {
+        "top1": top1 / n,
+        "top3": top3 / n,
+        "mrr": reciprocal / n,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": sorted(latencies)[int(n * 0.95)] * 1000,
+    }
+
+
+def batch_latency(graph_tools, queries, fusion):
+    graph_tools.SYMPTOM_FUSION = fusion
+    texts = [text for text, _ in queries]
+    start = time.perf_counter()
+    asyncio.run(graph_tools.aretrieve_batch(texts))
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--symptoms-per-query", type=int, default=3)
+    parser.add_argument("--real-embeddings", action="store_true", help="use the sentence-transformers model")
+    args = parser.parse_args()
+
+    install_fakes(llm_latency=0.0, db_latency=0.0, real_embeddings=args.real_embeddings)
+    import graph_tools
+
+    queries = make_queries(args.queries, args.symptoms_per_query)
+    index = graph_tools.get_symptom_index()
+    print(f"🩺 {len(queries)} queries, {args.symptoms_per_query} symptoms each; "
+          f"index {len(index)} diseases x {len(index.symptoms)} symptoms, {index.matrix.nnz} weights\n")
+
+    print(f"{'':<16}{'top-1':>8}{'top-3':>8}{'MRR@3':>8}{'p50':>10}{'p95':>10}{'batch':>12}")
+    for label, fusion in [("vector only", False), ("vector + RRF", True)]:
+        stats = evaluate(graph_tools, queries, fusion)
+        batch_ms = batch_latency(graph_tools, queries, fusion)
+        print(f"{label:<16}{stats['top1']:>8.1%}{stats['top3']:>8.1%}{stats['mrr']:>8.3f}"
+              f"{stats['p50_ms']:>8.2f}ms{stats['p95_ms']:>8.2f}ms{batch_ms:>10.1f}ms")
+
+    text, disease = queries[0]
+    print(f"\nExample: {text!r} ({disease}) -> extracted {index.extract(text)}")
+    print(f"Symptom-only ranking: {index.top(text)}")
+
+
+if __name__ == "__main__":
+    main()
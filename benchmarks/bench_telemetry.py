@@ -0,0 +1,108 @@
+"""
+Cost of the telemetry hooks, with a fake LLM and the in-memory graph.
+
+1. Micro: one `telemetry.timed()` block, switched off vs. on.
+2. /chat latency with telemetry off, on, and on + X-Debug-Timing header
+   (LLM latency set to 0 so the hooks are not hidden behind sleeps).
+3. Sanity check of the /metrics exposition (including label escaping) and
+   the debug breakdown.
+
+    python -m benchmarks.bench_telemetry
+    python -m benchmarks.bench_telemetry --requests 500
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+from benchmarks.fakes import install_fakes
+
+QUERIES = [
+    "I have a skin rash and itching",
+    "fever and chills",
+    "stomach pain and vomiting",
+]
+
+
+def micro(telemetry, enabled, n=200_000):
+    telemetry.TELEMETRY_ENABLED = enabled
+    start = time.perf_counter()
+    for _ in range(n):
+        with telemetry.timed("bench", name="noop"):
+            pass
+    return (time.perf_counter() - start) / n * 1e9
+
+
+async def chat_latency(client, n_requests, headers=None):
+    latencies = []
+    for i in range(n_requests):
+        start = time.perf_counter()
+        response = await client.post("/chat", json={"query": QUERIES[i % len(QUERIES)]}, headers=headers or {})
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies) * 1000, response.json()
+
+
+async def run(n_requests):
+    import api
+    import telemetry
+
+    api.ANSWER_CACHE_ENABLED = False
+    results = {}
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await chat_latency(client, 10)  # warm-up
+        for label, enabled, headers in [
+            ("telemetry off", False, None),
+            ("telemetry on", True, None),
+            ("on + X-Debug-Timing", True, {"X-Debug-Timing": "1"}),
+        ]:
+            telemetry.TELEMETRY_ENABLED = enabled
+            results[label] = await chat_latency(client, n_requests, headers)
+        metrics = (await client.get("/metrics")).text
+    return results, metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    install_fakes(llm_latency=0.0, db_latency=0.0)
+    import telemetry
+
+    off_ns, on_ns = micro(telemetry, False), micro(telemetry, True)
+    results, metrics = asyncio.run(run(args.requests))
+
+    print(f"⏱️ timed() block: {off_ns:.0f} ns off, {on_ns:.0f} ns on\n")
+    baseline = results["telemetry off"][0]
+    for label, (p50, _) in results.items():
+        print(f"{label:<22} /chat p50 {p50:.2f} ms ({(p50 / baseline - 1) * 100:+.1f}%)")
+
+    breakdown = results["on + X-Debug-Timing"][1].get("timing", {})
+    print(f"\nDebug breakdown by stage (ms): {breakdown.get('by_stage')}")
+
+    failures = []
+    for name in ("tanit_stage_duration_seconds_bucket", "tanit_payload_bytes_bucket", "tanit_http_request_duration_seconds_count"):
+        if name not in metrics:
+            failures.append(f"{name} missing from /metrics")
+    if not {"node", "llm", "tool"} <= set(breakdown.get("by_stage", {})):
+        failures.append("debug breakdown lacks node/llm/tool stages")
+    if "timing" in results["telemetry on"][1]:
+        failures.append("timing returned without the debug header")
+    counter = telemetry.Counter("bench_escaping_total", "Label escaping check.")
+    counter.inc(name='C:\\tmp "quoted"\nline')
+    if 'name="C:\\\\tmp \\"quoted\\"\\nline"' not in counter.render():
+        failures.append(f"label values not escaped: {counter.render().splitlines()[-1]}")
+
+    if failures:
+        print(f"❌ {', '.join(failures)}")
+        sys.exit(1)
+    print("✅ /metrics and the debug breakdown look right.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Streamlit rerun cost as a chat grows, headless (streamlit.testing AppTest,
+no API needed: no prompt is submitted, only the history is rendered).
+
+Compares the previous history loop (an Altair chart rebuilt from a stored
+DataFrame and the PDF bytes kept per answer) with ui.py (compact chart
+pairs and report fields, memoized chart specs). Both render the whole
+history. Reports the rerun time every --step turns up to --turns, and the
+cost per rendered turn.
+
+    python -m benchmarks.bench_ui_render
+    python -m benchmarks.bench_ui_render --turns 200 --step 20
+"""
+import argparse
+import statistics
+import sys
+import time
+
+LEGACY_SCRIPT = '''
+import streamlit as st
+import altair as alt
+
+for message in st.session_state.messages:
+    with st.chat_message(message["role"]):
+        st.markdown(message["content"])
+        if "chart_data" in message:
+            st.markdown("---")
+            st.caption("📊 **Clinical Confidence Score**")
+            chart = alt.Chart(message["chart_data"]).mark_bar(
+                cornerRadiusTopRight=10, cornerRadiusBottomRight=10, height=20
+            ).encode(
+                x=alt.X('Confidence', title='Match Probability (0-1)', scale=alt.Scale(domain=[0, 1])),
+                y=alt.Y('Disease', sort='-x', title=None),
+                color=alt.Color('Confidence', scale=alt.Scale(scheme='viridis'), legend=None),
+                tooltip=['Disease', 'Confidence']
+            ).properties(height=200)
+            st.altair_chart(chart, use_container_width=True)
+        if "pdf" in message:
+            st.download_button("📄 Download Clinical Report (PDF)", data=message["pdf"],
+                               file_name="tanit_report.pdf", key=f"pdf_{id(message)}")
+'''
+
+DISEASES = ["Malaria", "Typhoid", "Dengue", "Common Cold", "Pneumonia"]
+ANSWER = "Based on your symptoms the most likely condition is **Malaria**. " * 6
+
+
+def turn(i, legacy):
+    import pandas as pd
+
+    pairs = tuple((d, round(0.9 - 0.05 * j - 0.001 * (i % 7), 4)) for j, d in enumerate(DISEASES))
+    user = {"role": "user", "content": f"Question {i}: fever and chills"}
+    assistant = {"role": "assistant", "content": f"{ANSWER} (turn {i})"}
+    if legacy:
+        assistant["chart_data"] = pd.DataFrame(list(pairs), columns=["Disease", "Confidence"])
+        assistant["pdf"] = b"%PDF-1.3 " + b"x" * 2000  # the eagerly built report bytes
+    else:
+        assistant["chart_data"] = pairs
+        assistant["report"] = {"query": user["content"], "symptoms": (("chills", "high_fever"),) * len(pairs)}
+    return [user, assistant]
+
+
+def rerun_times(app, legacy, turns, step, repeats):
+    """{turn: median seconds per rerun} with the history grown to that many turns."""
+    messages, results = [], {}
+    app.session_state["messages"] = messages
+    app.run()
+    for i in range(1, turns + 1):
+        messages.extend(turn(i, legacy))
+        if i % step == 0:
+            samples = []
+            for _ in range(repeats):
+                app.session_state["messages"] = messages
+                start = time.perf_counter()
+                app.run()
+                samples.append(time.perf_counter() - start)
+            if app.exception:
+                raise RuntimeError(app.exception[0].message)
+            if len(app.chat_message) != len(messages):
+                raise RuntimeError(f"{len(app.chat_message)} of {len(messages)} messages rendered")
+            results[i] = statistics.median(samples)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--step", type=int, default=10, help="measure every N turns")
+    parser.add_argument("--repeats", type=int, default=3, help="reruns per measurement")
+    args = parser.parse_args()
+
+    from streamlit.testing.v1 import AppTest
+
+    legacy = rerun_times(AppTest.from_string(LEGACY_SCRIPT, default_timeout=60), True,
+                         args.turns, args.step, args.repeats)
+    current = rerun_times(AppTest.from_file("ui.py", default_timeout=60), False,
+                          args.turns, args.step, args.repeats)
+
+    print(f"🖥️ Rerun time as the chat grows ({args.repeats} reruns per point)\n")
+    print(f"{'turns':>6}{'legacy':>12}{'ui.py':>12}")
+    for n in legacy:
+        print(f"{n:>6}{legacy[n] * 1000:>10.1f}ms{current[n] * 1000:>10.1f}ms")
+
+    last = max(current)
+    per_turn_legacy = legacy[last] / last * 1000
+    per_turn_current = current[last] / last * 1000
+    print(f"\nper rendered turn at {last} turns: legacy {per_turn_legacy:.2f} ms, ui.py {per_turn_current:.2f} ms")
+    if current[last] >= legacy[last]:
+        print("❌ ui.py reruns are not cheaper than the legacy history loop")
+        sys.exit(1)
+    print(f"✅ Full-history reruns are x{legacy[last] / current[last]:.1f} cheaper.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Offline stand-ins for Groq, Neo4j and the embedding model, shared by the
+benchmarks so they can run without network access or a database.
+
+    from benchmarks.fakes import install_fakes
+    fake_llm = install_fakes(llm_latency=0.05, db_latency=0.002)
+    import api  # now runs the real graph against the fakes
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from typing import Any, Callable, Optional
+
+import numpy as np
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+DATA_FILE = os.path.join("data", "medical_graph_data.json")
+
+OFFLINE_ENV = {
+    "GROQ_API_KEY": "offline",
+    "NEO4J_URI": "bolt://offline:7687",
+    "NEO4J_USERNAME": "neo4j",
+    "NEO4J_PASSWORD": "offline",
+    "EMBEDDING_CACHE_PATH": "",
+}
+
+BMI_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*kg.*?(\d+(?:\.\d+)?)\s*m\b", re.IGNORECASE)
+
+
+def set_offline_env():
+    """Dummy credentials so the modules import without a .env file."""
+    for key, value in OFFLINE_ENV.items():
+        os.environ[key] = value
+
+
+def default_script(query: str):
+    """Tool calls the fake intern makes for a user query: BMI when it sees kg + m, retrieval otherwise."""
+    match = BMI_PATTERN.search(query)
+    if match:
+        return [{"name": "calculate_bmi", "args": {"weight_kg": float(match[1]), "height_m": float(match[2])}}]
+    return [{"name": "consult_medical_database", "args": {"symptom_description": query}}]
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Scripted chat model that follows the same protocol as the real one:
+    intern turn 1 -> tool calls, intern turn 2 -> draft, supervisor -> formatted answer.
+    `latency` is charged per call (time.sleep / asyncio.sleep).
+    """
+
+    latency: float = 0.05
+    script: Optional[Callable[[str], list]] = None
+    calls: int = 0
+    words_per_chunk: int = 3
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _respond(self, messages) -> AIMessage:
+        self.calls += 1
+        last = messages[-1]
+        system = messages[0].content if isinstance(messages[0], SystemMessage) else ""
+
+        if "Supervisor" in system:
+            draft = last.content.removeprefix("Intern's Draft: ")
+            return AIMessage(content=(
+                f"{draft}\n\n**What you can do:**\n1. Rest and stay hydrated.\n2. Monitor your symptoms.\n\n"
+                "⚠️ **Disclaimer:** I am an AI. Please consult a doctor."
+            ))
+        if isinstance(last, ToolMessage):
+            return AIMessage(content=f"Based on the medical database: {last.content[:300]}")
+
+        plan = (self.script or default_script)(last.content)
+        tool_calls = [{**call, "id": f"call_{uuid.uuid4().hex[:8]}"} for call in plan]
+        return AIMessage(content="", tool_calls=tool_calls)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    def _chunks(self, message: AIMessage):
+        """Splits a response into streaming chunks (tool calls arrive as one chunk)."""
+        if message.tool_calls:
+            yield AIMessageChunk(content="", tool_call_chunks=[
+                {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i}
+                for i, c in enumerate(message.tool_calls)
+            ])
+            return
+        words = message.content.split(" ")
+        for i in range(0, len(words), self.words_per_chunk):
+            text = " ".join(words[i:i + self.words_per_chunk])
+            yield AIMessageChunk(content=text if i == 0 else " " + text)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        time.sleep(self.latency)
+        for chunk in self._chunks(self._respond(messages)):
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        await asyncio.sleep(self.latency)
+        for chunk in self._chunks(self._respond(messages)):
+            yield ChatGenerationChunk(message=chunk)
+
+
+class FakeEmbedder:
+    """Hashed bag-of-words vectors: deterministic, instant, and similar texts stay similar."""
+
+    dim = 384
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        self.calls += 1
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for token in re.findall(r"[a-z]+", text.lower()):
+                bucket = int(hashlib.md5(token.encode()).hexdigest()[:8], 16) % self.dim
+                vectors[i, bucket] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1, norms)
+        return vectors[0] if single else vectors
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+
+def install_fakes(llm_latency=0.05, db_latency=0.002, script=None, real_embeddings=False):
+    """
+    Swaps Groq for FakeChatModel and Neo4j for an in-memory index built from
+    data/medical_graph_data.json (with `db_latency` charged per query).
+    Returns the fake chat model so callers can read `calls`.
+    """
+    set_offline_env()
+    import graph_tools
+    import multi_agent
+    from embedding_cache import EmbeddingCache
+    from vector_index import LocalVectorIndex
+
+    fake_llm = FakeChatModel(latency=llm_latency, script=script)
+    multi_agent.llm = fake_llm
+    multi_agent.llm_with_tools = fake_llm
+
+    if not real_embeddings:
+        graph_tools.model = FakeEmbedder()
+    graph_tools.embedding_cache = EmbeddingCache("offline-benchmark")
+    index = LocalVectorIndex.from_json(DATA_FILE, graph_tools.get_model().encode)
+
+    def search_diseases(query_embedding, k=graph_tools.TOP_K):
+        time.sleep(db_latency)
+        return index.search(query_embedding, k)
+
+    async def asearch_diseases(query_embedding, k=graph_tools.TOP_K):
+        await asyncio.sleep(db_latency)
+        return index.search(query_embedding, k)
+
+    def search_diseases_batch(query_embeddings, k=graph_tools.TOP_K):
+        time.sleep(db_latency)
+        return index.search_batch(query_embeddings, k) if len(query_embeddings) else []
+
+    async def asearch_diseases_batch(query_embeddings, k=graph_tools.TOP_K):
+        await asyncio.sleep(db_latency)
+        return index.search_batch(query_embeddings, k) if len(query_embeddings) else []
+
+    async def aget_graph_version():
+        return "offline"
+
+    graph_tools.RETRIEVAL_BACKEND = "local"
+    graph_tools._local_index = index
+    graph_tools.search_diseases = search_diseases
+    graph_tools.asearch_diseases = asearch_diseases
+    graph_tools.search_diseases_batch = search_diseases_batch
+    graph_tools.asearch_diseases_batch = asearch_diseases_batch
+    graph_tools.get_graph_version = lambda: "offline"
+    graph_tools.aget_graph_version = aget_graph_version
+    return fake_llm
@@ -0,0 +1,139 @@
+"""
+Load test for /chat with a fake LLM and a fake graph backend (no Groq, no Neo4j).
+
+Fires a few hundred concurrent requests at the ASGI app in-process and
+reports status codes, latency percentiles, throughput and the peak number
+of requests in flight. Requests beyond the concurrency limit + queue must
+come back as 429 with queue-depth information, never as 500.
+
+--sync-baseline also runs the old blocking `agent_app.invoke` path on a
+40-thread pool (Starlette's default) for comparison.
+
+    python -m benchmarks.load_chat
+    python -m benchmarks.load_chat --requests 500 --max-concurrency 64 --max-queue 128 --sync-baseline
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from benchmarks.fakes import install_fakes
+
+QUERIES = [
+    "I have a skin rash and itching",
+    "fever and chills",
+    "I have a headache",
+    "stomach pain and vomiting",
+    "yellow eyes and dark urine",
+    "calculate my BMI, 80 kg 1.8 m",
+]
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))] if values else 0.0
+
+
+def _report(label, latencies, elapsed):
+    print(f"{label}: {len(latencies)} ok in {elapsed:.2f}s ({len(latencies) / elapsed:.1f} req/s) | "
+          f"p50 {statistics.median(latencies) * 1000:.0f} ms | p95 {_percentile(latencies, 0.95) * 1000:.0f} ms | "
+          f"p99 {_percentile(latencies, 0.99) * 1000:.0f} ms")
+
+
+async def run_async(n_requests, max_concurrency, max_queue, answer_cache=False):
+    import api
+    from concurrency import ConcurrencyLimiter
+
+    api.chat_limiter = ConcurrencyLimiter(max_concurrency, max_queue)
+    # Repeated queries would otherwise be answered from the cache without touching the pipeline
+    api.ANSWER_CACHE_ENABLED = answer_cache
+    peak = 0
+
+    async def sample_in_flight():
+        nonlocal peak
+        while True:
+            peak = max(peak, api.chat_limiter.in_flight)
+            await asyncio.sleep(0.001)
+
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(i):
+            start = time.perf_counter()
+            response = await client.post("/chat", json={"query": QUERIES[i % len(QUERIES)]})
+            return response.status_code, time.perf_counter() - start, response.json()
+
+        sampler = asyncio.create_task(sample_in_flight())
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(i) for i in range(n_requests)))
+        elapsed = time.perf_counter() - start
+        sampler.cancel()
+
+    by_status = {}
+    for status, _, _ in results:
+        by_status[status] = by_status.get(status, 0) + 1
+    ok = [latency for status, latency, _ in results if status == 200]
+    rejected = [body for status, _, body in results if status == 429]
+
+    print(f"Status codes: {dict(sorted(by_status.items()))} | peak in flight: {peak}/{max_concurrency}")
+    if ok:
+        _report("async /chat", ok, elapsed)
+    if rejected:
+        print(f"Sample 429 body: {rejected[0]}")
+
+    failures = []
+    if peak > max_concurrency:
+        failures.append("concurrency limit exceeded")
+    if any(status not in (200, 429) for status in by_status):
+        failures.append("unexpected status codes")
+    if any("queue_depth" not in body for body in rejected):
+        failures.append("429 without queue depth")
+    if len(rejected) and len(ok) < min(n_requests, max_concurrency + max_queue):
+        failures.append("requests rejected while capacity was available")
+    return failures
+
+
+def run_sync_baseline(n_requests, threads=40):
+    import api
+    from langchain_core.messages import HumanMessage
+
+    def one(i):
+        start = time.perf_counter()
+        api.agent_app.invoke({"messages": [HumanMessage(content=QUERIES[i % len(QUERIES)])]})
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(one, range(n_requests)))
+    _report(f"sync invoke on {threads} threads", latencies, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--max-concurrency", type=int, default=64)
+    parser.add_argument("--max-queue", type=int, default=128)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake LLM call")
+    parser.add_argument("--db-latency", type=float, default=0.002, help="seconds per fake graph query")
+    parser.add_argument("--sync-baseline", action="store_true")
+    parser.add_argument("--answer-cache", action="store_true", help="keep the semantic answer cache on")
+    args = parser.parse_args()
+
+    install_fakes(llm_latency=args.llm_latency, db_latency=args.db_latency)
+    print(f"🔥 {args.requests} concurrent requests, limit {args.max_concurrency} + queue {args.max_queue}\n")
+
+    failures = asyncio.run(run_async(args.requests, args.max_concurrency, args.max_queue, args.answer_cache))
+    if args.sync_baseline:
+        run_sync_baseline(args.requests)
+
+    if failures:
+        print(f"❌ {', '.join(failures)}")
+        sys.exit(1)
+    print("✅ Load test passed.")
+
+
+if __name__ == "__main__":
+    main()
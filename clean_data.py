@@ -1,90 +1,147 @@
+import argparse
 import pandas as pd
 import json
 import os
 
+from symptom_lexicon import SymptomLexicon
+
 # --- Configuration ---
 DATA_DIR = "data"
 OUTPUT_FILE = os.path.join(DATA_DIR, "medical_graph_data.json")
+SYMPTOM_COLUMNS = [f"Symptom_{i}" for i in range(1, 18)]
+PRECAUTION_COLUMNS = ['Precaution_1', 'Precaution_2', 'Precaution_3', 'Precaution_4']
 
 def clean_text(text):
     if isinstance(text, str):
-        # Fix common typos in this specific dataset
-        text = text.strip()
-        text = text.replace("dischromic _patches", "dischromic patches")
-        text = text.replace("spotting_ urination", "spotting urination")
-        return text
+        return text.strip()
     return text
 
-def main():
+def clean_series(series):
+    """Vectorized clean_text for a whole column."""
+    return series.astype(object).str.strip()
+
+def clean_symptoms(series, lexicon):
+    """
+    Maps every distinct cell onto the canonical symptom vocabulary (spelling
+    variants such as "dischromic _patches" included). Exact lookups only: a
+    symptom the lexicon does not know is kept as it is, never fuzzy-matched
+    onto a different one.
+    """
+    series = clean_series(series)
+    return series.map({s: lexicon.resolve(s, fuzzy=False) or s for s in series.dropna().unique()})
+
+def load_lookups(data_dir):
+    """Description, precaution and severity tables as plain dicts (first row wins)."""
+    df_desc = pd.read_csv(os.path.join(data_dir, "symptom_Description.csv"))
+    df_prec = pd.read_csv(os.path.join(data_dir, "symptom_precaution.csv"))
+    df_sev = pd.read_csv(os.path.join(data_dir, "Symptom-severity.csv"))
+
+    df_desc['Disease'] = clean_series(df_desc['Disease'])
+    df_prec['Disease'] = clean_series(df_prec['Disease'])
+    df_sev['Symptom'] = clean_series(df_sev['Symptom'])
+
+    df_desc = df_desc.drop_duplicates('Disease')
+    df_prec = df_prec.drop_duplicates('Disease')
+    df_sev = df_sev.drop_duplicates('Symptom')
+
+    descriptions = dict(zip(df_desc['Disease'], df_desc['Description']))
+    precautions = {
+        disease: [p for p in row if isinstance(p, str)]
+        for disease, *row in df_prec[['Disease'] + PRECAUTION_COLUMNS].itertuples(index=False)
+    }
+    severity = dict(zip(df_sev['Symptom'], df_sev['weight'].astype(int).tolist()))
+    return descriptions, precautions, severity
+
+def symptom_pairs(df_dataset, lexicon):
+    """
+    Long (Disease, Symptom) table, deduplicated, in first-appearance order
+    (row by row, then Symptom_1..Symptom_17), with cleaning applied only to
+    the non-empty cells. Expects an already cleaned 'Disease' column.
+    """
+    columns = [c for c in SYMPTOM_COLUMNS if c in df_dataset.columns]
+    long = df_dataset.melt(id_vars='Disease', value_vars=columns, value_name='Symptom', ignore_index=False)
+    long = long.dropna(subset=['Symptom']).sort_index(kind='stable')
+    long['Symptom'] = clean_symptoms(long['Symptom'], lexicon)
+    return long[['Disease', 'Symptom']].drop_duplicates()
+
+def build_graph_data(disease_symptoms, descriptions, precautions, severity):
+    """Assembles the JSON objects; `disease_symptoms` maps disease -> ordered unique symptoms."""
+    graph_data = []
+    for disease, symptoms in disease_symptoms.items():
+        graph_data.append({
+            "name": disease,
+            "description": descriptions.get(disease, "No description available."),
+            "symptoms": [{"name": sym, "weight": severity.get(sym, 1)} for sym in symptoms],
+            "precautions": precautions.get(disease, []),
+        })
+    return graph_data
+
+def transform(df_dataset, lookups):
+    """In-memory transform: one melt + groupby over the whole dataset."""
+    df_dataset = df_dataset.dropna(subset=['Disease'])
+    df_dataset = df_dataset.assign(Disease=clean_series(df_dataset['Disease']))
+    # The severity table is the canonical vocabulary
+    pairs = symptom_pairs(df_dataset, SymptomLexicon(lookups[2]))
+    # Diseases with no symptoms at all still get an (empty) entry
+    diseases = df_dataset['Disease'].unique()
+    grouped = pairs.groupby('Disease', sort=False)['Symptom'].agg(list)
+    return build_graph_data({d: grouped.get(d, []) for d in diseases}, *lookups)
+
+def transform_streaming(dataset_path, lookups, chunk_size):
+    """
+    Same output as `transform`, but reads dataset.csv in chunks, so memory
+    only grows with the number of unique (disease, symptom) pairs.
+    """
+    disease_symptoms = {}
+    lexicon = SymptomLexicon(lookups[2])
+    for chunk in pd.read_csv(dataset_path, chunksize=chunk_size):
+        chunk = chunk.dropna(subset=['Disease'])
+        chunk = chunk.assign(Disease=clean_series(chunk['Disease']))
+        for disease in chunk['Disease'].unique():
+            disease_symptoms.setdefault(disease, {})
+        for disease, symptom in symptom_pairs(chunk, lexicon).itertuples(index=False):
+            disease_symptoms[disease].setdefault(symptom, None)
+    return build_graph_data({d: list(s) for d, s in disease_symptoms.items()}, *lookups)
+
+def main(data_dir=DATA_DIR, output_file=OUTPUT_FILE, stream=False, chunk_size=100_000, snapshot_file=None):
     print("Loading data...")
+    dataset_path = os.path.join(data_dir, "dataset.csv")
     try:
-        # 1. Load the CSV files from the 'data' folder
-        df_dataset = pd.read_csv(os.path.join(DATA_DIR, "dataset.csv"))
-        df_desc = pd.read_csv(os.path.join(DATA_DIR, "symptom_Description.csv"))
-        df_prec = pd.read_csv(os.path.join(DATA_DIR, "symptom_precaution.csv"))
-        df_sev = pd.read_csv(os.path.join(DATA_DIR, "Symptom-severity.csv"))
+        # 1. Load the lookup CSV files from the 'data' folder (already cleaned)
+        lookups = load_lookups(data_dir)
+
+        # 2. Restructure Data
+        print("Merging and structuring data...")
+        if stream:
+            graph_data = transform_streaming(dataset_path, lookups, chunk_size)
+        else:
+            graph_data = transform(pd.read_csv(dataset_path), lookups)
     except FileNotFoundError as e:
         print(f"Error: {e}")
         print("Make sure your CSV files are inside the 'data' folder!")
         return
 
-    # 2. Apply cleaning
-    print("Cleaning text...")
-    df_dataset = df_dataset.map(clean_text)
-    df_desc['Disease'] = df_desc['Disease'].apply(clean_text)
-    df_prec['Disease'] = df_prec['Disease'].apply(clean_text)
-    df_sev['Symptom'] = df_sev['Symptom'].apply(clean_text)
-
-    # 3. Restructure Data
-    print("Merging and structuring data...")
-    graph_data = []
-    
-    # Get unique diseases
-    unique_diseases = df_dataset['Disease'].unique()
-
-    for disease in unique_diseases:
-        # Get Description
-        desc_row = df_desc[df_desc['Disease'] == disease]
-        description = desc_row.iloc[0]['Description'] if not desc_row.empty else "No description available."
-
-        # Get Precautions
-        prec_row = df_prec[df_prec['Disease'] == disease]
-        precautions = []
-        if not prec_row.empty:
-            p_list = prec_row.iloc[0][['Precaution_1', 'Precaution_2', 'Precaution_3', 'Precaution_4']].dropna().tolist()
-            precautions = [p for p in p_list if isinstance(p, str)]
-
-        # Get Symptoms
-        d_rows = df_dataset[df_dataset['Disease'] == disease]
-        all_symptoms = set()
-        for _, row in d_rows.iterrows():
-            for i in range(1, 18):
-                col_name = f"Symptom_{i}"
-                if col_name in row and pd.notna(row[col_name]):
-                    all_symptoms.add(row[col_name])
-        
-        # Add weights to symptoms
-        final_symptoms = []
-        for sym in all_symptoms:
-            weight_row = df_sev[df_sev['Symptom'] == sym]
-            weight = int(weight_row.iloc[0]['weight']) if not weight_row.empty else 1
-            final_symptoms.append({"name": sym, "weight": weight})
-
-        # Build Object
-        disease_obj = {
-            "name": disease,
-            "description": description,
-            "symptoms": final_symptoms,
-            "precautions": precautions
-        }
-        graph_data.append(disease_obj)
-
-    # 4. Save to JSON
-    with open(OUTPUT_FILE, "w") as f:
+    # 3. Save to JSON
+    with open(output_file, "w") as f:
         json.dump(graph_data, f, indent=2)
 
     print(f"✅ Success! Processed {len(graph_data)} diseases.")
-    print(f"📁 Data saved to: {OUTPUT_FILE}")
+    print(f"📁 Data saved to: {output_file}")
+
+    # 4. Optional binary snapshot (columnar arrays + precomputed embeddings)
+    if snapshot_file:
+        from snapshot import build_snapshot
+        build_snapshot(output_file, snapshot_file)
+    return graph_data
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build medical_graph_data.json from the raw CSV files.")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    parser.add_argument("--stream", action="store_true", help="read dataset.csv in chunks (for files bigger than memory)")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="rows per chunk in --stream mode")
+    parser.add_argument("--snapshot", nargs="?", const=os.path.join(DATA_DIR, "knowledge_snapshot.npz"), default=None,
+                        help="also write the binary knowledge snapshot (embeds only new or changed descriptions)")
+    args = parser.parse_args()
+    main(data_dir=args.data_dir, output_file=args.output, stream=args.stream, chunk_size=args.chunk_size,
+         snapshot_file=args.snapshot)
@@ -0,0 +1,141 @@
+import math
+import re
+
+from retrieval import format_results
+
+CHARS_PER_TOKEN = 4  # same estimate as langchain_core's count_tokens_approximately
+
+STOPWORDS = {"a", "an", "the", "of", "and", "or", "in", "on", "to", "is", "are", "it", "its", "by", "for",
+             "with", "that", "this", "as", "be", "can", "from", "at", "which", "may", "i", "my", "have"}
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def canonical(name: str) -> str:
+    """'skin_rash ' -> 'skin rash': what the LLM needs, minus the ETL's snake_case."""
+    return " ".join(name.replace("_", " ").split()).lower()
+
+
+def _words(text):
+    return {w for w in re.findall(r"[a-z]+", text.lower()) if w not in STOPWORDS and len(w) > 2}
+
+
+def select_matches(matches, min_score: float, score_margin: float):
+    """
+    Score threshold + adaptive k over the fused ranking, order unchanged.
+    Matches backed by the user's symptoms are always kept: their vector score
+    says nothing about why fusion ranked them. The others are dropped below
+    `min_score` or more than `score_margin` behind the best vector score.
+    The top-ranked match is always kept.
+    """
+    if not matches:
+        return []
+    best = max(m.score for m in matches)
+    return matches[:1] + [m for m in matches[1:]
+                          if m.symptom_score > 0 or m.matched_symptoms
+                          or (m.score >= min_score and best - m.score <= score_margin)]
+
+
+def relevant_sentences(description: str, keywords, max_chars: int):
+    """The description's most relevant sentences (keyword overlap, then position), in text order."""
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", description) if s.strip()]
+    if not sentences:
+        return ""
+    ranked = sorted(range(len(sentences)), key=lambda i: (-len(_words(sentences[i]) & keywords), i))
+    chosen, used = [], 0
+    for i in ranked:
+        if chosen and used + len(sentences[i]) > max_chars:
+            continue
+        chosen.append(i)
+        used += len(sentences[i])
+    text = " ".join(sentences[i] for i in sorted(chosen))
+    return text if len(text) <= max_chars else text[:max_chars].rsplit(" ", 1)[0] + "..."
+
+
+def _render(entries, shared_symptoms, shared_precautions):
+    lines = []
+    for e in entries:
+        header = f"## {e['disease']} ({e['score']:.2f})"
+        if e["matched"]:
+            header += f" - matches: {', '.join(e['matched'])}"
+        lines.append(header)
+        if e["description"]:
+            lines.append(e["description"])
+        if e["symptoms"]:
+            lines.append(f"Symptoms: {', '.join(e['symptoms'])}")
+        if e["precautions"]:
+            lines.append(f"Precautions: {', '.join(e['precautions'])}")
+    if shared_symptoms:
+        lines.append(f"Symptoms of all of the above: {', '.join(shared_symptoms)}")
+    if shared_precautions:
+        lines.append(f"Precautions for all of the above: {', '.join(shared_precautions)}")
+    return "\n".join(lines)
+
+
+def compact_context(matches, user_query: str = "", token_budget: int = 400, min_score: float = 0.0,
+                    score_margin: float = 1.0, description_chars: int = 200):
+    """
+    Compact LLM text for a retrieval result. Returns (text, kept matches).
+
+    1. Score threshold and adaptive k (select_matches).
+    2. Canonical names ("skin rash"), symptoms ordered by severity weight with
+       the user's matched symptoms first.
+    3. Symptoms and precautions shared by every kept disease are listed once.
+    4. Descriptions cut to their sentences most relevant to the query.
+    5. Over `token_budget`: shorter descriptions, then fewer symptoms per
+       disease, then the lowest-ranked diseases are dropped.
+    """
+    kept = select_matches(matches, min_score, score_margin)
+    if not kept:
+        return "", []
+    keywords = _words(user_query)
+
+    per_disease = []
+    for m in kept:
+        matched = [canonical(s) for s in m.matched_symptoms]
+        ordered = sorted(m.symptoms, key=lambda s: -s.weight)
+        symptoms = list(dict.fromkeys(matched + [canonical(s.name) for s in ordered]))
+        precautions = list(dict.fromkeys(canonical(p) for p in m.precautions if p and p.strip()))
+        per_disease.append((m, matched, symptoms, precautions))
+
+    def build(n_diseases, desc_chars, max_symptoms):
+        chosen = per_disease[:n_diseases]
+        shared_symptoms, shared_precautions = [], []
+        if len(chosen) > 1:
+            common = set.intersection(*(set(s) for _, _, s, _ in chosen))
+            shared_symptoms = [s for s in chosen[0][2] if s in common]
+            common = set.intersection(*(set(p) for _, _, _, p in chosen))
+            shared_precautions = [p for p in chosen[0][3] if p in common]
+
+        entries = []
+        for m, matched, symptoms, precautions in chosen:
+            own = [s for s in symptoms if s not in shared_symptoms or s in matched]
+            entries.append({
+                "disease": m.disease,
+                "score": m.score,
+                "matched": matched,
+                "description": relevant_sentences(m.description, keywords | _words(" ".join(symptoms)),
+                                                  desc_chars) if desc_chars else "",
+                "symptoms": own[:max_symptoms] if max_symptoms is not None else own,
+                "precautions": [p for p in precautions if p not in shared_precautions],
+            })
+        return _render(entries, shared_symptoms, shared_precautions)
+
+    # Cheapest cuts first; each step is only taken while the text is over budget
+    steps = [(len(per_disease), description_chars, None),
+             (len(per_disease), description_chars // 2, None),
+             (len(per_disease), description_chars // 2, 6),
+             (len(per_disease), 0, 4)]
+    steps += [(n, 0, 4) for n in range(len(per_disease) - 1, 0, -1)]
+    for n_diseases, desc_chars, max_symptoms in steps:
+        text = build(n_diseases, desc_chars, max_symptoms)
+        if estimate_tokens(text) <= token_budget:
+            break
+    return text, kept[:n_diseases]
+
+
+def full_context_tokens(matches) -> int:
+    """Tokens of the uncompacted tool text (retrieval.format_results), for the savings report."""
+    return estimate_tokens(format_results(matches))
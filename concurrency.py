@@ -0,0 +1,88 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+
+class QueueFull(Exception):
+    """Raised when a request arrives while every slot is busy and the wait queue is full."""
+
+    def __init__(self, in_flight, queue_depth, max_concurrency, max_queue):
+        super().__init__("Server is at capacity, please retry shortly.")
+        self.in_flight = in_flight
+        self.queue_depth = queue_depth
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+
+    def to_dict(self):
+        return {
+            "error": str(self),
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+        }
+
+
+class ConcurrencyLimiter:
+    """
+    Bounds how many requests run the agent pipeline at once.
+    Up to `max_concurrency` requests run, up to `max_queue` more wait for a
+    slot, and anything beyond that is rejected right away with QueueFull
+    (the API turns it into a 429) instead of piling up.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def full(self) -> bool:
+        return self.in_flight >= self.max_concurrency and self.queue_depth >= self.max_queue
+
+    def check_capacity(self):
+        """Raises QueueFull if a new request would be rejected right now."""
+        if self.full():
+            self.rejected += 1
+            raise QueueFull(self.in_flight, self.queue_depth, self.max_concurrency, self.max_queue)
+
+    async def wait_for_capacity(self, timeout: float):
+        """
+        Waits (backing off) up to `timeout` seconds for a request to be admitted,
+        then raises QueueFull like check_capacity(). Enter slot() right after it
+        returns, without awaiting anything else, and the slot cannot be refused.
+        """
+        deadline = time.monotonic() + timeout
+        delay = 0.01
+        while self.full() and time.monotonic() < deadline:
+            await asyncio.sleep(min(delay, deadline - time.monotonic()))
+            delay = min(delay * 2, 0.5)
+        self.check_capacity()
+
+    @asynccontextmanager
+    async def slot(self):
+        self.check_capacity()
+
+        self.queue_depth += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queue_depth -= 1
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,144 @@
+import os
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from neo4j import AsyncGraphDatabase, GraphDatabase
+from neo4j.exceptions import ServiceUnavailable, SessionExpired
+
+import telemetry
+
+# 1. Load Credentials
+load_dotenv()
+
+URI = os.getenv("NEO4J_URI")
+AUTH = (os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
+
+# 2. Connection Pool Settings (override them in .env)
+MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+CONNECTION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_TIMEOUT", "10"))
+ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "30"))
+MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
+LIVENESS_CHECK_TIMEOUT = float(os.getenv("NEO4J_LIVENESS_CHECK_TIMEOUT", "60"))
+RECONNECT_ATTEMPTS = int(os.getenv("NEO4J_RECONNECT_ATTEMPTS", "2"))
+
+# One driver (and therefore one connection pool) per process
+_driver = None
+_driver_lock = threading.Lock()
+# The async driver is bound to the event loop that first uses it (the API loop)
+_async_driver = None
+
+
+def check_credentials():
+    if not URI or not AUTH[0] or not AUTH[1]:
+        raise ValueError("❌ Error: Neo4j credentials missing in .env file")
+
+
+def _pool_config():
+    return dict(
+        max_connection_pool_size=MAX_POOL_SIZE,
+        connection_timeout=CONNECTION_TIMEOUT,
+        connection_acquisition_timeout=ACQUISITION_TIMEOUT,
+        max_connection_lifetime=MAX_CONNECTION_LIFETIME,
+        liveness_check_timeout=LIVENESS_CHECK_TIMEOUT,
+    )
+
+
+def get_driver():
+    """
+    Returns the process-wide Neo4j driver, creating it on first use.
+    The driver owns the connection pool, so every caller shares the same
+    bolt connections instead of paying a handshake + auth per query.
+    """
+    global _driver
+    if _driver is None:
+        with _driver_lock:
+            if _driver is None:
+                check_credentials()
+                _driver = GraphDatabase.driver(URI, auth=AUTH, **_pool_config())
+    return _driver
+
+
+def close_driver():
+    """Closes the shared driver. Safe to call several times (shutdown hook)."""
+    global _driver
+    with _driver_lock:
+        if _driver is not None:
+            _driver.close()
+            _driver = None
+
+
+def reset_driver():
+    """Drops a broken driver so the next call reconnects with a fresh pool."""
+    try:
+        close_driver()
+    except Exception as e:
+        print(f"⚠️ Error while closing Neo4j driver: {e}")
+
+
+def health_check():
+    """Returns True if the database is reachable with the current credentials."""
+    try:
+        get_driver().verify_connectivity()
+        return True
+    except Exception as e:
+        print(f"⚠️ Neo4j health check failed: {e}")
+        return False
+
+
+@contextmanager
+def get_session(**kwargs):
+    """Borrows a session (and a pooled connection) from the shared driver."""
+    with get_driver().session(**kwargs) as session:
+        yield session
+
+
+def run_query(query, parameters=None, **kwargs):
+    """
+    Runs a Cypher query on a pooled session and returns all records.
+    If the connection is lost (database restart, network blip), the driver
+    is rebuilt and the query is retried.
+    """
+    for attempt in range(RECONNECT_ATTEMPTS + 1):
+        try:
+            with telemetry.timed("db", name=telemetry.query_label(query)), get_session(**kwargs) as session:
+                return list(session.run(query, parameters or {}))
+        except (ServiceUnavailable, SessionExpired):
+            if attempt == RECONNECT_ATTEMPTS:
+                raise
+            print("🔄 Lost connection to Neo4j, reconnecting...")
+            reset_driver()
+
+
+# --- Async API (used by the async /chat path) ---
+def get_async_driver():
+    """Async counterpart of get_driver(), with the same pool settings."""
+    global _async_driver
+    if _async_driver is None:
+        check_credentials()
+        _async_driver = AsyncGraphDatabase.driver(URI, auth=AUTH, **_pool_config())
+    return _async_driver
+
+
+async def close_async_driver():
+    global _async_driver
+    if _async_driver is not None:
+        driver, _async_driver = _async_driver, None
+        await driver.close()
+
+
+async def arun_query(query, parameters=None, **kwargs):
+    """Async run_query(): same reconnect-and-retry behaviour, without blocking the event loop."""
+    for attempt in range(RECONNECT_ATTEMPTS + 1):
+        try:
+            with telemetry.timed("db", name=telemetry.query_label(query)):
+                async with get_async_driver().session(**kwargs) as session:
+                    result = await session.run(query, parameters or {})
+                    return [record async for record in result]
+        except (ServiceUnavailable, SessionExpired):
+            if attempt == RECONNECT_ATTEMPTS:
+                raise
+            print("🔄 Lost connection to Neo4j, reconnecting...")
+            try:
+                await close_async_driver()
+            except Exception as e:
+                print(f"⚠️ Error while closing Neo4j driver: {e}")
@@ -0,0 +1,147 @@
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_query(text: str) -> str:
+    """Cache key for a query: case, whitespace and edge punctuation do not matter."""
+    text = re.sub(r"\s+", " ", text.lower()).strip()
+    return text.strip(" .,!?;:'\"")
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache for query embeddings.
+    1. Memory: an LRU dict holding the most recent `max_size` queries.
+    2. Disk (optional): a sqlite file that survives restarts. Rows are keyed
+       by (model name, normalized text) so switching models never serves
+       stale vectors. The table is trimmed back to `disk_max_size` rows every
+       `disk_trim_every` inserts (and on open), so a put never counts the
+       whole table; it can overshoot by at most `disk_trim_every` rows.
+    """
+
+    def __init__(self, model_name: str, max_size: int = 2048, disk_path: str = None, disk_max_size: int = 100_000,
+                 disk_trim_every: int = 256):
+        self.model_name = model_name
+        self.max_size = max_size
+        self.disk_max_size = disk_max_size
+        self.disk_trim_every = max(1, disk_trim_every)
+        self._inserts_since_trim = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._disk = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (model, query)
+                )
+            """)
+            self._disk.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+            self._disk_trim()
+            self._disk.commit()
+
+    # --- Memory tier ---
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    # --- Disk tier ---
+    def _disk_get(self, key):
+        row = self._disk.execute(
+            "SELECT vector FROM embeddings WHERE model = ? AND query = ?", (self.model_name, key)
+        ).fetchone()
+        if row is None:
+            return None
+        self._disk.execute(
+            "UPDATE embeddings SET last_used = ? WHERE model = ? AND query = ?", (time.time(), self.model_name, key)
+        )
+        self._disk.commit()
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def _disk_put(self, key, vector):
+        self._disk.execute(
+            "INSERT OR REPLACE INTO embeddings (model, query, vector, last_used) VALUES (?, ?, ?, ?)",
+            (self.model_name, key, vector.tobytes(), time.time()),
+        )
+        self._inserts_since_trim += 1
+        if self._inserts_since_trim >= self.disk_trim_every:
+            self._disk_trim()
+        self._disk.commit()
+
+    def _disk_trim(self):
+        """Drops the least recently used rows beyond `disk_max_size`."""
+        self._inserts_since_trim = 0
+        (count,) = self._disk.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if count > self.disk_max_size:
+            self._disk.execute(
+                "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                (count - self.disk_max_size,),
+            )
+
+    # --- Public API ---
+    def get(self, text: str):
+        """Returns the cached float32 vector for `text`, or None."""
+        key = normalize_query(text)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return vector
+            if self._disk is not None:
+                vector = self._disk_get(key)
+                if vector is not None:
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+                    return vector
+            self.misses += 1
+            return None
+
+    def put(self, text: str, vector):
+        """Stores `vector` for `text` in both tiers and returns it as read-only float32."""
+        key = normalize_query(text)
+        vector = np.asarray(vector, dtype=np.float32)
+        vector.setflags(write=False)
+        with self._lock:
+            self._remember(key, vector)
+            if self._disk is not None:
+                self._disk_put(key, vector)
+        return vector
+
+    def get_or_compute(self, text: str, encode):
+        """Returns the cached vector, or calls `encode(text)` and stores the result."""
+        vector = self.get(text)
+        if vector is None:
+            vector = self.put(text, encode(text))
+        return vector
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "model": self.model_name,
+            "memory_size": len(self._memory),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
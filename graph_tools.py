@@ -1,75 +1,541 @@
+import asyncio
+import contextvars
+import functools
 import os
-from dotenv import load_dotenv
-from neo4j import GraphDatabase
-from sentence_transformers import SentenceTransformer
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
-# 1. Load Environment Variables from .env
-load_dotenv()
+import db
+import telemetry
+from embedding_cache import EmbeddingCache, normalize_query
+from compaction import compact_context, estimate_tokens, full_context_tokens
+from retrieval import DiseaseMatch, format_results as format_matches
+from singleflight import SingleFlight
+from symptom_matcher import SymptomIndex, fuse
+from vector_index import LocalVectorIndex
 
-URI = os.getenv("NEO4J_URI")
-AUTH = (os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
+# 1. Credentials are checked when the shared driver is first created (db.get_driver)
 
-# Check if credentials exist
-if not URI or not AUTH[0] or not AUTH[1]:
-    raise ValueError("❌ Error: Neo4j credentials missing in .env file")
+# 2. Embedding Model (loaded on first use or by warm_up(), so importing this module stays cheap)
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+model = None
+_model_lock = threading.Lock()
 
-# 2. Load Embedding Model 
-print("⏳ Loading embedding model in graph_tools...")
-model = SentenceTransformer('all-MiniLM-L6-v2')
+def get_model():
+    """Returns the SentenceTransformer, importing torch and loading the weights on first call."""
+    global model
+    if model is None:
+        with _model_lock:
+            if model is None:
+                from sentence_transformers import SentenceTransformer
+                print("⏳ Loading embedding model in graph_tools...")
+                model = SentenceTransformer(EMBEDDING_MODEL)
+    return model
 
-def get_medical_context(user_query: str):
+async def aget_model():
+    """Async get_model(): the first call (torch import + weights) runs off the event loop."""
+    if model is not None:
+        return model
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, get_model)
+
+# 3. Query-embedding cache (memory LRU + optional sqlite file that survives restarts)
+embedding_cache = EmbeddingCache(
+    EMBEDDING_MODEL,
+    max_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "2048")),
+    disk_path=os.getenv("EMBEDDING_CACHE_PATH") or None,
+    disk_max_size=int(os.getenv("EMBEDDING_CACHE_DISK_SIZE", "100000")),
+)
+
+# Dedicated threads for the CPU-bound forward pass, so async callers never block the event loop
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", str(min(4, os.cpu_count() or 1))))
+embedding_executor = ThreadPoolExecutor(max_workers=EMBEDDING_WORKERS, thread_name_prefix="embedding")
+
+def _encode(texts):
+    with telemetry.timed("embedding", name="encode"):
+        return get_model().encode(texts)
+
+def embed_query(user_query: str):
+    """Returns the query embedding, skipping the model forward pass on cache hits."""
+    return embedding_cache.get_or_compute(user_query, _encode)
+
+async def run_on_embedding_executor(func, *args):
+    """Runs `func` on the embedding threads, keeping the caller's context (request timing trace)."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(embedding_executor, functools.partial(context.run, func, *args))
+
+async def aembed_query(user_query: str):
+    """Async embed_query(): runs on the embedding executor."""
+    return await run_on_embedding_executor(embed_query, user_query)
+
+def embed_queries(user_queries):
+    """Embeddings for many queries: every distinct cache miss goes through a single model.encode call."""
+    vectors = [embedding_cache.get(q) for q in user_queries]
+    missing = list(dict.fromkeys(q for q, v in zip(user_queries, vectors) if v is None))
+    if missing:
+        computed = {}
+        for text, vector in zip(missing, _encode(missing)):
+            computed[text] = embedding_cache.put(text, vector)
+        vectors = [v if v is not None else computed[q] for q, v in zip(user_queries, vectors)]
+    return vectors
+
+async def aembed_queries(user_queries):
+    """Async embed_queries(): runs on the embedding executor."""
+    return await run_on_embedding_executor(embed_queries, list(user_queries))
+
+# 4. Retrieval Backend: "neo4j" (vector index in the database) or "local" (in-process NumPy index)
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "neo4j").lower()
+LOCAL_INDEX_QUANTIZE = os.getenv("LOCAL_INDEX_QUANTIZE", "false").lower() in ("1", "true", "yes")
+# Where the local index comes from: "neo4j" (pulled once) or "snapshot" (the ETL's memory-mapped files)
+LOCAL_INDEX_SOURCE = os.getenv("LOCAL_INDEX_SOURCE", "neo4j").lower()
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", os.path.join("data", "knowledge_snapshot.npz"))
+TOP_K = 3
+
+VECTOR_SEARCH_QUERY = """
+CALL db.index.vector.queryNodes('disease_desc_index', $k, $embedding)
+YIELD node AS d, score
+
+RETURN d.name AS disease,
+       d.description AS description,
+       score,
+       [(d)-[r:HAS_SYMPTOM]->(s:Symptom) | {name: s.name, weight: r.weight}] AS symptoms,
+       [(d)-[:NEEDS_PRECAUTION]->(p:Precaution) | p.name] AS precautions
+"""
+
+# One round trip for a whole batch: row i holds the top-k for $embeddings[i]
+BATCH_VECTOR_SEARCH_QUERY = """
+UNWIND range(0, size($embeddings) - 1) AS i
+CALL db.index.vector.queryNodes('disease_desc_index', $k, $embeddings[i])
+YIELD node AS d, score
+
+RETURN i,
+       d.name AS disease,
+       d.description AS description,
+       score,
+       [(d)-[r:HAS_SYMPTOM]->(s:Symptom) | {name: s.name, weight: r.weight}] AS symptoms,
+       [(d)-[:NEEDS_PRECAUTION]->(p:Precaution) | p.name] AS precautions
+ORDER BY i, score DESC
+"""
+
+# Direct lookups by name (used by the fast-path router, no vector search involved)
+DISEASE_NAMES_QUERY = "MATCH (d:Disease) RETURN d.name AS name ORDER BY name"
+DISEASE_LOOKUP_QUERY = """
+MATCH (d:Disease {name: $name})
+RETURN d.name AS disease,
+       d.description AS description,
+       1.0 AS score,
+       [(d)-[r:HAS_SYMPTOM]->(s:Symptom) | {name: s.name, weight: r.weight}] AS symptoms,
+       [(d)-[:NEEDS_PRECAUTION]->(p:Precaution) | p.name] AS precautions
+"""
+
+_local_index = None
+_local_index_lock = threading.Lock()
+_disease_names = None
+_symptom_index = None
+
+def load_local_index():
+    """A new LocalVectorIndex from the configured source."""
+    if LOCAL_INDEX_SOURCE != "snapshot":
+        return LocalVectorIndex.from_neo4j(quantize=LOCAL_INDEX_QUANTIZE)
+    from snapshot import Snapshot
+    snapshot = Snapshot.load(SNAPSHOT_PATH)
+    if snapshot.embedding_model != EMBEDDING_MODEL:
+        raise ValueError(f"❌ Error: snapshot embedded with {snapshot.embedding_model}, queries use {EMBEDDING_MODEL}")
+    return LocalVectorIndex.from_snapshot(snapshot, quantize=LOCAL_INDEX_QUANTIZE)
+
+def get_local_index():
+    """Returns the in-process index, loading it (from Neo4j or the snapshot) on first use."""
+    global _local_index
+    if _local_index is None:
+        with _local_index_lock:
+            if _local_index is None:
+                _local_index = load_local_index()
+                print(f"✅ Local vector index loaded from {LOCAL_INDEX_SOURCE}: {len(_local_index)} diseases.")
+    return _local_index
+
+async def aget_local_index():
+    """Async get_local_index(): a (re)load after a graph version change runs off the event loop."""
+    if _local_index is not None:
+        return _local_index
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(contextvars.copy_context().run, get_local_index))
+
+def refresh_local_index():
+    """Reloads the in-process index from its source (e.g. after re-ingestion)."""
+    global _local_index
+    index = load_local_index()
+    with _local_index_lock:
+        _local_index = index
+    return index
+
+def search_diseases(query_embedding, k: int = TOP_K):
+    """Top-k diseases for an embedding, from whichever backend is configured."""
+    if RETRIEVAL_BACKEND == "local":
+        return get_local_index().search(query_embedding, k)
+    # Pooled session from the shared driver (no handshake per call)
+    return db.run_query(VECTOR_SEARCH_QUERY, {"k": k, "embedding": list(map(float, query_embedding))})
+
+async def asearch_diseases(query_embedding, k: int = TOP_K):
+    """Async search_diseases(): uses the async Neo4j driver, the local index stays in-process."""
+    if RETRIEVAL_BACKEND == "local":
+        return (await aget_local_index()).search(query_embedding, k)
+    return await db.arun_query(VECTOR_SEARCH_QUERY, {"k": k, "embedding": list(map(float, query_embedding))})
+
+def _group_batch(records, n):
+    results = [[] for _ in range(n)]
+    for record in records:
+        results[record["i"]].append(record)
+    return results
+
+def search_diseases_batch(query_embeddings, k: int = TOP_K):
+    """Top-k for every embedding: one matmul locally, one UNWIND query on Neo4j."""
+    if not len(query_embeddings):
+        return []
+    if RETRIEVAL_BACKEND == "local":
+        return get_local_index().search_batch(query_embeddings, k)
+    embeddings = [list(map(float, e)) for e in query_embeddings]
+    return _group_batch(db.run_query(BATCH_VECTOR_SEARCH_QUERY, {"k": k, "embeddings": embeddings}), len(embeddings))
+
+async def asearch_diseases_batch(query_embeddings, k: int = TOP_K):
+    """Async search_diseases_batch()."""
+    if not len(query_embeddings):
+        return []
+    if RETRIEVAL_BACKEND == "local":
+        return (await aget_local_index()).search_batch(query_embeddings, k)
+    embeddings = [list(map(float, e)) for e in query_embeddings]
+    records = await db.arun_query(BATCH_VECTOR_SEARCH_QUERY, {"k": k, "embeddings": embeddings})
+    return _group_batch(records, len(embeddings))
+
+# 5. Graph Version (written by ingest_data.py, checked at most every GRAPH_VERSION_TTL seconds)
+GRAPH_VERSION_TTL = float(os.getenv("GRAPH_VERSION_TTL", "30"))
+GRAPH_VERSION_QUERY = "MATCH (m:GraphMeta {key: 'graph'}) RETURN m.version AS version"
+# "value" stays _UNREAD until the first successful read; None is a real version (no GraphMeta node yet)
+_UNREAD = object()
+_graph_version = {"value": _UNREAD, "checked_at": 0.0}
+
+def _known_version():
+    return None if _graph_version["value"] is _UNREAD else _graph_version["value"]
+
+def _remember_version(records):
+    global _local_index, _disease_names, _symptom_index
+    version = records[0]["version"] if records else None
+    if _graph_version["value"] is not _UNREAD and version != _graph_version["value"]:
+        # Re-ingestion changed the graph: reload the local index, disease names and symptom index on next use
+        _local_index = None
+        _disease_names = None
+        _symptom_index = None
+    _graph_version["value"] = version
+    _graph_version["checked_at"] = time.monotonic()
+    return version
+
+def get_graph_version():
+    """Current graph version; the last known value is kept if Neo4j is unreachable."""
+    if time.monotonic() - _graph_version["checked_at"] < GRAPH_VERSION_TTL:
+        return _known_version()
+    try:
+        return _remember_version(db.run_query(GRAPH_VERSION_QUERY))
+    except Exception as e:
+        print(f"⚠️ Could not read graph version: {e}")
+        return _known_version()
+
+async def aget_graph_version():
+    """Async get_graph_version()."""
+    if time.monotonic() - _graph_version["checked_at"] < GRAPH_VERSION_TTL:
+        return _known_version()
+    try:
+        return _remember_version(await db.arun_query(GRAPH_VERSION_QUERY))
+    except Exception as e:
+        print(f"⚠️ Could not read graph version: {e}")
+        return _known_version()
+
+# 6. Direct Disease Lookups
+def get_disease_names():
+    """Every Disease name in the graph (cached until the graph version changes)."""
+    global _disease_names
+    get_graph_version()
+    if _disease_names is None:
+        if RETRIEVAL_BACKEND == "local":
+            _disease_names = list(get_local_index().diseases)
+        else:
+            _disease_names = [r["name"] for r in db.run_query(DISEASE_NAMES_QUERY)]
+    return _disease_names
+
+async def aget_disease_names():
+    """Async get_disease_names()."""
+    global _disease_names
+    await aget_graph_version()
+    if _disease_names is None:
+        if RETRIEVAL_BACKEND == "local":
+            _disease_names = list((await aget_local_index()).diseases)
+        else:
+            _disease_names = [r["name"] for r in await db.arun_query(DISEASE_NAMES_QUERY)]
+    return _disease_names
+
+def lookup_disease(name: str):
+    """One Disease by exact name as a DiseaseMatch (score 1.0), or None."""
+    if RETRIEVAL_BACKEND == "local":
+        record = get_local_index().get(name)
+    else:
+        records = db.run_query(DISEASE_LOOKUP_QUERY, {"name": name})
+        record = records[0] if records else None
+    return DiseaseMatch.from_record(record) if record is not None else None
+
+async def alookup_disease(name: str):
+    """Async lookup_disease()."""
+    if RETRIEVAL_BACKEND == "local":
+        record = (await aget_local_index()).get(name)
+    else:
+        records = await db.arun_query(DISEASE_LOOKUP_QUERY, {"name": name})
+        record = records[0] if records else None
+    return DiseaseMatch.from_record(record) if record is not None else None
+
+# 7. Symptom Matching (HAS_SYMPTOM weights), fused with the vector ranking by reciprocal rank
+SYMPTOM_FUSION = os.getenv("SYMPTOM_FUSION", "true").lower() in ("1", "true", "yes")
+FUSION_CANDIDATES = int(os.getenv("FUSION_CANDIDATES", "10"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+SYMPTOM_INDEX_QUERY = """
+MATCH (d:Disease)
+RETURN d.name AS disease,
+       [(d)-[r:HAS_SYMPTOM]->(s:Symptom) | {name: s.name, weight: r.weight}] AS symptoms
+ORDER BY disease
+"""
+
+# Diseases found only by symptom overlap, scored against their query like the vector index does
+SCORED_LOOKUP_QUERY = """
+UNWIND $rows AS row
+MATCH (d:Disease {name: row.name})
+RETURN row.i AS i,
+       d.name AS disease,
+       d.description AS description,
+       vector.similarity.cosine(d.embedding, row.embedding) AS score,
+       [(d)-[r:HAS_SYMPTOM]->(s:Symptom) | {name: s.name, weight: r.weight}] AS symptoms,
+       [(d)-[:NEEDS_PRECAUTION]->(p:Precaution) | p.name] AS precautions
+"""
+
+def get_symptom_index():
+    """Sparse disease x symptom index (cached until the graph version changes)."""
+    global _symptom_index
+    get_graph_version()
+    if _symptom_index is None:
+        if RETRIEVAL_BACKEND == "local":
+            index = get_local_index()
+            _symptom_index = SymptomIndex(index.diseases, index.symptoms)
+        else:
+            _symptom_index = SymptomIndex.from_records(db.run_query(SYMPTOM_INDEX_QUERY))
+    return _symptom_index
+
+async def aget_symptom_index():
+    """Async get_symptom_index()."""
+    global _symptom_index
+    await aget_graph_version()
+    if _symptom_index is None:
+        if RETRIEVAL_BACKEND == "local":
+            index = await aget_local_index()
+            _symptom_index = SymptomIndex(index.diseases, index.symptoms)
+        else:
+            _symptom_index = SymptomIndex.from_records(await db.arun_query(SYMPTOM_INDEX_QUERY))
+    return _symptom_index
+
+def _candidate_k(k):
+    return max(k, FUSION_CANDIDATES) if SYMPTOM_FUSION else k
+
+def _missing_rows(plans, embeddings):
+    return [{"i": i, "name": step["disease"], "embedding": list(map(float, embeddings[i]))}
+            for i, plan in enumerate(plans) for step in plan if step["record"] is None]
+
+def _local_scored(index, rows):
+    records = [(row["i"], index.score(row["name"], row["embedding"])) for row in rows]
+    return [{**record, "i": i} for i, record in records if record is not None]
+
+def fetch_scored(rows):
+    """Records for the (query i, disease name) pairs that only the symptom ranking found."""
+    if not rows:
+        return []
+    if RETRIEVAL_BACKEND == "local":
+        return _local_scored(get_local_index(), rows)
+    return db.run_query(SCORED_LOOKUP_QUERY, {"rows": rows})
+
+async def afetch_scored(rows):
+    """Async fetch_scored()."""
+    if not rows:
+        return []
+    if RETRIEVAL_BACKEND == "local":
+        return _local_scored(await aget_local_index(), rows)
+    return await db.arun_query(SCORED_LOOKUP_QUERY, {"rows": rows})
+
+def _apply_plans(plans, fetched):
+    """Turns fusion plans (+ the records fetched for them) into DiseaseMatch lists."""
+    extra = {(r["i"], r["disease"]): r for r in fetched}
+    results = []
+    for i, plan in enumerate(plans):
+        matches = []
+        for step in plan:
+            record = step["record"] or extra.get((i, step["disease"]))
+            if record is None:
+                continue
+            match = DiseaseMatch.from_record(record)
+            match.symptom_score = step["symptom_score"]
+            match.matched_symptoms = step["matched_symptoms"]
+            matches.append(match)
+        results.append(matches)
+    return results
+
+def format_results(records) -> str:
+    """Format raw backend records (Neo4j rows or local index dicts) into plain text for the LLM."""
+    return format_matches([DiseaseMatch.from_record(r) for r in records])
+
+# 8. Retrieval: typed records first, the LLM-facing text is rendered from them
+NO_RESULTS_TEXT = "I searched the database, but found no relevant medical records."
+
+# Context compaction: what the Intern reads is trimmed to a token budget (see compaction.py)
+CONTEXT_COMPACTION = os.getenv("CONTEXT_COMPACTION", "true").lower() in ("1", "true", "yes")
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "400"))
+CONTEXT_MIN_SCORE = float(os.getenv("CONTEXT_MIN_SCORE", "0.55"))
+CONTEXT_SCORE_MARGIN = float(os.getenv("CONTEXT_SCORE_MARGIN", "0.08"))
+CONTEXT_DESCRIPTION_CHARS = int(os.getenv("CONTEXT_DESCRIPTION_CHARS", "200"))
+
+def retrieve(user_query: str, k: int = TOP_K):
     """
     This function performs the Hybrid Search (Vector + Graph):
     1. Converts user query to numbers (embedding).
-    2. Finds the most similar 'Disease' node in Neo4j.
-    3. Retrieves connected 'Symptoms' and 'Precautions'.
+    2. Finds the most similar 'Disease' node (Neo4j index or local index).
+    3. Retrieves connected 'Symptoms' (with weights) and 'Precautions'.
+    4. With SYMPTOM_FUSION, re-ranks by reciprocal rank fusion with the
+       weighted symptom overlap of the query.
+    Returns a list of DiseaseMatch, best first.
+    """
+    query_embedding = embed_query(user_query)
+    records = search_diseases(query_embedding, _candidate_k(k))
+    if not SYMPTOM_FUSION:
+        return [DiseaseMatch.from_record(r) for r in records]
+    symptom_index = get_symptom_index()
+    with telemetry.timed("symptom_match", name="fuse"):
+        plans = fuse(symptom_index, [user_query], [records], k, FUSION_CANDIDATES, RRF_K)
+    return _apply_plans(plans, fetch_scored(_missing_rows(plans, [query_embedding])))[0]
+
+async def aretrieve(user_query: str, k: int = TOP_K):
+    """Async retrieve() for the async API path."""
+    query_embedding = await aembed_query(user_query)
+    records = await asearch_diseases(query_embedding, _candidate_k(k))
+    if not SYMPTOM_FUSION:
+        return [DiseaseMatch.from_record(r) for r in records]
+    symptom_index = await aget_symptom_index()
+    with telemetry.timed("symptom_match", name="fuse"):
+        plans = fuse(symptom_index, [user_query], [records], k, FUSION_CANDIDATES, RRF_K)
+    return _apply_plans(plans, await afetch_scored(_missing_rows(plans, [query_embedding])))[0]
+
+def retrieve_batch(user_queries, k: int = TOP_K):
+    """Sync aretrieve_batch()."""
+    embeddings = embed_queries(user_queries)
+    results = search_diseases_batch(embeddings, _candidate_k(k))
+    if not SYMPTOM_FUSION:
+        return embeddings, [[DiseaseMatch.from_record(r) for r in records] for records in results]
+    symptom_index = get_symptom_index()
+    with telemetry.timed("symptom_match", name="fuse_batch"):
+        plans = fuse(symptom_index, user_queries, results, k, FUSION_CANDIDATES, RRF_K)
+    return embeddings, _apply_plans(plans, fetch_scored(_missing_rows(plans, embeddings)))
+
+async def aretrieve_batch(user_queries, k: int = TOP_K):
     """
+    retrieve() for a whole batch: one encode call for the cache misses, one
+    search round trip and one sparse product for the symptom scores. Returns (embeddings, list of DiseaseMatch lists).
+    """
+    embeddings = await aembed_queries(user_queries)
+    results = await asearch_diseases_batch(embeddings, _candidate_k(k))
+    if not SYMPTOM_FUSION:
+        return embeddings, [[DiseaseMatch.from_record(r) for r in records] for records in results]
+    symptom_index = await aget_symptom_index()
+    with telemetry.timed("symptom_match", name="fuse_batch"):
+        plans = fuse(symptom_index, user_queries, results, k, FUSION_CANDIDATES, RRF_K)
+    return embeddings, _apply_plans(plans, await afetch_scored(_missing_rows(plans, embeddings)))
+
+def render_context(matches, user_query: str = ""):
+    """
+    (text for the LLM, compact records for the API) from a retrieval result.
+    With CONTEXT_COMPACTION the records are those of the diseases the text kept.
+    """
+    if not matches:
+        return NO_RESULTS_TEXT, []
+    if not CONTEXT_COMPACTION:
+        return format_matches(matches), [m.to_compact() for m in matches]
+    text, kept = compact_context(matches, user_query, CONTEXT_TOKEN_BUDGET, CONTEXT_MIN_SCORE,
+                                 CONTEXT_SCORE_MARGIN, CONTEXT_DESCRIPTION_CHARS)
+    if telemetry.active():
+        telemetry.record_context_tokens(full_context_tokens(matches), estimate_tokens(text))
+    return text, [m.to_compact() for m in kept]
+
+# Retrieval already done in one batch for several tool calls of the same agent step
+_prefetched = contextvars.ContextVar("prefetched_matches", default=None)
+
+@contextmanager
+def prefetched(matches_by_query):
+    """Serves get_medical_context*() from {query: matches} while the block runs (and in copied contexts)."""
+    token = _prefetched.set(matches_by_query)
+    try:
+        yield
+    finally:
+        _prefetched.reset(token)
+
+def _prefetched_matches(user_query):
+    matches_by_query = _prefetched.get()
+    return matches_by_query.get(user_query) if matches_by_query else None
+
+# Identical retrievals in flight at the same time (bursts of the same question) run once
+COALESCING_ENABLED = os.getenv("COALESCING_ENABLED", "true").lower() in ("1", "true", "yes")
+retrieval_flight = SingleFlight("retrieval")
+
+def coalesced_retrieve(user_query: str, k: int = TOP_K):
+    """retrieve(), shared with any identical (normalized) query already in flight."""
+    if not COALESCING_ENABLED:
+        return retrieve(user_query, k)
+    return retrieval_flight.do_sync((normalize_query(user_query), k), retrieve, user_query, k)[0]
+
+async def acoalesced_retrieve(user_query: str, k: int = TOP_K):
+    """Async coalesced_retrieve()."""
+    if not COALESCING_ENABLED:
+        return await aretrieve(user_query, k)
+    return (await retrieval_flight.do((normalize_query(user_query), k), aretrieve, user_query, k))[0]
+
+def get_medical_context_with_records(user_query: str):
+    """get_medical_context() plus the compact records it was rendered from."""
     try:
-        driver = GraphDatabase.driver(URI, auth=AUTH)
-        
-        query_embedding = model.encode(user_query).tolist()
-        
-        # --- THE CYPHER QUERY ---
-        cypher_query = """
-        CALL db.index.vector.queryNodes('disease_desc_index', 3, $embedding)
-        YIELD node AS d, score
-        
-        OPTIONAL MATCH (d)-[:HAS_SYMPTOM]->(s:Symptom)
-        OPTIONAL MATCH (d)-[:NEEDS_PRECAUTION]->(p:Precaution)
-        
-        RETURN d.name AS disease,
-               d.description AS description,
-               score,
-               COLLECT(DISTINCT s.name) AS symptoms,
-               COLLECT(DISTINCT p.name) AS precautions
-        """
-        
-        results_text = ""
-        
-        with driver.session() as session:
-            result = session.run(cypher_query, embedding=query_embedding)
-            
-            # Format the database results into plain text for the LLM
-            for record in result:
-                results_text += f"\n### Disease Found: {record['disease']} (Similarity: {record['score']:.2f})\n"
-                results_text += f"**Description:** {record['description']}\n"
-                results_text += f"**Symptoms:** {', '.join(record['symptoms'])}\n"
-                results_text += f"**Precautions:** {', '.join(record['precautions'])}\n"
-                results_text += "-" * 20 + "\n"
-                
-        driver.close()
-        
-        if not results_text:
-            return "I searched the database, but found no relevant medical records."
-            
-        return results_text
+        matches = _prefetched_matches(user_query)
+        return render_context(coalesced_retrieve(user_query) if matches is None else matches, user_query)
+    except Exception as e:
+        return f"Error querying database: {str(e)}", []
 
+async def aget_medical_context_with_records(user_query: str):
+    """Async get_medical_context_with_records()."""
+    try:
+        matches = _prefetched_matches(user_query)
+        matches = await acoalesced_retrieve(user_query) if matches is None else matches
+        return render_context(matches, user_query)
     except Exception as e:
-        return f"Error querying database: {str(e)}"
+        return f"Error querying database: {str(e)}", []
+
+def get_medical_context(user_query: str):
+    """Retrieval rendered as plain text for the LLM."""
+    return get_medical_context_with_records(user_query)[0]
+
+async def aget_medical_context(user_query: str):
+    """Async get_medical_context()."""
+    return (await aget_medical_context_with_records(user_query))[0]
+
+# 9. Warm-up (called from the API lifespan, so the first request does not pay for it)
+def warm_up():
+    """Loads the model and runs one forward pass; with the local backend, loads the index too."""
+    get_model().encode("warm-up")
+    if RETRIEVAL_BACKEND == "local":
+        get_local_index()
 
 # --- Test Block (Only runs if you run this file directly) ---
 if __name__ == "__main__":
     test_query = "I have a skin rash and itching"
     print(f"\n🩺 Testing Query: '{test_query}'\n")
     response = get_medical_context(test_query)
-    print(response)
\ No newline at end of file
+    print(response)
+    db.close_driver()
\ No newline at end of file
@@ -1,92 +1,372 @@
+import argparse
+import hashlib
 import json
 import os
-from neo4j import GraphDatabase
-from sentence_transformers import SentenceTransformer
+import queue
+import threading
+import time
+
+import db
+from snapshot import SNAPSHOT_FILE, Snapshot, build_snapshot
 
 # --- Configuration ---
-URI = "bolt://localhost:7687"
-AUTH = ("neo4j", "tanit123")
+# Neo4j credentials come from .env through the shared driver in db.py
 DATA_FILE = os.path.join("data", "medical_graph_data.json")
+EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "64"))
+WRITE_CHUNK_SIZE = int(os.getenv("INGEST_WRITE_CHUNK_SIZE", "500"))
 
-# --- Initialize Embedding Model ---
-print("⏳ Loading embedding model (this happens once)...")
-model = SentenceTransformer('all-MiniLM-L6-v2')
-
-def ingest_data():
-    # 1. Connect to Neo4j
-    driver = GraphDatabase.driver(URI, auth=AUTH)
-    
-    with driver.session() as session:
-        # 2. Clear existing data (Clean Slate)
-        print("🧹 Clearing old database data...")
-        session.run("MATCH (n) DETACH DELETE n")
-        
-        # 3. Create Constraints (Ensures uniqueness and speed)
-        print("🔒 Creating constraints...")
-        session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (d:Disease) REQUIRE d.name IS UNIQUE")
-        session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (s:Symptom) REQUIRE s.name IS UNIQUE")
-        session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (p:Precaution) REQUIRE p.name IS UNIQUE")
-
-        # 4. Load JSON
-        with open(DATA_FILE, 'r') as f:
-            data = json.load(f)
-
-        print(f"🚀 Starting ingestion of {len(data)} diseases...")
-
-        for entry in data:
-            disease_name = entry['name']
-            description = entry['description']
-            
-            # --- GENERATE EMBEDDING ---
-            embedding = model.encode(description).tolist()
-
-            # --- CYPHER QUERY ---
-            query = """
-            MERGE (d:Disease {name: $name})
-            SET d.description = $desc,
-                d.embedding = $embedding
-            
-            WITH d
-            UNWIND $symptoms AS sym
-            MERGE (s:Symptom {name: sym.name})
-            MERGE (d)-[r:HAS_SYMPTOM]->(s)
-            SET r.weight = sym.weight
-
-            WITH d
-            UNWIND $precautions AS prec
-            MERGE (p:Precaution {name: prec})
-            MERGE (d)-[:NEEDS_PRECAUTION]->(p)
-            """
-            
-            session.run(query, 
-                        name=disease_name, 
-                        desc=description, 
-                        embedding=embedding,
-                        symptoms=entry['symptoms'], 
-                        precautions=entry['precautions']
-            )
-            print(f"   - Imported: {disease_name}")
-
-        # 5. Create Vector Index
-        print("🔍 Creating Vector Index for GraphRAG...")
+# --- Embedding Model (loaded on first use: ingesting from a snapshot never needs it) ---
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+model = None
+
+def get_model():
+    global model
+    if model is None:
+        from sentence_transformers import SentenceTransformer
+        print("⏳ Loading embedding model (this happens once)...")
+        model = SentenceTransformer(EMBEDDING_MODEL)
+    return model
+
+# --- CYPHER QUERIES (one UNWIND per chunk, not one round trip per disease) ---
+DISEASE_QUERY = """
+UNWIND $rows AS row
+MERGE (d:Disease {name: row.name})
+SET d.description = row.description,
+    d.embedding = row.embedding,
+    d.content_hash = row.content_hash
+"""
+
+SYMPTOM_QUERY = """
+UNWIND $rows AS row
+MATCH (d:Disease {name: row.disease})
+MERGE (s:Symptom {name: row.symptom})
+MERGE (d)-[r:HAS_SYMPTOM]->(s)
+SET r.weight = row.weight
+"""
+
+PRECAUTION_QUERY = """
+UNWIND $rows AS row
+MATCH (d:Disease {name: row.disease})
+MERGE (p:Precaution {name: row.precaution})
+MERGE (d)-[:NEEDS_PRECAUTION]->(p)
+"""
+
+# Relationships that are no longer in the source data for a re-ingested disease
+STALE_SYMPTOM_QUERY = """
+UNWIND $rows AS row
+MATCH (d:Disease {name: row.name})-[r:HAS_SYMPTOM]->(s:Symptom)
+WHERE NOT s.name IN [sym IN row.symptoms | sym.name]
+DELETE r
+"""
+
+STALE_PRECAUTION_QUERY = """
+UNWIND $rows AS row
+MATCH (d:Disease {name: row.name})-[r:NEEDS_PRECAUTION]->(p:Precaution)
+WHERE NOT p.name IN row.precautions
+DELETE r
+"""
+
+REMOVE_DISEASES_QUERY = """
+UNWIND $names AS name
+MATCH (d:Disease {name: name})
+DETACH DELETE d
+"""
+
+# Single node holding a fingerprint of the whole graph; API caches drop their
+# answers when it changes
+GRAPH_VERSION_QUERY = """
+MERGE (m:GraphMeta {key: 'graph'})
+SET m.version = $version, m.updated_at = datetime()
+"""
+
+REMOVE_ORPHANS_QUERY = """
+MATCH (n) WHERE (n:Symptom OR n:Precaution) AND NOT (n)<--()
+DELETE n
+RETURN count(n) AS removed
+"""
+
+def content_hash(entry):
+    """Fingerprint of everything a Disease node is built from (including the embedding model)."""
+    payload = {
+        "model": EMBEDDING_MODEL,
+        "description": entry['description'],
+        "symptoms": sorted((sym['name'], sym['weight']) for sym in entry['symptoms']),
+        "precautions": sorted(entry['precautions']),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+def graph_version(data):
+    """Version of the whole dataset: changes whenever any disease's content hash does."""
+    digest = hashlib.sha256()
+    for name, hash_ in sorted((entry['name'], entry['content_hash']) for entry in data):
+        digest.update(f"{name}\0{hash_}\n".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+def fetch_existing_hashes(session):
+    result = session.run("MATCH (d:Disease) RETURN d.name AS name, d.content_hash AS hash")
+    return {record['name']: record['hash'] for record in result}
+
+def plan_changes(data, existing, full=False):
+    """Splits the source entries into added / changed / unchanged, plus diseases to remove."""
+    plan = {"added": [], "changed": [], "unchanged": [], "removed": []}
+    seen = set()
+    for entry in data:
+        seen.add(entry['name'])
+        if entry['name'] not in existing:
+            plan["added"].append(entry)
+        elif full or existing[entry['name']] != entry['content_hash']:
+            plan["changed"].append(entry)
+        else:
+            plan["unchanged"].append(entry)
+    plan["removed"] = sorted(name for name in existing if name not in seen)
+    return plan
+
+def print_plan(plan, dry_run):
+    header = "🧾 Dry run, nothing will be written" if dry_run else "🧾 Change summary"
+    print(f"{header}:")
+    print(f"   + {len(plan['added'])} added, ~ {len(plan['changed'])} changed, "
+          f"= {len(plan['unchanged'])} unchanged, - {len(plan['removed'])} removed")
+    for label, sign in (("added", "+"), ("changed", "~")):
+        for entry in plan[label]:
+            print(f"   {sign} {entry['name']}")
+    for name in plan["removed"]:
+        print(f"   - {name}")
+
+def ensure_vector_index(session, dim, dry_run=False):
+    """
+    Creates disease_desc_index if it is missing. It is only dropped and rebuilt
+    when the embedding dimensions changed, so queries keep working during
+    a normal refresh.
+    """
+    record = session.run(
+        "SHOW VECTOR INDEXES YIELD name, options WHERE name = 'disease_desc_index' RETURN options"
+    ).single()
+    current_dim = None
+    if record is not None:
+        current_dim = record['options']['indexConfig'].get('vector.dimensions')
+
+    if current_dim == dim:
+        print(f"🔍 Vector index up to date ({dim} dimensions), leaving it alone.")
+        return
+    if dry_run:
+        action = "create" if current_dim is None else f"rebuild ({current_dim} -> {dim} dimensions)"
+        print(f"🔍 Vector index would {action}.")
+        return
+
+    print("🔍 Creating Vector Index for GraphRAG...")
+    if current_dim is not None:
+        print(f"⚠️ Embedding size changed ({current_dim} -> {dim}), rebuilding the index.")
+        session.run("DROP INDEX disease_desc_index IF EXISTS")
+    session.run(f"""
+    CREATE VECTOR INDEX disease_desc_index IF NOT EXISTS
+    FOR (d:Disease) ON (d.embedding)
+    OPTIONS {{indexConfig: {{
+     `vector.dimensions`: {dim},
+     `vector.similarity_function`: 'cosine'
+    }}}}
+    """)
+
+def disease_row(entry, embedding):
+    return {
+        "name": entry['name'],
+        "description": entry['description'],
+        "embedding": embedding.tolist(),
+        "content_hash": entry['content_hash'],
+        "symptoms": entry['symptoms'],
+        "precautions": entry['precautions'],
+    }
+
+def embed_batches(entries, batch_size):
+    """Yields lists of disease rows, embedding `batch_size` descriptions per model call."""
+    for start in range(0, len(entries), batch_size):
+        batch = entries[start:start + batch_size]
+        embeddings = get_model().encode([e['description'] for e in batch], batch_size=batch_size)
+        yield [disease_row(entry, embedding) for entry, embedding in zip(batch, embeddings)]
+
+def snapshot_batches(entries, snapshot, batch_size):
+    """Same rows as embed_batches, with the embeddings read from the snapshot instead of the model."""
+    for start in range(0, len(entries), batch_size):
+        yield [disease_row(entry, snapshot.embedding(entry['name'])) for entry in entries[start:start + batch_size]]
+
+def prefetch(generator, depth=2):
+    """
+    Runs `generator` in a background thread so the next embedding batch is
+    computed while the current chunk is being written to Neo4j.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    done = object()
+
+    def produce():
         try:
-            # Drop index if it exists
-            session.run("DROP INDEX disease_desc_index IF EXISTS")
-            
-            # Create new index using vector search settings
-            session.run("""
-            CREATE VECTOR INDEX disease_desc_index IF NOT EXISTS
-            FOR (d:Disease) ON (d.embedding)
-            OPTIONS {indexConfig: {
-             `vector.dimensions`: 384,
-             `vector.similarity_function`: 'cosine'
-            }}
-            """)
+            for item in generator:
+                buffer.put(item)
         except Exception as e:
-            print(f"⚠️ Index creation warning: {e}")
+            buffer.put(e)
+        buffer.put(done)
+
+    threading.Thread(target=produce, daemon=True).start()
+    while (item := buffer.get()) is not done:
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+def write_chunk(tx, rows):
+    """Writes one chunk of diseases, their relationships and stale-link cleanup in a single transaction."""
+    symptom_rows = [
+        {"disease": row['name'], "symptom": sym['name'], "weight": sym['weight']}
+        for row in rows for sym in row['symptoms']
+    ]
+    precaution_rows = [
+        {"disease": row['name'], "precaution": prec}
+        for row in rows for prec in row['precautions']
+    ]
+    tx.run(DISEASE_QUERY, rows=rows).consume()
+    tx.run(STALE_SYMPTOM_QUERY, rows=rows).consume()
+    tx.run(STALE_PRECAUTION_QUERY, rows=rows).consume()
+    tx.run(SYMPTOM_QUERY, rows=symptom_rows).consume()
+    tx.run(PRECAUTION_QUERY, rows=precaution_rows).consume()
+    return len(rows) + len(symptom_rows) + len(precaution_rows)
+
+def load_snapshot(path):
+    """
+    The snapshot at `path`, rebuilt first when it was not built from the
+    current medical_graph_data.json (only changed descriptions are re-embedded).
+    """
+    try:
+        snapshot = Snapshot.load(path)
+    except ValueError as e:
+        # Older format or a matrix from another build: the JSON can rebuild it
+        if not os.path.exists(DATA_FILE):
+            raise
+        print(f"⚠️ {e}")
+        snapshot = None
+    if os.path.exists(DATA_FILE):
+        with open(DATA_FILE, 'r') as f:
+            current = snapshot is not None and snapshot.is_current(json.load(f))
+        if not current:
+            print(f"⚠️ Snapshot '{path}' is unreadable or older than {DATA_FILE}, rebuilding it...")
+            build_snapshot(DATA_FILE, path)
+            snapshot = Snapshot.load(path)
+    else:
+        print(f"⚠️ {DATA_FILE} not found, cannot check that the snapshot is current.")
+    if snapshot.embedding_model != EMBEDDING_MODEL:
+        raise ValueError(f"❌ Error: snapshot embedded with {snapshot.embedding_model}, expected {EMBEDDING_MODEL}")
+    return snapshot
+
+def ingest_data(batch_size=EMBED_BATCH_SIZE, chunk_size=WRITE_CHUNK_SIZE, parallel=False, dry_run=False, full=False,
+                snapshot_path=None):
+    """
+    Incremental ingestion: only new or changed diseases are re-embedded and
+    re-merged, removed ones are deleted, and the graph stays queryable
+    the whole time (no wipe, no index drop). With `snapshot_path`, the
+    diseases and their embeddings come from the ETL's snapshot and the
+    model is never loaded.
+    """
+    # 1. Connect to Neo4j (shared, pooled driver)
+    try:
+        with db.get_session() as session:
+            # 2. Load the source (JSON, or the snapshot with its embeddings) and fingerprint every entry
+            snapshot = None
+            if snapshot_path:
+                snapshot = load_snapshot(snapshot_path)
+                data = snapshot.entries()
+                dim = snapshot.dim
+                print(f"📦 Loading from snapshot '{snapshot_path}' ({len(data)} diseases, precomputed embeddings).")
+            else:
+                with open(DATA_FILE, 'r') as f:
+                    data = json.load(f)
+                dim = get_model().get_sentence_embedding_dimension()
+            for entry in data:
+                entry['content_hash'] = content_hash(entry)
+
+            # 3. Diff against what is already in the graph
+            plan = plan_changes(data, fetch_existing_hashes(session), full=full)
+            print_plan(plan, dry_run)
+            if dry_run:
+                ensure_vector_index(session, dim, dry_run=True)
+                return plan
+
+            # 4. Create Constraints (Ensures uniqueness and speed)
+            print("🔒 Creating constraints...")
+            session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (d:Disease) REQUIRE d.name IS UNIQUE")
+            session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (s:Symptom) REQUIRE s.name IS UNIQUE")
+            session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (p:Precaution) REQUIRE p.name IS UNIQUE")
+
+            # 5. Re-embed and write only what changed
+            to_write = plan["added"] + plan["changed"]
+            mode = "parallel" if parallel else "sequential"
+            print(f"🚀 Ingesting {len(to_write)} of {len(data)} diseases "
+                  f"({mode}, embed batch {batch_size}, write chunk {chunk_size})...")
+
+            # --- EMBED IN BATCHES (or read them from the snapshot), WRITE IN CHUNKED TRANSACTIONS ---
+            if snapshot is not None:
+                batches = snapshot_batches(to_write, snapshot, batch_size)
+            else:
+                batches = embed_batches(to_write, batch_size)
+            if parallel:
+                batches = prefetch(batches)
+
+            start = time.perf_counter()
+            write_time = 0.0
+            total_rows = 0
+            pending = []
+
+            def flush(rows):
+                nonlocal write_time, total_rows
+                t0 = time.perf_counter()
+                written = session.execute_write(write_chunk, rows)
+                write_time += time.perf_counter() - t0
+                total_rows += written
+                print(f"   - Imported {len(rows)} diseases ({written} rows)")
+
+            for batch in batches:
+                pending.extend(batch)
+                while len(pending) >= chunk_size:
+                    flush(pending[:chunk_size])
+                    pending = pending[chunk_size:]
+            if pending:
+                flush(pending)
+
+            elapsed = time.perf_counter() - start
+            if total_rows:
+                print(f"📈 Wrote {total_rows} rows in {elapsed:.2f}s "
+                      f"({total_rows / elapsed:.0f} rows/sec overall, "
+                      f"{total_rows / max(write_time, 1e-9):.0f} rows/sec in Neo4j writes)")
+
+            # 6. Remove diseases that left the dataset, then orphaned symptoms/precautions
+            if plan["removed"]:
+                session.execute_write(lambda tx: tx.run(REMOVE_DISEASES_QUERY, names=plan["removed"]).consume())
+                print(f"🗑️ Removed {len(plan['removed'])} stale diseases.")
+            orphans = session.execute_write(lambda tx: tx.run(REMOVE_ORPHANS_QUERY).single()['removed'])
+            if orphans:
+                print(f"🗑️ Removed {orphans} orphaned symptom/precaution nodes.")
+
+            # 7. Vector Index (left alone unless its dimensions changed)
+            try:
+                ensure_vector_index(session, dim)
+            except Exception as e:
+                print(f"⚠️ Index creation warning: {e}")
 
-    driver.close()
+            # 8. Publish the new graph version (invalidates cached answers in the API)
+            version = graph_version(data)
+            session.execute_write(lambda tx: tx.run(GRAPH_VERSION_QUERY, version=version).consume())
+            print(f"🏷️ Graph version: {version}")
+    finally:
+        # After the session has closed (also on the dry-run return and on errors)
+        db.close_driver()
     print("✅ Ingestion Complete! Your Graph is ready.")
+    return plan
 
 if __name__ == "__main__":
-    ingest_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Load medical_graph_data.json into Neo4j.")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE, help="descriptions per model.encode call")
+    parser.add_argument("--chunk-size", type=int, default=WRITE_CHUNK_SIZE, help="diseases per write transaction")
+    parser.add_argument("--parallel", action="store_true", help="overlap embedding with database writes")
+    parser.add_argument("--dry-run", action="store_true", help="print the change summary without writing")
+    parser.add_argument("--full", action="store_true", help="re-embed and re-merge every disease, even unchanged ones")
+    parser.add_argument("--snapshot", nargs="?", const=SNAPSHOT_FILE, default=None,
+                        help=f"load from the ETL's binary snapshot (default {SNAPSHOT_FILE}) instead of the JSON, "
+                             "reusing its embeddings")
+    args = parser.parse_args()
+    ingest_data(batch_size=args.batch_size, chunk_size=args.chunk_size, parallel=args.parallel,
+                dry_run=args.dry_run, full=args.full, snapshot_path=args.snapshot)
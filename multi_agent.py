@@ -1,27 +1,48 @@
+import asyncio
+import contextvars
 import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
 from dotenv import load_dotenv
 
-from langchain_groq import ChatGroq
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, ToolMessage, RemoveMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode, tools_condition
+from langgraph.prebuilt import tools_condition
 from typing import Annotated, TypedDict
 from langgraph.graph.message import add_messages
 
 # Import existing tools
-from graph_tools import get_medical_context
+import graph_tools
+import router
+from graph_tools import get_medical_context_with_records, aget_medical_context_with_records
 
 # 1. Load api
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
 # 2. Define Tools 
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool, tool
 
-@tool
-def consult_medical_database(symptom_description: str):
+def _consult_medical_database(symptom_description: str):
+    """Query Neo4j for diseases, symptoms, and precautions."""
+    return get_medical_context_with_records(symptom_description)
+
+async def _aconsult_medical_database(symptom_description: str):
     """Query Neo4j for diseases, symptoms, and precautions."""
-    return get_medical_context(symptom_description)
+    return await aget_medical_context_with_records(symptom_description)
+
+# Sync + async implementations: `invoke` uses the first, `ainvoke` the second.
+# The LLM only sees the text; the compact records ride along as the ToolMessage artifact.
+consult_medical_database = StructuredTool.from_function(
+    func=_consult_medical_database,
+    coroutine=_aconsult_medical_database,
+    name="consult_medical_database",
+    response_format="content_and_artifact",
+)
 
 @tool
 def calculate_bmi(weight_kg: float, height_m: float):
@@ -31,19 +52,187 @@ def calculate_bmi(weight_kg: float, height_m: float):
 
 tools = [consult_medical_database, calculate_bmi]
 
-# 3. Initialize LLM
-llm = ChatGroq(model_name="llama-3.3-70b-versatile", temperature=0)
-llm_with_tools = llm.bind_tools(tools)
+# 3. Initialize LLM (on first use or at API warm-up: importing langchain_groq is not free)
+LLM_MODEL = "llama-3.3-70b-versatile"
+llm = None
+llm_with_tools = None
+_llm_lock = threading.Lock()
+
+def get_llm():
+    global llm, llm_with_tools
+    if llm is None:
+        with _llm_lock:
+            if llm is None:
+                from langchain_groq import ChatGroq
+                client = ChatGroq(model_name=LLM_MODEL, temperature=0)
+                llm_with_tools = client.bind_tools(tools)
+                llm = client
+    return llm
+
+def get_llm_with_tools():
+    if llm_with_tools is None:
+        get_llm()
+    return llm_with_tools
+
+async def aget_llm():
+    """Async get_llm(): a first call during warm-up waits off the event loop (import + client build)."""
+    if llm is None:
+        await asyncio.get_running_loop().run_in_executor(None, get_llm)
+    return llm
+
+async def aget_llm_with_tools():
+    if llm_with_tools is None:
+        await aget_llm()
+    return llm_with_tools
 
 # 4. Define State
 class AgentState(TypedDict):
     messages: Annotated[list, add_messages]
+    route: str  # "fast_bmi" | "fast_disease" | "agent"
 
-# --- NODE 1: THE MEDICAL INTERN (Generates Answer) ---
-def intern_node(state: AgentState):
+# --- NODE 0: MEMORY (Keeps a session's history within a token budget) ---
+# With a checkpointer (api.py sessions) every turn is appended to the thread:
+# without this node the Intern's prompt would grow with every follow-up.
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "2000"))
+
+def split_turns(messages):
+    """[[HumanMessage, ...replies], ...]: one list per user turn."""
+    turns = []
+    for msg in messages:
+        if isinstance(msg, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(msg)
+    return turns
+
+def current_turn(messages):
+    """Messages from the last HumanMessage on (the whole list for a stateless run)."""
+    return split_turns(messages)[-1] if messages else []
+
+def memory_node(state: AgentState):
     """
-    The Intern tries to answer the user's question using tools.
+    Compacts earlier turns to question + final answer (their tool calls, tool
+    results and drafts are already reflected in the answer), then drops the
+    oldest turns until the history fits HISTORY_TOKEN_BUDGET. The current
+    turn is never touched.
     """
+    turns = split_turns(state["messages"])
+    if len(turns) < 2:
+        return {}
+    removed = []
+    kept_turns = []
+    for turn in turns[:-1]:
+        answered = len(turn) > 1 and isinstance(turn[-1], AIMessage) and not turn[-1].tool_calls
+        keep = [turn[0], turn[-1]] if answered else turn[:1]
+        removed += turn[1:-1] if answered else turn[1:]
+        kept_turns.append(keep)
+
+    budget = HISTORY_TOKEN_BUDGET - count_tokens_approximately(turns[-1])
+    sizes = [count_tokens_approximately(turn) for turn in kept_turns]
+    while kept_turns and sum(sizes) > budget:
+        removed += kept_turns.pop(0)
+        sizes.pop(0)
+    return {"messages": [RemoveMessage(id=msg.id) for msg in removed]} if removed else {}
+
+# --- NODE 0b: THE ROUTER (Answers deterministic requests without the LLM) ---
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "true").lower() in ("1", "true", "yes")
+FAST_PATH_MATCH_THRESHOLD = float(os.getenv("FAST_PATH_MATCH_THRESHOLD", "0.8"))
+# The best name must beat the runner-up by this much, else the question is ambiguous
+FAST_PATH_MATCH_MARGIN = float(os.getenv("FAST_PATH_MATCH_MARGIN", "0.05"))
+
+def tool_trail(tool_name, args, tool_output, artifact=None):
+    """An already-answered tool call, shaped like the agent's own tool_call -> tool_result messages."""
+    call_id = f"call_{uuid.uuid4().hex[:8]}"
+    return [
+        AIMessage(content="", tool_calls=[{"name": tool_name, "args": args, "id": call_id}]),
+        ToolMessage(content=tool_output, artifact=artifact, tool_call_id=call_id, name=tool_name),
+    ]
+
+def fast_path_messages(tool_name, args, tool_output, answer, artifact=None):
+    """The same tool_call -> tool_result -> answer trail the agent leaves, so the API reports it alike."""
+    return tool_trail(tool_name, args, tool_output, artifact) + [AIMessage(content=answer)]
+
+def seeded_inputs(user_query, matches):
+    """
+    Graph input whose retrieval is already done (e.g. by a batch search):
+    the Intern starts at its drafting turn, saving one LLM round trip.
+    """
+    text, records = graph_tools.render_context(matches, user_query)
+    return {"messages": [HumanMessage(content=user_query)] + tool_trail(
+        "consult_medical_database", {"symptom_description": user_query}, text, records)}
+
+def bmi_route(query):
+    parsed = router.parse_bmi(query)
+    if parsed is None:
+        return None
+    weight_kg, height_m = parsed
+    args = {"weight_kg": weight_kg, "height_m": height_m}
+    return {
+        "route": "fast_bmi",
+        "messages": fast_path_messages("calculate_bmi", args, calculate_bmi.invoke(args), router.bmi_answer(*parsed)),
+    }
+
+def disease_route(match):
+    text, records = graph_tools.render_context([match])
+    return {
+        "route": "fast_disease",
+        "messages": fast_path_messages("consult_medical_database", {"symptom_description": match.disease},
+                                       text, router.disease_answer(match), records),
+    }
+
+def _last_query(state: AgentState):
+    last = state["messages"][-1]
+    return last.content if isinstance(last, HumanMessage) else None
+
+def router_node(state: AgentState):
+    """
+    Answers BMI requests and questions about one named disease straight from
+    the tools, with a template; everything else goes to the Intern.
+    """
+    query = _last_query(state)
+    if not FAST_PATH_ENABLED or query is None:
+        return {"route": "agent"}
+    try:
+        routed = bmi_route(query)
+        if routed:
+            return routed
+        subject = router.disease_subject(query)
+        if subject:
+            matcher = router.get_matcher(graph_tools.get_disease_names(), graph_tools.get_model().encode,
+                                         FAST_PATH_MATCH_THRESHOLD, FAST_PATH_MATCH_MARGIN)
+            found = matcher.match(subject, graph_tools.embed_query)
+            match = graph_tools.lookup_disease(found[0]) if found else None
+            if match is not None:
+                return disease_route(match)
+    except Exception as e:
+        # The fast path is an optimisation: fall back to the agent on any failure
+        print(f"⚠️ Fast path skipped: {e}")
+    return {"route": "agent"}
+
+async def arouter_node(state: AgentState):
+    """Async router_node (used by `app.ainvoke`)."""
+    query = _last_query(state)
+    if not FAST_PATH_ENABLED or query is None:
+        return {"route": "agent"}
+    try:
+        routed = bmi_route(query)
+        if routed:
+            return routed
+        subject = router.disease_subject(query)
+        if subject:
+            model = await graph_tools.aget_model()
+            matcher = router.get_matcher(await graph_tools.aget_disease_names(), model.encode,
+                                         FAST_PATH_MATCH_THRESHOLD, FAST_PATH_MATCH_MARGIN)
+            # Embedding the phrase (and, once, the names) is CPU work: keep it off the event loop
+            found = await graph_tools.run_on_embedding_executor(matcher.match, subject, graph_tools.embed_query)
+            match = await graph_tools.alookup_disease(found[0]) if found else None
+            if match is not None:
+                return disease_route(match)
+    except Exception as e:
+        print(f"⚠️ Fast path skipped: {e}")
+    return {"route": "agent"}
+
+# --- NODE 1: THE MEDICAL INTERN (Generates Answer) ---
+def intern_prompt(state: AgentState):
     # Force a system persona
     sys_msg = SystemMessage(content="You are a Medical Intern. Retrieve data and answer the user. Be concise.")
     
@@ -51,23 +240,114 @@ def intern_node(state: AgentState):
     history = state["messages"]
     if not isinstance(history[0], SystemMessage):
         history = [sys_msg] + history
-        
-    response = llm_with_tools.invoke(history)
+    return history
+
+def intern_node(state: AgentState):
+    """
+    The Intern tries to answer the user's question using tools.
+    """
+    response = get_llm_with_tools().invoke(intern_prompt(state))
     return {"messages": [response]}
 
-# --- NODE 2: THE SUPERVISOR (Validates & Formats Answer) ---
-def supervisor_node(state: AgentState):
+async def aintern_node(state: AgentState):
+    """Async intern_node (used by `app.ainvoke`)."""
+    response = await (await aget_llm_with_tools()).ainvoke(intern_prompt(state))
+    return {"messages": [response]}
+
+# --- NODE 1b: TOOLS (all tool calls of one Intern step run concurrently) ---
+# Several consult_medical_database calls in one step share one batched embed + search
+TOOL_MAX_PARALLEL = int(os.getenv("TOOL_MAX_PARALLEL", "4"))
+TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "15"))
+TOOL_TIMEOUTS = {"calculate_bmi": float(os.getenv("TOOL_TIMEOUT_BMI", "2"))}
+TOOL_MERGE_RETRIEVAL = os.getenv("TOOL_MERGE_RETRIEVAL", "true").lower() in ("1", "true", "yes")
+RETRIEVAL_TOOL = "consult_medical_database"
+tools_by_name = {t.name: t for t in tools}
+tool_executor = ThreadPoolExecutor(max_workers=TOOL_MAX_PARALLEL, thread_name_prefix="tool")
+
+def tool_timeout(call):
+    return TOOL_TIMEOUTS.get(call["name"], TOOL_TIMEOUT)
+
+def tool_error(call, text):
+    return ToolMessage(content=f"Error: {text}", tool_call_id=call["id"], name=call["name"], status="error")
+
+def retrieval_queries(calls):
+    """Distinct symptom descriptions of this step's retrieval calls (merged only when there are several)."""
+    queries = [c["args"].get("symptom_description") for c in calls if c["name"] == RETRIEVAL_TOOL]
+    queries = list(dict.fromkeys(q for q in queries if isinstance(q, str)))
+    return queries if TOOL_MERGE_RETRIEVAL and len(queries) > 1 else []
+
+def run_tool(call, config):
+    tool = tools_by_name.get(call["name"])
+    if tool is None:
+        return tool_error(call, f"unknown tool {call['name']}")
+    return tool.invoke({**call, "type": "tool_call"}, config)
+
+async def arun_tool(call, config):
+    tool = tools_by_name.get(call["name"])
+    if tool is None:
+        return tool_error(call, f"unknown tool {call['name']}")
+    return await tool.ainvoke({**call, "type": "tool_call"}, config)
+
+def tools_node(state: AgentState, config: RunnableConfig):
     """
-    The Supervisor checks the Intern's work and enforces strict formatting.
+    Runs the last AIMessage's tool calls on a bounded thread pool, each with
+    its own timeout. ToolMessages come back in tool_call order.
     """
-    messages = state["messages"]
-    last_message = messages[-1]
-    
-    if last_message.tool_calls:
-        return {"messages": []} 
+    calls = state["messages"][-1].tool_calls
+    queries = retrieval_queries(calls)
+    matches_by_query = {}
+    if queries:
+        try:
+            matches_by_query = dict(zip(queries, graph_tools.retrieve_batch(queries)[1]))
+        except Exception as e:
+            print(f"⚠️ Batched retrieval failed, tools will retrieve one by one: {e}")
+
+    with graph_tools.prefetched(matches_by_query):
+        start = time.monotonic()
+        futures = [tool_executor.submit(contextvars.copy_context().run, run_tool, call, config) for call in calls]
+        messages = []
+        for call, future in zip(calls, futures):
+            timeout = tool_timeout(call)
+            try:
+                messages.append(future.result(timeout=max(0.0, start + timeout - time.monotonic())))
+            except FuturesTimeout:
+                # The worker cannot be interrupted; its result is discarded when it finishes
+                messages.append(tool_error(call, f"{call['name']} timed out after {timeout:g}s"))
+            except Exception as e:
+                messages.append(tool_error(call, str(e)))
+    return {"messages": messages}
 
+async def atools_node(state: AgentState, config: RunnableConfig):
+    """Async tools_node (used by `app.ainvoke`)."""
+    calls = state["messages"][-1].tool_calls
+    queries = retrieval_queries(calls)
+    matches_by_query = {}
+    if queries:
+        try:
+            matches_by_query = dict(zip(queries, (await graph_tools.aretrieve_batch(queries))[1]))
+        except Exception as e:
+            print(f"⚠️ Batched retrieval failed, tools will retrieve one by one: {e}")
+
+    semaphore = asyncio.Semaphore(TOOL_MAX_PARALLEL)
+
+    async def run(call):
+        async with semaphore:
+            timeout = tool_timeout(call)
+            try:
+                return await asyncio.wait_for(arun_tool(call, config), timeout)
+            except asyncio.TimeoutError:
+                return tool_error(call, f"{call['name']} timed out after {timeout:g}s")
+            except Exception as e:
+                return tool_error(call, str(e))
+
+    with graph_tools.prefetched(matches_by_query):
+        messages = await asyncio.gather(*(run(call) for call in calls))
+    return {"messages": list(messages)}
+
+# --- NODE 2: THE SUPERVISOR (Validates & Formats Answer) ---
+def supervisor_prompt(last_message):
     # If it's a final text answer, review and format it.
-    validation_prompt = [
+    return [
         SystemMessage(content="""
         You are a Senior Medical Supervisor. 
         Your goal is to format the Intern's medical advice into a clean, readable structure.
@@ -84,18 +364,50 @@ def supervisor_node(state: AgentState):
         """),
         HumanMessage(content=f"Intern's Draft: {last_message.content}")
     ]
+
+def supervisor_node(state: AgentState):
+    """
+    The Supervisor checks the Intern's work and enforces strict formatting.
+    """
+    last_message = state["messages"][-1]
     
-    response = llm.invoke(validation_prompt)
+    if last_message.tool_calls:
+        return {"messages": []} 
+
+    response = get_llm().invoke(supervisor_prompt(last_message))
+    
+    return {"messages": [AIMessage(content=response.content)]}
+
+async def asupervisor_node(state: AgentState):
+    """Async supervisor_node (used by `app.ainvoke`)."""
+    last_message = state["messages"][-1]
+    
+    if last_message.tool_calls:
+        return {"messages": []} 
+
+    response = await (await aget_llm()).ainvoke(supervisor_prompt(last_message))
     
     return {"messages": [AIMessage(content=response.content)]}
 # 5. Build Graph
 workflow = StateGraph(AgentState)
 
-# Add Nodes
-workflow.add_node("medical_intern", intern_node)
-workflow.add_node("tools", ToolNode(tools))
-workflow.add_node("supervisor", supervisor_node)
-workflow.set_entry_point("medical_intern")
+# Add Nodes (each with a sync and an async implementation)
+workflow.add_node("memory", memory_node)
+workflow.add_node("router", RunnableLambda(router_node, afunc=arouter_node))
+workflow.add_node("medical_intern", RunnableLambda(intern_node, afunc=aintern_node))
+workflow.add_node("tools", RunnableLambda(tools_node, afunc=atools_node))
+workflow.add_node("supervisor", RunnableLambda(supervisor_node, afunc=asupervisor_node))
+workflow.set_entry_point("memory")
+workflow.add_edge("memory", "router")
+workflow.add_conditional_edges(
+    "router",
+    lambda state: state.get("route", "agent"),
+    {
+        "agent": "medical_intern",
+        "fast_bmi": END,  # Template answers need no Supervisor pass
+        "fast_disease": END,
+    }
+)
 workflow.add_conditional_edges(
     "medical_intern",
     tools_condition,
@@ -110,6 +422,7 @@ workflow.add_edge("tools", "medical_intern")
 # Supervisor -> End
 workflow.add_edge("supervisor", END)
 
+# Stateless graph; api.py compiles a second one with a checkpointer for sessions
 app = workflow.compile()
 
 # --- Test Block ---
@@ -0,0 +1,283 @@
+import asyncio
+import hashlib
+import io
+import json
+import threading
+import time
+import uuid
+import zipfile
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from fpdf import FPDF
+
+import telemetry
+from concurrency import QueueFull
+from singleflight import SingleFlight
+
+# Bump when the layout changes, so cached PDFs of the old layout are not served
+REPORT_VERSION = 1
+REPORT_TITLE = "Tanit Health AI - Clinical Report"
+REPORT_FOOTER = "Generated by AI Agent. Consult a Doctor."
+
+# The core PDF fonts are latin-1: map the usual LLM punctuation instead of turning it into "?"
+LATIN1_FIXES = str.maketrans({
+    "‘": "'", "’": "'", "“": '"', "”": '"',
+    "–": "-", "—": "-", "•": "-", "…": "...", " ": " ", "*": None,
+})
+
+
+def report_key(query: str, response: str, retrieval=()) -> str:
+    """Content hash of a report: identical answers share one PDF."""
+    content = json.dumps([REPORT_VERSION, query, response, list(retrieval)], sort_keys=True, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def latin1(text: str) -> str:
+    return text.translate(LATIN1_FIXES).encode("latin-1", "replace").decode("latin-1")
+
+
+def render_pdf(query: str, response: str, retrieval=()) -> bytes:
+    """The clinical report: subject, the answer and, when given, the matched diseases."""
+    pdf = FPDF()
+    pdf.add_page()
+
+    # Header
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(200, 10, txt=REPORT_TITLE, ln=1, align="C")
+    pdf.set_font("Arial", size=12)
+    pdf.multi_cell(0, 10, txt=latin1(f"Subject: {query}"))
+    pdf.ln(10)
+
+    # Body
+    pdf.multi_cell(0, 10, txt=latin1(response))
+
+    # Matched diseases (the structured retrieval records of /chat)
+    if retrieval:
+        pdf.ln(5)
+        pdf.set_font("Arial", "B", 12)
+        pdf.cell(0, 10, txt="Knowledge graph matches", ln=1)
+        pdf.set_font("Arial", size=10)
+        for match in retrieval:
+            symptoms = ", ".join(s["name"] for s in match.get("symptoms", [])[:8])
+            line = f"{match.get('disease', '?')} ({float(match.get('score', 0)):.2f})"
+            pdf.multi_cell(0, 6, txt=latin1(f"{line}: {symptoms}" if symptoms else line))
+
+    # Footer
+    pdf.ln(20)
+    pdf.set_font("Arial", "I", 10)
+    pdf.cell(0, 10, txt=REPORT_FOOTER, ln=1, align="C")
+    return pdf.output(dest="S").encode("latin-1")
+
+
+class ReportCache:
+    """
+    LRU of rendered PDFs keyed on their content hash, bounded by total size
+    (`max_bytes`) and entry count (`max_items`), whichever is hit first.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_items: int = 1024):
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old)
+            self._entries[key] = data
+            self.bytes += len(data)
+            while self.bytes > self.max_bytes or len(self._entries) > self.max_items:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "items": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+class ReportService:
+    """
+    Renders reports off the event loop, through the content-hash cache.
+    1. render() / arender(): one report, returned directly. Identical
+       reports rendering at the same time share one render.
+    2. submit(): background job for long reports and batches; poll job()
+       and fetch job_result() (the PDF, or a zip for a batch). Results stay
+       on the job, so cache eviction never loses a finished export.
+    Finished jobs are kept for `job_ttl` seconds, at most `max_jobs` of them.
+    At most `max_pending` jobs are queued or running: submit() raises
+    QueueFull (a 429) beyond that, since pending jobs can't be evicted.
+    """
+
+    def __init__(self, cache: ReportCache, workers: int = 2, max_jobs: int = 256, job_ttl: float = 3600,
+                 max_pending: int = 32):
+        self.cache = cache
+        self.max_jobs = max_jobs
+        self.max_pending = max_pending
+        self.job_ttl = job_ttl
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report")
+        self.flight = SingleFlight("report")
+        self._jobs = OrderedDict()
+        self._tasks = set()
+
+    def _render(self, key, query, response, retrieval):
+        with telemetry.timed("report", name="render"):
+            data = render_pdf(query, response, retrieval)
+        telemetry.record_size("report_pdf", len(data))
+        self.cache.put(key, data)
+        return data
+
+    def render(self, query: str, response: str, retrieval=()):
+        """Returns (key, pdf bytes, cache hit)."""
+        key = report_key(query, response, retrieval)
+        data = self.cache.get(key)
+        if data is not None:
+            return key, data, True
+        data, _ = self.flight.do_sync(key, self._render, key, query, response, retrieval)
+        return key, data, False
+
+    async def arender(self, query: str, response: str, retrieval=()):
+        key = report_key(query, response, retrieval)
+        data = self.cache.get(key)
+        if data is not None:
+            return key, data, True
+        loop = asyncio.get_running_loop()
+
+        async def run():
+            return await loop.run_in_executor(self.executor, self._render, key, query, response, retrieval)
+
+        data, _ = await self.flight.do(key, run)
+        return key, data, False
+
+    # --- Background jobs ---
+    def _drop_old_jobs(self):
+        now = time.time()
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job["status"] in ("done", "failed") and now - job["finished_at"] > self.job_ttl]
+        for job_id in finished:
+            del self._jobs[job_id]
+        for job_id in [job_id for job_id, job in self._jobs.items() if job["status"] in ("done", "failed")]:
+            if len(self._jobs) <= self.max_jobs:
+                break
+            del self._jobs[job_id]
+
+    def submit(self, reports, archive: bool = False) -> dict:
+        """Starts a job for a list of (query, response, retrieval). Must be called on the event loop."""
+        self._drop_old_jobs()
+        statuses = [job["status"] for job in self._jobs.values()]
+        running, queued = statuses.count("running"), statuses.count("queued")
+        if running + queued >= self.max_pending:
+            raise QueueFull(running, queued, self.workers, self.max_pending)
+        job_id = uuid.uuid4().hex
+        job = self._jobs[job_id] = {
+            "job_id": job_id,
+            "status": "queued",
+            "total": len(reports),
+            "done": 0,
+            "cached": 0,
+            "archive": archive,
+            "created_at": time.time(),
+            "finished_at": None,
+            "error": None,
+            "_result": None,
+        }
+        task = asyncio.create_task(self._run_job(job, reports))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return self.public(job)
+
+    async def _run_job(self, job, reports):
+        job["status"] = "running"
+        try:
+            # Distinct contents only (an export full of identical answers renders once), rendered
+            # concurrently, at most one per worker so the batch keeps the whole pool busy
+            keys = [report_key(*r) for r in reports]
+            distinct = dict(zip(keys, reports))
+            copies = Counter(keys)
+            results = {}
+            limit = asyncio.Semaphore(self.workers)
+
+            async def render(key, report):
+                async with limit:
+                    _, results[key], hit = await self.arender(*report)
+                job["cached"] += hit
+                job["done"] += copies[key]
+
+            await asyncio.gather(*(render(key, report) for key, report in distinct.items()))
+            if job["archive"]:
+                job["_result"] = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self._zip, keys, results)
+            else:
+                job["_result"] = results[keys[0]]
+            job["status"] = "done"
+        except Exception as e:
+            job["status"], job["error"] = "failed", str(e)
+        finally:
+            job["finished_at"] = time.time()
+
+    @staticmethod
+    def _zip(keys, results):
+        buffer = io.BytesIO()
+        # PDFs are already deflated: store them as they are
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+            for i, key in enumerate(keys):
+                archive.writestr(f"tanit_report_{i + 1:05d}.pdf", results[key])
+        return buffer.getvalue()
+
+    @staticmethod
+    def public(job):
+        return {k: v for k, v in job.items() if not k.startswith("_")}
+
+    def job(self, job_id: str):
+        job = self._jobs.get(job_id)
+        return self.public(job) if job is not None else None
+
+    def job_result(self, job_id: str):
+        """(bytes, media type, file name) of a finished job, else None."""
+        job = self._jobs.get(job_id)
+        if job is None or job["status"] != "done":
+            return None
+        if job["archive"]:
+            return job["_result"], "application/zip", f"tanit_reports_{job_id[:8]}.zip"
+        return job["_result"], "application/pdf", "tanit_report.pdf"
+
+    def stats(self):
+        statuses = [job["status"] for job in self._jobs.values()]
+        return {
+            **self.cache.stats(),
+            "jobs": {s: statuses.count(s) for s in ("queued", "running", "done", "failed")},
+            "max_pending_jobs": self.max_pending,
+        }
+
+    def close(self):
+        for task in list(self._tasks):
+            task.cancel()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,75 @@
+from dataclasses import asdict, dataclass, field
+
+
+@dataclass
+class SymptomMatch:
+    name: str
+    weight: int = 1
+
+
+@dataclass
+class DiseaseMatch:
+    """One retrieved disease: the typed record every backend returns."""
+    disease: str
+    description: str
+    score: float
+    symptoms: list = field(default_factory=list)
+    precautions: list = field(default_factory=list)
+    # Set by the symptom matcher when fusion is on
+    symptom_score: float = 0.0
+    matched_symptoms: list = field(default_factory=list)
+
+    @classmethod
+    def from_record(cls, record):
+        """Builds a match from a Neo4j record or a LocalVectorIndex dict."""
+        symptoms = []
+        for sym in record["symptoms"]:
+            if isinstance(sym, str):
+                symptoms.append(SymptomMatch(sym))
+            else:
+                symptoms.append(SymptomMatch(sym["name"], int(sym["weight"] if sym["weight"] is not None else 1)))
+        return cls(
+            disease=record["disease"],
+            description=record["description"],
+            score=float(record["score"]),
+            symptoms=symptoms,
+            precautions=list(record["precautions"]),
+        )
+
+    def to_dict(self):
+        return asdict(self)
+
+    def to_compact(self):
+        """What the API returns: everything but the description, scores rounded."""
+        compact = {
+            "disease": self.disease,
+            "score": round(self.score, 4),
+            "symptoms": [{"name": s.name, "weight": s.weight} for s in self.symptoms],
+            "precautions": self.precautions,
+        }
+        if self.matched_symptoms:
+            compact["symptom_score"] = round(self.symptom_score, 4)
+            compact["matched_symptoms"] = self.matched_symptoms
+        return compact
+
+
+def format_results(matches) -> str:
+    """Format the retrieved diseases into plain text for the LLM."""
+    results_text = ""
+    for match in matches:
+        results_text += f"\n### Disease Found: {match.disease} (Similarity: {match.score:.2f})\n"
+        results_text += f"**Description:** {match.description}\n"
+        results_text += f"**Symptoms:** {', '.join(s.name for s in match.symptoms)}\n"
+        if match.matched_symptoms:
+            results_text += f"**Matches the user's symptoms:** {', '.join(match.matched_symptoms)}\n"
+        results_text += f"**Precautions:** {', '.join(match.precautions)}\n"
+        results_text += "-" * 20 + "\n"
+    return results_text
+
+
+def summarize(matches) -> str:
+    """One-line summary of compact match dicts, used in the reasoning log instead of the full tool text."""
+    if not matches:
+        return "No matching diseases found."
+    found = ", ".join(f"{m['disease']} ({m['score']:.2f})" for m in matches)
+    return f"Found {len(matches)} diseases: {found}"
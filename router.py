@@ -0,0 +1,179 @@
+import re
+import threading
+
+import numpy as np
+
+# --- BMI requests: "calculate my BMI, 80 kg 1.8 m" / "bmi for 65kg and 170 cm" ---
+BMI_INTENT = re.compile(r"\b(?:bmi|body\s+mass)\b", re.IGNORECASE)
+WEIGHT_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(?:kg|kgs|kilos?|kilograms?)\b", re.IGNORECASE)
+HEIGHT_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(cm|m|meters?|metres?)\b", re.IGNORECASE)
+
+# --- Questions about one named disease: "what are the precautions for Malaria" ---
+DISEASE_INTENT = re.compile(
+    r"\b(?:precautions?|symptoms?|signs|what\s+is|what's|tell\s+me\s+about)\b"
+    r"(?:\s+(?:for|of|about|against|with))?\s+(?P<subject>[^?!.]+)",
+    re.IGNORECASE,
+)
+
+# Words that may surround a disease name without changing the question
+FILLER_WORDS = {"a", "an", "the", "my", "disease", "illness", "condition", "please", "exactly"}
+
+DISCLAIMER = "⚠️ **Disclaimer:** I am an AI. Please consult a doctor."
+
+BMI_CATEGORIES = [
+    (18.5, "Underweight"),
+    (25.0, "Normal weight"),
+    (30.0, "Overweight"),
+    (float("inf"), "Obesity"),
+]
+
+
+def normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+def name_aliases(name: str):
+    """The full name plus each parenthesised part: 'Dimorphic hemmorhoids(piles)' -> 3 aliases."""
+    aliases = {normalize(name)}
+    for part in re.split(r"[()]", name):
+        if normalize(part):
+            aliases.add(normalize(part))
+    return aliases
+
+
+def parse_bmi(query: str):
+    """(weight_kg, height_m) for a BMI request with both values, else None."""
+    if not BMI_INTENT.search(query):
+        return None
+    weight, height = WEIGHT_PATTERN.search(query), HEIGHT_PATTERN.search(query)
+    if not weight or not height:
+        return None
+    weight_kg = float(weight[1])
+    height_m = float(height[1]) / (100 if height[2].lower() == "cm" else 1)
+    # Anything implausible goes to the agent, which can ask for clarification
+    if not (2 <= weight_kg <= 400 and 0.4 <= height_m <= 2.5):
+        return None
+    return weight_kg, height_m
+
+
+def disease_subject(query: str):
+    """The phrase naming the disease in a disease question, else None."""
+    match = DISEASE_INTENT.search(query)
+    if not match:
+        return None
+    return " ".join(w for w in normalize(match["subject"]).split() if w not in FILLER_WORDS) or None
+
+
+def cache_scope(query: str):
+    """
+    What an answer-cache entry for `query` must share with a lookup, beyond a
+    similar embedding. None: never cache (numbers such as a BMI's weight and
+    height change the answer while barely moving the embedding). The disease
+    subject for a disease question ("hepatitis b" is not "hepatitis c"), and
+    "" for everything else.
+    """
+    if BMI_INTENT.search(query) or re.search(r"\d", query):
+        return None
+    return disease_subject(query) or ""
+
+
+class DiseaseMatcher:
+    """
+    Resolves a phrase to a known Disease name.
+    1. Rule: the phrase is a name (or one of its parenthesised aliases).
+    2. Embedding: cosine similarity between the phrase and every name >= threshold,
+       which catches misspellings and variants ("typhoid fever", "hemorrhoids"),
+       and ahead of the runner-up by at least `margin`.
+    A phrase whose words all belong to several names ("hepatitis" -> Hepatitis
+    B, C, D, E...) is ambiguous and never matched: the agent asks which one.
+    """
+
+    def __init__(self, names, encode, threshold: float = 0.8, margin: float = 0.05):
+        self.names = list(names)
+        self.encode = encode
+        self.threshold = threshold
+        self.margin = margin
+        self._aliases = {}
+        self._words = {}
+        for name in self.names:
+            for alias in name_aliases(name):
+                self._aliases.setdefault(alias, name)
+                for word in alias.split():
+                    self._words.setdefault(word, set()).add(name)
+        self._embeddings = None
+        self._lock = threading.Lock()
+
+    def _name_embeddings(self):
+        if self._embeddings is None:
+            with self._lock:
+                if self._embeddings is None:
+                    vectors = np.asarray(self.encode(self.names), dtype=np.float32)
+                    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+                    self._embeddings = vectors / np.where(norms == 0, 1, norms)
+        return self._embeddings
+
+    def match(self, phrase: str, embed=None):
+        """Returns (name, score, method) or None. `embed` maps one text to a vector."""
+        # Exact only: "best food for diabetes" is a question for the agent, not the Diabetes page
+        if phrase in self._aliases:
+            return self._aliases[phrase], 1.0, "rule"
+
+        if embed is None or not self.names or len(self._names_sharing(phrase)) > 1:
+            return None
+        vector = np.asarray(embed(phrase), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        scores = self._name_embeddings() @ (vector / norm if norm else vector)
+        ranked = np.argsort(scores)[::-1]
+        best = int(ranked[0])
+        if scores[best] < self.threshold:
+            return None
+        if len(ranked) > 1 and scores[best] - scores[ranked[1]] < self.margin:
+            return None
+        return self.names[best], float(scores[best]), "embedding"
+
+    def _names_sharing(self, phrase: str):
+        """Names whose aliases contain every word of the phrase."""
+        words = phrase.split()
+        return set.intersection(*(self._words.get(w, set()) for w in words)) if words else set()
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_matcher(names, encode, threshold: float = 0.8, margin: float = 0.05):
+    """Shared matcher, rebuilt only when the disease names change (re-ingestion)."""
+    global _matcher
+    names = list(names)
+    with _matcher_lock:
+        if _matcher is None or _matcher.names != names or _matcher.encode != encode \
+                or _matcher.threshold != threshold or _matcher.margin != margin:
+            _matcher = DiseaseMatcher(names, encode, threshold, margin)
+        return _matcher
+
+
+# --- Template answers (same layout the Supervisor is asked to produce) ---
+def bmi_answer(weight_kg: float, height_m: float) -> str:
+    bmi = weight_kg / (height_m ** 2)
+    category = next(label for limit, label in BMI_CATEGORIES if bmi < limit)
+    return (
+        f"Your **BMI** is **{bmi:.2f}** ({weight_kg:g} kg, {height_m:.2f} m), "
+        f"which falls in the **{category}** range.\n\n"
+        "**What you can do:**\n"
+        "1. Use BMI as a screening number only: it does not account for muscle mass, age or sex.\n"
+        "2. Combine a balanced diet with regular physical activity.\n"
+        "3. Discuss your result with a doctor if it is outside the normal range (18.5 - 24.9).\n\n"
+        f"{DISCLAIMER}"
+    )
+
+
+def disease_answer(match) -> str:
+    """Renders a DiseaseMatch as a formatted answer."""
+    symptoms = ", ".join(f"**{s.name.replace('_', ' ').strip()}**" for s in match.symptoms)
+    precautions = "\n".join(f"{i}. {p.capitalize()}" for i, p in enumerate(match.precautions, 1))
+    text = f"**{match.disease}**\n\n{match.description}\n\n"
+    if symptoms:
+        text += f"**Common symptoms:** {symptoms}\n\n"
+    if precautions:
+        text += f"**What you can do:**\n{precautions}\n\n"
+    return text + DISCLAIMER
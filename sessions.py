@@ -0,0 +1,156 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class SessionStore:
+    """
+    Conversation sessions backed by a LangGraph checkpointer.
+
+    Each session is a checkpointer thread (thread_id = session_id), so a
+    follow-up question only sends the new message and the graph resumes from
+    the saved state. The graph is compiled with the checkpointer on first use.
+
+    Backends:
+    - "memory": InMemorySaver, lost on restart.
+    - "sqlite": AsyncSqliteSaver on `path` (needs langgraph-checkpoint-sqlite).
+
+    Idle sessions are evicted after `ttl` seconds, and the least recently used
+    ones beyond `max_sessions`; their threads are deleted from the checkpointer.
+    Turns of one session run one at a time.
+
+    A checkpointer keeps every checkpoint of a thread, not just the latest:
+    turns are saved once, at exit, and every `compact_every` turns the thread
+    is rewritten as a single checkpoint of its current (already trimmed) state,
+    so a long conversation does not grow the store.
+    """
+
+    def __init__(self, workflow, backend: str = "memory", path: str = "data/sessions.sqlite",
+                 max_sessions: int = 1000, ttl: float = 3600, compact_every: int = 10,
+                 final_node: str = "supervisor"):
+        self.workflow = workflow
+        self.backend = backend
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.compact_every = compact_every
+        self.final_node = final_node
+        self.checkpointer = None
+        self._app = None
+        self._conn = None
+        self._open_lock = asyncio.Lock()
+        self._sessions = OrderedDict()  # session_id -> {"last_used", "turns", "lock"}
+        self.evictions = 0
+
+    async def _open(self):
+        if self.backend == "sqlite":
+            import aiosqlite
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+            self._conn = await aiosqlite.connect(self.path)
+            saver = AsyncSqliteSaver(self._conn)
+            await saver.setup()
+            # Threads left by a previous process: track them so they expire like the others
+            async with self._conn.execute("SELECT DISTINCT thread_id FROM checkpoints") as cursor:
+                for (thread_id,) in await cursor.fetchall():
+                    self._sessions[thread_id] = {"last_used": time.time(), "turns": 0, "lock": asyncio.Lock()}
+            return saver
+        from langgraph.checkpoint.memory import InMemorySaver
+        return InMemorySaver()
+
+    async def app(self):
+        """The graph compiled with this store's checkpointer (opened on first use)."""
+        if self._app is None:
+            async with self._open_lock:
+                if self._app is None:
+                    self.checkpointer = await self._open()
+                    self._app = self.workflow.compile(checkpointer=self.checkpointer)
+        return self._app
+
+    def _expired(self, now):
+        """Session ids past their TTL, then the least recently used beyond max_sessions."""
+        expired = [sid for sid, s in self._sessions.items()
+                   if now - s["last_used"] > self.ttl and not s["lock"].locked()]
+        overflow = len(self._sessions) - len(expired) - self.max_sessions
+        for sid, s in self._sessions.items():
+            if overflow <= 0:
+                break
+            if sid not in expired and not s["lock"].locked():
+                expired.append(sid)
+                overflow -= 1
+        return expired
+
+    async def _evict(self, session_ids):
+        for sid in session_ids:
+            self._sessions.pop(sid, None)
+            await self.checkpointer.adelete_thread(sid)
+            self.evictions += 1
+
+    async def turn(self, session_id: str):
+        """
+        Starts a turn: returns (app, config, lock). Hold the lock while the
+        graph runs so two requests of one session never interleave.
+        """
+        app = await self.app()
+        now = time.time()
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            session = {"last_used": now, "turns": 0, "lock": asyncio.Lock()}
+        session["last_used"] = now
+        self._sessions[session_id] = session  # most recently used last
+        await self._evict([sid for sid in self._expired(now) if sid != session_id])
+        return app, {"configurable": {"thread_id": session_id}}, session["lock"]
+
+    async def is_new(self, session_id: str) -> bool:
+        """True until the session's first turn has been recorded."""
+        await self.app()
+        return session_id not in self._sessions
+
+    async def seed(self, session_id: str, messages):
+        """
+        Records a turn answered outside the session's graph (e.g. a first
+        question served from the answer cache), so follow-ups see it.
+        """
+        app, config, lock = await self.turn(session_id)
+        async with lock:
+            await app.aupdate_state(config, {"messages": messages}, as_node=self.final_node)
+            await self.finish_turn(session_id, config)
+
+    async def finish_turn(self, session_id: str, config):
+        """
+        Called after a completed turn, under its lock: counts it and compacts the
+        thread every `compact_every` turns. Turns rejected before running (429)
+        never get here, so they do not shift the schedule.
+        """
+        session = self._sessions.get(session_id)
+        if session is None:
+            return
+        session["turns"] += 1
+        if not self.compact_every or session["turns"] % self.compact_every:
+            return
+        snapshot = await self._app.aget_state(config)
+        await self.checkpointer.adelete_thread(session_id)
+        await self._app.aupdate_state(config, snapshot.values, as_node=self.final_node)
+
+    async def end(self, session_id: str) -> bool:
+        """Deletes a session and its history. Returns False if it was unknown."""
+        await self.app()
+        if session_id not in self._sessions:
+            return False
+        self._sessions.pop(session_id)
+        await self.checkpointer.adelete_thread(session_id)
+        return True
+
+    async def close(self):
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+            self._app = None
+
+    def stats(self):
+        return {
+            "backend": self.backend,
+            "active": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "ttl": self.ttl,
+            "evictions": self.evictions,
+        }
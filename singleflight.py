@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import telemetry
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller (the
+    leader) runs the computation, callers arriving while it is in flight wait
+    for it and all receive its result, or its exception. Nothing is cached:
+    once the call finishes, the next one with that key runs again.
+
+    `do()` is for coroutines, `do_sync()` for threads; the two do not share
+    flights. The async computation runs as its own task, so a leader whose
+    request is cancelled does not cancel the followers' result.
+
+    Per-key counts (leaders, shared) are kept for the `max_keys` most
+    recently seen keys.
+    """
+
+    def __init__(self, name: str, max_keys: int = 256):
+        self.name = name
+        self.max_keys = max_keys
+        self.leaders = 0
+        self.shared = 0
+        self._tasks = {}
+        self._futures = {}
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _count(self, key, outcome):
+        with self._lock:
+            if outcome == "leader":
+                self.leaders += 1
+            else:
+                self.shared += 1
+            stats = self._keys.pop(key, None) or {"leader": 0, "shared": 0}
+            stats[outcome] += 1
+            stats["last_seen"] = time.time()
+            self._keys[key] = stats
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+        if telemetry.TELEMETRY_ENABLED:
+            telemetry.SINGLEFLIGHT_CALLS.inc(flight=self.name, outcome=outcome)
+
+    async def do(self, key, func, *args):
+        """Returns (result, shared): `await func(*args)`, or the result of the identical call in flight."""
+        task = self._tasks.get(key)
+        shared = task is not None
+        if shared:
+            self._count(key, "shared")
+        else:
+            self._count(key, "leader")
+            task = asyncio.ensure_future(func(*args))
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task), shared
+
+    def _done(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # marks it retrieved even if every waiter went away
+
+    def do_sync(self, key, func, *args):
+        """Thread version of do(): returns (result, shared)."""
+        with self._lock:
+            future = self._futures.get(key)
+            shared = future is not None
+            if not shared:
+                future = self._futures[key] = Future()
+        self._count(key, "shared" if shared else "leader")
+        if shared:
+            return future.result(), True
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._futures[key]
+        return future.result(), False
+
+    def in_flight(self):
+        return len(self._tasks) + len(self._futures)
+
+    def stats(self, top: int = 10):
+        with self._lock:
+            keys = sorted(self._keys.items(), key=lambda item: -item[1]["shared"])[:top]
+        calls = self.leaders + self.shared
+        return {
+            "leaders": self.leaders,
+            "shared": self.shared,
+            "shared_rate": round(self.shared / calls, 4) if calls else 0.0,
+            "in_flight": self.in_flight(),
+            "top_keys": [{"key": str(k), "leader": s["leader"], "shared": s["shared"]} for k, s in keys],
+        }
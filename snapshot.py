@@ -0,0 +1,238 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+# Bump when the array layout changes; older snapshots are then rejected, not misread
+SNAPSHOT_VERSION = 2
+DATA_FILE = os.path.join("data", "medical_graph_data.json")
+SNAPSHOT_FILE = os.path.join("data", "knowledge_snapshot.npz")
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+EMBED_BATCH_SIZE = 64
+
+
+def embeddings_path(path):
+    """The embedding matrix lives next to the .npz as a plain .npy, so it can be memory-mapped."""
+    return os.path.splitext(path)[0] + ".embeddings.npy"
+
+
+def source_hash(data):
+    """Fingerprint of the JSON entries a snapshot was built from."""
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def pack_strings(strings):
+    """UTF-8 blob + offsets: one contiguous buffer instead of a padded unicode array."""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def unpack_strings(blob, offsets):
+    raw = blob.tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+
+def _csr(rows, vocabulary):
+    """Rows of names -> (indptr, indices) into `vocabulary` (ids assigned in first-seen order)."""
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indices = []
+    for i, row in enumerate(rows):
+        indices.extend(vocabulary.setdefault(name, len(vocabulary)) for name in row)
+        indptr[i + 1] = len(indices)
+    return indptr, np.array(indices, dtype=np.int32)
+
+
+def embeddings_hash(embeddings):
+    """Fingerprint of an embedding matrix (shape + float32 bytes), stored in the .npz it belongs to."""
+    digest = hashlib.sha256(str(tuple(embeddings.shape)).encode("utf-8"))
+    digest.update(np.ascontiguousarray(embeddings, dtype=np.float32).data)
+    return digest.hexdigest()
+
+
+def _write_tmp(path, save):
+    """Writes and fsyncs `path`.<pid>.tmp; the caller os.replace()s it into place."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        save(f)
+        f.flush()
+        os.fsync(f.fileno())
+    return tmp
+
+
+class Snapshot:
+    """
+    Versioned binary form of medical_graph_data.json plus the description
+    embeddings, written by the ETL and loaded without any parsing or model:
+
+    - `<name>.npz`: columnar tables. Disease/symptom/precaution names and
+      descriptions as UTF-8 blobs + offsets; HAS_SYMPTOM as CSR
+      (symptom_indptr, symptom_indices, symptom_weights); NEEDS_PRECAUTION
+      as CSR (precaution_indptr, precaution_indices); metadata (format
+      version, embedding model, source hash, embeddings hash).
+    - `<name>.embeddings.npy`: (n_diseases, dim) float32, L2-normalized,
+      opened with mmap so every API worker shares the same page-cache pages.
+
+    Both files are written to temp paths first and swapped in with the .npz
+    last; the embeddings hash in the .npz ties it to its .npy, so a reader
+    never pairs a table with another build's matrix.
+    """
+
+    def __init__(self, arrays, embeddings, path=None):
+        self.path = path
+        self.version = int(arrays["format_version"])
+        self.embedding_model = str(arrays["embedding_model"])
+        self.source_hash = str(arrays["source_hash"])
+        self.created_at = float(arrays["created_at"])
+        self.diseases = unpack_strings(arrays["disease_blob"], arrays["disease_offsets"])
+        self.descriptions = unpack_strings(arrays["description_blob"], arrays["description_offsets"])
+        self.symptom_names = unpack_strings(arrays["symptom_blob"], arrays["symptom_offsets"])
+        self.precaution_names = unpack_strings(arrays["precaution_blob"], arrays["precaution_offsets"])
+        self.symptom_indptr = arrays["symptom_indptr"]
+        self.symptom_indices = arrays["symptom_indices"]
+        self.symptom_weights = arrays["symptom_weights"]
+        self.precaution_indptr = arrays["precaution_indptr"]
+        self.precaution_indices = arrays["precaution_indices"]
+        self.embeddings = embeddings
+        self._positions = {name: i for i, name in enumerate(self.diseases)}
+
+    def __len__(self):
+        return len(self.diseases)
+
+    @property
+    def dim(self):
+        return self.embeddings.shape[1]
+
+    # --- Loading ---
+    @classmethod
+    def load(cls, path=SNAPSHOT_FILE, mmap=True, retries=1):
+        """
+        Opens a snapshot; the embedding matrix is memory-mapped unless `mmap=False`.
+        A matrix that doesn't match the .npz's hash is read again `retries` times
+        (a writer may be between its two renames) before giving up.
+        """
+        for attempt in range(retries + 1):
+            with np.load(path, allow_pickle=False) as npz:
+                arrays = {key: npz[key] for key in npz.files}
+            if int(arrays["format_version"]) != SNAPSHOT_VERSION:
+                raise ValueError(f"❌ Error: snapshot format {int(arrays['format_version'])}, "
+                                 f"expected {SNAPSHOT_VERSION}. Rebuild it with `python snapshot.py`.")
+            embeddings = np.load(embeddings_path(path), mmap_mode="r" if mmap else None, allow_pickle=False)
+            if embeddings_hash(embeddings) == str(arrays["embeddings_hash"]):
+                return cls(arrays, embeddings, path)
+            if attempt < retries:
+                time.sleep(0.1)
+        raise ValueError("❌ Error: snapshot embeddings do not match its tables (partial or concurrent write?). "
+                         "Rebuild it with `python snapshot.py`.")
+
+    # --- Rows ---
+    def symptoms(self, i):
+        """HAS_SYMPTOM of disease `i` as {"name", "weight"} dicts, in source order."""
+        start, end = self.symptom_indptr[i], self.symptom_indptr[i + 1]
+        return [{"name": self.symptom_names[j], "weight": int(w)}
+                for j, w in zip(self.symptom_indices[start:end], self.symptom_weights[start:end])]
+
+    def precautions(self, i):
+        start, end = self.precaution_indptr[i], self.precaution_indptr[i + 1]
+        return [self.precaution_names[j] for j in self.precaution_indices[start:end]]
+
+    def entries(self):
+        """The diseases shaped like medical_graph_data.json entries."""
+        return [{
+            "name": name,
+            "description": self.descriptions[i],
+            "symptoms": self.symptoms(i),
+            "precautions": self.precautions(i),
+        } for i, name in enumerate(self.diseases)]
+
+    def embedding(self, disease):
+        i = self._positions.get(disease)
+        return None if i is None else self.embeddings[i]
+
+    def is_current(self, data):
+        """True when this snapshot was built from exactly these JSON entries."""
+        return self.source_hash == source_hash(data)
+
+
+def write_snapshot(data, embeddings, path=SNAPSHOT_FILE, embedding_model=EMBEDDING_MODEL):
+    """Writes the snapshot for JSON entries `data` and their (n, dim) description embeddings."""
+    embeddings = np.asarray(embeddings, dtype=np.float32).reshape(len(data), -1)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    embeddings = np.ascontiguousarray(embeddings / np.where(norms == 0, 1, norms))
+
+    symptoms, precautions = {}, {}
+    symptom_indptr, symptom_indices = _csr([[s["name"] for s in d["symptoms"]] for d in data], symptoms)
+    precaution_indptr, precaution_indices = _csr([d["precautions"] for d in data], precautions)
+    arrays = {
+        "format_version": np.int32(SNAPSHOT_VERSION),
+        "embedding_model": np.str_(embedding_model),
+        "source_hash": np.str_(source_hash(data)),
+        "embeddings_hash": np.str_(embeddings_hash(embeddings)),
+        "created_at": np.float64(time.time()),
+        "symptom_indptr": symptom_indptr,
+        "symptom_indices": symptom_indices,
+        "symptom_weights": np.array([s["weight"] for d in data for s in d["symptoms"]], dtype=np.int16),
+        "precaution_indptr": precaution_indptr,
+        "precaution_indices": precaution_indices,
+    }
+    for name, strings in (("disease", [d["name"] for d in data]), ("description", [d["description"] for d in data]),
+                          ("symptom", list(symptoms)), ("precaution", list(precautions))):
+        arrays[f"{name}_blob"], arrays[f"{name}_offsets"] = pack_strings(strings)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Both files are complete on disk before either is swapped in, the .npz (with the hash) last
+    tmp_files = []
+    try:
+        tmp_files.append(_write_tmp(embeddings_path(path), lambda f: np.save(f, embeddings)))
+        tmp_files.append(_write_tmp(path, lambda f: np.savez(f, **arrays)))
+        os.replace(tmp_files[0], embeddings_path(path))
+        os.replace(tmp_files[1], path)
+    finally:
+        for tmp in tmp_files:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+def build_snapshot(data_file=DATA_FILE, path=SNAPSHOT_FILE, batch_size=EMBED_BATCH_SIZE):
+    """
+    medical_graph_data.json -> snapshot. Embeddings of descriptions that did not
+    change are taken from the previous snapshot, so only new text hits the model.
+    """
+    with open(data_file, "r") as f:
+        data = json.load(f)
+
+    previous = {}
+    if os.path.exists(path):
+        try:
+            old = Snapshot.load(path)
+            if old.embedding_model == EMBEDDING_MODEL:
+                previous = {text: old.embeddings[i] for i, text in enumerate(old.descriptions)}
+        except (ValueError, OSError, KeyError) as e:
+            print(f"⚠️ Previous snapshot ignored: {e}")
+
+    missing = list(dict.fromkeys(d["description"] for d in data if d["description"] not in previous))
+    if missing:
+        from sentence_transformers import SentenceTransformer
+        print(f"⏳ Embedding {len(missing)} descriptions with {EMBEDDING_MODEL}...")
+        model = SentenceTransformer(EMBEDDING_MODEL)
+        computed = model.encode(missing, batch_size=batch_size)
+        previous.update(zip(missing, computed))
+    print(f"♻️ Reused {len(data) - sum(d['description'] in missing for d in data)} of {len(data)} embeddings.")
+
+    write_snapshot(data, [previous[d["description"]] for d in data], path)
+    size = os.path.getsize(path) + os.path.getsize(embeddings_path(path))
+    print(f"📦 Snapshot written to '{path}' (+ embeddings): {len(data)} diseases, {size / 1024:.0f} KB.")
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the binary knowledge snapshot from medical_graph_data.json.")
+    parser.add_argument("--data", default=DATA_FILE)
+    parser.add_argument("--output", default=SNAPSHOT_FILE)
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE, help="descriptions per model.encode call")
+    args = parser.parse_args()
+    build_snapshot(args.data, args.output, args.batch_size)
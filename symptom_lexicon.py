@@ -0,0 +1,195 @@
+import csv
+import re
+from bisect import bisect_left
+from functools import lru_cache
+
+STOPWORDS = {"a", "an", "the", "of", "and", "in", "on", "to", "from", "over", "during", "around",
+             "like", "for", "with", "my", "i", "me", "have", "has", "am", "is", "are", "some", "very"}
+
+# Lay phrasing -> canonical symptom (names as stored on the Symptom nodes)
+SYMPTOM_SYNONYMS = {
+    "fever": "high_fever",
+    "temperature": "high_fever",
+    "rash": "skin_rash",
+    "itchy": "itching",
+    "diarrhea": "diarrhoea",
+    "tired": "fatigue",
+    "tiredness": "fatigue",
+    "short of breath": "breathlessness",
+    "shortness of breath": "breathlessness",
+    "sneezing": "continuous_sneezing",
+    "vomit": "vomiting",
+    "throwing up": "vomiting",
+    "stomach ache": "stomach_pain",
+    "yellow eyes": "yellowing_of_eyes",
+    "yellow skin": "yellowish_skin",
+    "dizzy": "dizziness",
+    "sweat": "sweating",
+    "pee often": "polyuria",
+    "frequent urination": "polyuria",
+    "thirst": "dehydration",
+}
+
+
+def stem(token: str) -> str:
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith(("ches", "shes", "xes", "sses")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def words(text: str):
+    """Lowercase words of `text`; underscores, spaces and punctuation all separate words."""
+    return re.findall(r"[a-z]+", text.lower())
+
+
+def tokenize(text: str):
+    return [stem(t) for t in words(text) if t not in STOPWORDS]
+
+
+def phrase_key(text: str) -> str:
+    """Spelling-insensitive key: "Dischromic _Patches" and "dischromic patch" share one."""
+    return "_".join(stem(t) for t in words(text))
+
+
+def trigrams(key: str):
+    padded = f" {key.replace('_', ' ')} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SymptomLexicon:
+    """
+    Free text -> canonical symptom names (Symptom-severity.csv / Symptom nodes).
+
+    1. Exact: every name and synonym under its phrase_key, one dict lookup,
+       then the same key without word breaks ("foul_smell_of urine" and
+       "foul_smell_ofurine" share "foulsmellofurine").
+    2. Fuzzy: a trigram index over the same keys. Candidates with the same
+       number of words sharing a trigram are counted, and the best is
+       accepted at Dice similarity >= `threshold` (typos, missing letters).
+       A one-word window never matches part of a longer name ("pressure"
+       is not "sinus_pressure").
+    3. Prefix: the keys sorted, for completion of partial input.
+
+    Lookups are memoized, so a repeated phrase costs one cache hit.
+    """
+
+    def __init__(self, names, synonyms=None, threshold: float = 0.75, min_fuzzy_chars: int = 5,
+                 cache_size: int = 65536):
+        self.names = list(dict.fromkeys(name.strip() for name in names if name and name.strip()))
+        self.threshold = threshold
+        self.min_fuzzy_chars = min_fuzzy_chars
+        self._exact = {}
+        for name in self.names:
+            self._exact.setdefault(phrase_key(name), name)
+        known = set(self.names)
+        for phrase, target in (SYMPTOM_SYNONYMS if synonyms is None else synonyms).items():
+            if target in known:
+                self._exact.setdefault(phrase_key(phrase), target)
+
+        self._joined = {}
+        for key, name in self._exact.items():
+            self._joined.setdefault(key.replace("_", ""), name)
+
+        self._keys = list(self._exact)
+        self._lengths = [key.count("_") + 1 for key in self._keys]
+        self._sizes = []
+        self._grams = {}
+        for i, key in enumerate(self._keys):
+            grams = trigrams(key)
+            self._sizes.append(len(grams))
+            for gram in grams:
+                self._grams.setdefault(gram, []).append(i)
+        self._sorted = sorted(self._keys)
+        self.max_words = max(self._lengths, default=1)
+        self.resolve_key = lru_cache(maxsize=cache_size)(self._resolve_key)
+        self._extract_cached = lru_cache(maxsize=cache_size)(self._extract)
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_csv(cls, path, column="Symptom", **kwargs):
+        """From a CSV with one symptom per row (Symptom-severity.csv)."""
+        with open(path, newline="") as f:
+            return cls([row[column] for row in csv.DictReader(f) if row.get(column)], **kwargs)
+
+    # --- Lookups ---
+    def _fuzzy(self, key):
+        grams = trigrams(key)
+        length = key.count("_") + 1
+        counts = {}
+        for gram in grams:
+            for i in self._grams.get(gram, ()):
+                if self._lengths[i] == length:
+                    counts[i] = counts.get(i, 0) + 1
+        best, best_score = None, self.threshold
+        for i, common in counts.items():
+            score = 2 * common / (len(grams) + self._sizes[i])
+            if score >= best_score:
+                best, best_score = i, score
+        return self._exact[self._keys[best]] if best is not None else None
+
+    def _resolve_key(self, key, fuzzy=True):
+        name = self._exact.get(key) or self._joined.get(key.replace("_", ""))
+        if name is None and fuzzy and len(key) >= self.min_fuzzy_chars:
+            name = self._fuzzy(key)
+        return name
+
+    def resolve(self, text: str, fuzzy: bool = True):
+        """Canonical name for a whole phrase ("spotting_ urination"), else None."""
+        return self.resolve_key(phrase_key(text), fuzzy)
+
+    def extract(self, text: str, fuzzy: bool = True):
+        """
+        Canonical symptoms mentioned in free text, in order of appearance.
+        At each word, windows are tried longest first ("stomach pain" wins
+        over "pain"), exact matches before fuzzy ones, so a typo match never
+        swallows the words of an exact one. Windows starting or ending with
+        a stopword are skipped.
+        """
+        return list(self._extract_cached(text, fuzzy))
+
+    def _extract(self, text, fuzzy):
+        raw = words(text)
+        stems = [stem(w) for w in raw]
+        found, i = [], 0
+        while i < len(raw):
+            if raw[i] in STOPWORDS:
+                i += 1
+                continue
+            windows = [(n, "_".join(stems[i:i + n])) for n in range(min(self.max_words, len(raw) - i), 0, -1)
+                       if raw[i + n - 1] not in STOPWORDS]
+            match = next(((n, name) for n, name in ((n, self.resolve_key(key, False)) for n, key in windows)
+                          if name is not None), None)
+            if match is None and fuzzy:
+                match = next(((n, name) for n, name in ((n, self.resolve_key(key)) for n, key in windows)
+                              if name is not None), None)
+            if match is None:
+                i += 1
+                continue
+            n, name = match
+            if name not in found:
+                found.append(name)
+            i += n
+        return tuple(found)
+
+    def complete(self, prefix: str, limit: int = 10):
+        """Canonical names whose key starts with `prefix` (autocomplete)."""
+        key = phrase_key(prefix)
+        results = []
+        for k in self._sorted[bisect_left(self._sorted, key):]:
+            if not k.startswith(key) or len(results) >= limit:
+                break
+            name = self._exact[k]
+            if name not in results:
+                results.append(name)
+        return results
+
+    def stats(self):
+        info = self.resolve_key.cache_info()
+        return {"names": len(self.names), "keys": len(self._keys), "trigrams": len(self._grams),
+                "cache_hits": info.hits, "cache_misses": info.misses}
@@ -0,0 +1,164 @@
+import numpy as np
+from scipy import sparse
+
+from symptom_lexicon import SYMPTOM_SYNONYMS, SymptomLexicon, tokenize
+
+
+class SymptomIndex:
+    """
+    Symptom-based disease scorer built from the HAS_SYMPTOM weights.
+
+    - `matrix`: sparse disease x symptom matrix of severity weights (CSR).
+    - `postings`: the same matrix in CSC form, i.e. the inverted index
+      symptom -> diseases, used to score only the columns a query touches.
+    - Extraction: a symptom (or synonym) matches when all of its tokens are
+      in the query, computed for many queries with one sparse product, plus
+      whatever the SymptomLexicon resolves (misspellings like "vomitting").
+
+    Scores are the cosine between the query's symptom indicator vector and
+    each disease's weight row, so severe symptoms count more.
+    """
+
+    def __init__(self, diseases, symptoms, synonyms=None):
+        self.diseases = list(diseases)
+        columns = {}
+        rows, cols, weights = [], [], []
+        for i, disease_symptoms in enumerate(symptoms):
+            for sym in disease_symptoms:
+                name, weight = (sym["name"], sym.get("weight")) if isinstance(sym, dict) else (sym, None)
+                rows.append(i)
+                cols.append(columns.setdefault(name, len(columns)))
+                weights.append(float(weight or 1))
+        self.symptoms = list(columns)
+        self.columns = columns
+        self.matrix = sparse.csr_matrix((weights, (rows, cols)), shape=(len(self.diseases), len(self.symptoms)),
+                                        dtype=np.float32)
+        self.matrix.sum_duplicates()
+        self.postings = self.matrix.tocsc()
+        self.row_norms = np.sqrt(np.asarray(self.matrix.multiply(self.matrix).sum(axis=1)).ravel())
+
+        # Phrases = canonical names + synonyms; phrase_map folds them back onto symptom columns
+        phrases = [(name, j) for name, j in columns.items()]
+        phrases += [(phrase, columns[target]) for phrase, target in (synonyms or SYMPTOM_SYNONYMS).items()
+                    if target in columns]
+        self.vocab = {}
+        t_rows, t_cols = [], []
+        for p, (phrase, _) in enumerate(phrases):
+            for token in set(tokenize(phrase)):
+                t_rows.append(self.vocab.setdefault(token, len(self.vocab)))
+                t_cols.append(p)
+        self.token_matrix = sparse.csr_matrix((np.ones(len(t_rows), dtype=np.float32), (t_rows, t_cols)),
+                                              shape=(len(self.vocab), len(phrases)))
+        self.required = np.asarray(self.token_matrix.sum(axis=0)).ravel()
+        self.phrase_map = sparse.csr_matrix(
+            (np.ones(len(phrases), dtype=np.float32), (np.arange(len(phrases)), [j for _, j in phrases])),
+            shape=(len(phrases), len(self.symptoms)),
+        )
+        self.lexicon = SymptomLexicon(self.symptoms, synonyms)
+
+    def __len__(self):
+        return len(self.diseases)
+
+    @classmethod
+    def from_records(cls, records):
+        """Rows shaped like {"disease", "symptoms": [{"name", "weight"}]}."""
+        records = list(records)
+        return cls([r["disease"] for r in records], [r["symptoms"] for r in records])
+
+    # --- Extraction ---
+    def query_matrix(self, texts):
+        """Sparse (n_queries, n_symptoms) 0/1 matrix of the canonical symptoms found in each text."""
+        rows, cols = [], []
+        for i, text in enumerate(texts):
+            for token in set(tokenize(text)):
+                j = self.vocab.get(token)
+                if j is not None:
+                    rows.append(i)
+                    cols.append(j)
+        tokens = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)),
+                                   shape=(len(texts), len(self.vocab)))
+        hits = (tokens @ self.token_matrix).tocsr()
+        hits.data = (hits.data >= self.required[hits.indices]).astype(np.float32)
+        hits.eliminate_zeros()
+        found = hits @ self.phrase_map
+
+        # Fuzzy matches from the lexicon (exact phrases are already in `found`)
+        rows, cols = [], []
+        for i, text in enumerate(texts):
+            for name in self.lexicon.extract(text):
+                rows.append(i)
+                cols.append(self.columns[name])
+        if rows:
+            found = found + sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)),
+                                              shape=found.shape)
+        found = found.tocsr()
+        found.data[:] = 1
+        return found
+
+    def extract(self, text):
+        """Canonical symptom names mentioned in `text`."""
+        return [self.symptoms[j] for j in sorted(self.query_matrix([text]).indices)]
+
+    # --- Scoring ---
+    def score_batch(self, texts):
+        """(scores (n_queries, n_diseases), query matrix): weighted-overlap cosine for every text at once."""
+        queries = self.query_matrix(texts)
+        overlap = (queries @ self.postings.T).toarray()
+        query_norms = np.sqrt(np.asarray(queries.sum(axis=1)).ravel())
+        denominator = np.outer(np.where(query_norms == 0, 1, query_norms), np.where(self.row_norms == 0, 1, self.row_norms))
+        return overlap / denominator, queries
+
+    def matched(self, disease_row, query_row):
+        """Names of the query's symptoms that disease `disease_row` has."""
+        have = set(self.matrix.indices[self.matrix.indptr[disease_row]:self.matrix.indptr[disease_row + 1]])
+        return [self.symptoms[j] for j in query_row.indices if j in have]
+
+    def top(self, text, k=3):
+        """[(disease, score)] ranked by symptom overlap alone."""
+        scores = self.score_batch([text])[0][0]
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [(self.diseases[i], float(scores[i])) for i in order if scores[i] > 0]
+
+
+def reciprocal_rank_fusion(rankings, k: int = 60):
+    """{key: sum over rankings of 1 / (k + rank)}; keys missing from a ranking get nothing from it."""
+    fused = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, 1):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+    return fused
+
+
+def fuse(index, user_queries, vector_results, k: int = 3, candidates: int = 10, rrf_k: int = 60):
+    """
+    Fuses vector and symptom rankings for a batch of queries.
+    Returns one plan per query: a list of {"disease", "symptom_score", "matched_symptoms",
+    "record"} in fused order, where "record" is None for a disease that only the
+    symptom ranking found (the caller fetches it).
+    """
+    scores, queries = index.score_batch(user_queries)
+    positions = {name: i for i, name in enumerate(index.diseases)}
+    plans = []
+    for q, records in enumerate(vector_results):
+        by_name = {r["disease"]: r for r in records}
+        vector_ranking = list(by_name)
+        order = np.argsort(-scores[q], kind="stable")[:candidates]
+        symptom_ranking = [index.diseases[i] for i in order if scores[q, i] > 0]
+
+        if symptom_ranking:
+            fused = reciprocal_rank_fusion([vector_ranking, symptom_ranking], rrf_k)
+            ranked = sorted(fused, key=lambda name: -fused[name])[:k]
+        else:
+            ranked = vector_ranking[:k]
+
+        plan = []
+        for name in ranked:
+            row = positions.get(name)
+            plan.append({
+                "disease": name,
+                "symptom_score": float(scores[q, row]) if row is not None else 0.0,
+                "matched_symptoms": index.matched(row, queries[q]) if row is not None else [],
+                "record": by_name.get(name),
+            })
+        plans.append(plan)
+    return plans
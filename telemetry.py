@@ -0,0 +1,270 @@
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Switched off: timed() returns a shared no-op and no callback is attached,
+# unless a request asked for its own timing breakdown (debug header).
+TELEMETRY_ENABLED = os.getenv("TELEMETRY_ENABLED", "true").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192)
+
+_NULL = nullcontext()
+_trace = contextvars.ContextVar("request_trace", default=None)
+
+
+def _label_value(value):
+    """Escapes a label value as the text exposition format requires: backslash, double quote, newline."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels):
+    return ",".join(f'{k}="{_label_value(v)}"' for k, v in labels)
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram, one series per label set."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                base = _label_text(key)
+                sep = "," if base else ""
+                cumulative = 0
+                for bound, count in zip(self.buckets, series["counts"]):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {cumulative}')
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {series["count"]}')
+                lines.append(f"{self.name}_sum{{{base}}} {series['sum']}")
+                lines.append(f"{self.name}_count{{{base}}} {series['count']}")
+        return "\n".join(lines)
+
+
+class Counter:
+    """Prometheus-style monotonic counter, one series per label set."""
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._series.items()):
+                lines.append(f"{self.name}{{{_label_text(key)}}} {value}")
+        return "\n".join(lines)
+
+
+# --- Metrics ---
+STAGE_DURATION = Histogram("tanit_stage_duration_seconds",
+                           "Duration of pipeline stages (node, tool, llm, embedding, db).", LATENCY_BUCKETS)
+PAYLOAD_BYTES = Histogram("tanit_payload_bytes", "Size of tool outputs and API responses.", SIZE_BUCKETS)
+LLM_TOKENS = Histogram("tanit_llm_tokens", "Tokens per LLM call, by graph node and kind.", TOKEN_BUCKETS)
+LLM_TOKENS_TOTAL = Counter("tanit_llm_tokens_total", "Tokens used, by graph node and kind.")
+HTTP_DURATION = Histogram("tanit_http_request_duration_seconds", "HTTP request duration.", LATENCY_BUCKETS)
+CONTEXT_TOKENS = Histogram("tanit_context_tokens",
+                           "Estimated tokens of the retrieval context for the LLM, full vs. compacted.", TOKEN_BUCKETS)
+SINGLEFLIGHT_CALLS = Counter("tanit_singleflight_calls_total",
+                             "Calls through a single-flight group: ran it (leader) or shared an in-flight result.")
+METRICS = [STAGE_DURATION, PAYLOAD_BYTES, LLM_TOKENS, LLM_TOKENS_TOTAL, HTTP_DURATION, CONTEXT_TOKENS,
+           SINGLEFLIGHT_CALLS]
+
+
+def active():
+    return TELEMETRY_ENABLED or _trace.get() is not None
+
+
+def record(stage, seconds, **labels):
+    """Adds one stage duration to the histogram and to the current request's breakdown."""
+    if TELEMETRY_ENABLED:
+        STAGE_DURATION.observe(seconds, stage=stage, **labels)
+    trace = _trace.get()
+    if trace is not None:
+        trace.append({"stage": stage, **labels, "ms": round(seconds * 1000, 2)})
+
+
+def record_size(kind, size):
+    if TELEMETRY_ENABLED:
+        PAYLOAD_BYTES.observe(size, kind=kind)
+
+
+def record_context_tokens(full, compact):
+    """Context compaction savings: to the histogram and, as "context" tokens, to the request's breakdown."""
+    if TELEMETRY_ENABLED:
+        CONTEXT_TOKENS.observe(full, kind="full")
+        CONTEXT_TOKENS.observe(compact, kind="compact")
+    trace = _trace.get()
+    if trace is not None:
+        trace.append({"stage": "tokens", "name": "context", "kind": "full", "count": full})
+        trace.append({"stage": "tokens", "name": "context", "kind": "compact", "count": compact})
+
+
+@contextmanager
+def _timed(stage, labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start, **labels)
+
+
+def timed(stage, **labels):
+    """`with telemetry.timed("db", name=...):` — a shared no-op when telemetry is off."""
+    if not TELEMETRY_ENABLED and _trace.get() is None:
+        return _NULL
+    return _timed(stage, labels)
+
+
+def query_label(query: str) -> str:
+    """Short, stable label for a Cypher constant: its first clause line."""
+    for line in query.strip().splitlines():
+        if line.strip():
+            return " ".join(line.split())[:60]
+    return ""
+
+
+@contextmanager
+def request_trace():
+    """Collects every stage recorded while the block runs (for the debug timing breakdown)."""
+    trace = []
+    token = _trace.set(trace)
+    start = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+        trace.insert(0, {"stage": "total", "ms": round((time.perf_counter() - start) * 1000, 2)})
+
+
+def summarize_trace(trace):
+    """
+    {"total_ms", "by_stage": {stage: ms}, "tokens": {node: {kind: n}}, "stages": [...]}.
+    Stages nest: a node's time includes the llm/tool/db calls made inside it.
+    """
+    by_stage, tokens, stages = {}, {}, []
+    for entry in trace[1:]:
+        if entry["stage"] == "tokens":
+            node = tokens.setdefault(entry["name"], {})
+            node[entry["kind"]] = node.get(entry["kind"], 0) + entry["count"]
+            continue
+        by_stage[entry["stage"]] = round(by_stage.get(entry["stage"], 0) + entry["ms"], 2)
+        stages.append(entry)
+    return {"total_ms": trace[0]["ms"] if trace else None, "by_stage": by_stage, "tokens": tokens, "stages": stages}
+
+
+def render():
+    return "\n".join(metric.render() for metric in METRICS) + "\n"
+
+
+class TelemetryCallback(BaseCallbackHandler):
+    """LangChain callback timing graph nodes, tools and LLM calls, and counting LLM tokens."""
+
+    run_inline = True
+
+    def __init__(self):
+        self._open = {}
+
+    # --- Graph nodes ---
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node is not None and kwargs.get("name") == node:
+            self._open[run_id] = ("node", {"name": node}, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._close(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._close(run_id)
+
+    # --- Tools ---
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name", "tool")
+        record_size("tool_input", len(str(input_str).encode()))
+        self._open[run_id] = ("tool", {"name": name}, time.perf_counter())
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        record_size("tool_output", len(str(getattr(output, "content", output)).encode()))
+        self._close(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._close(run_id)
+
+    # --- LLM calls ---
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node", "unknown")
+        self._open[run_id] = ("llm", {"name": node}, time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        opened = self._open.get(run_id)
+        node = opened[1]["name"] if opened else "unknown"
+        for kind, count in _token_usage(response).items():
+            if TELEMETRY_ENABLED:
+                LLM_TOKENS.observe(count, node=node, kind=kind)
+                LLM_TOKENS_TOTAL.inc(count, node=node, kind=kind)
+            trace = _trace.get()
+            if trace is not None:
+                trace.append({"stage": "tokens", "name": node, "kind": kind, "count": count})
+        self._close(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._close(run_id)
+
+    def _close(self, run_id):
+        opened = self._open.pop(run_id, None)
+        if opened is not None:
+            stage, labels, start = opened
+            record(stage, time.perf_counter() - start, **labels)
+
+
+def _token_usage(response):
+    """{"prompt": n, "completion": n} from Groq's llm_output or the message usage_metadata."""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return {"prompt": usage.get("prompt_tokens", 0), "completion": usage.get("completion_tokens", 0)}
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                return {"prompt": metadata.get("input_tokens", 0), "completion": metadata.get("output_tokens", 0)}
+    return {}
+
+
+_callback = TelemetryCallback()
+
+
+def callbacks():
+    """Callbacks to pass in a graph run's config: none at all when telemetry is off."""
+    return [_callback] if active() else []
@@ -1,35 +1,127 @@
 import streamlit as st
 import requests
-import re
+import json
+import os
+import uuid
 import pandas as pd
 import altair as alt
-from fpdf import FPDF
-
-# --- Helper: PDF Generator ---
-def create_pdf(user_input, response_text):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-    
-    # Header
-    pdf.set_font("Arial", 'B', 16)
-    pdf.cell(200, 10, txt="Tanit Health AI - Clinical Report", ln=1, align='C')
-    
-    # User Query
-    pdf.set_font("Arial", size=12)
-    pdf.cell(200, 10, txt=f"Subject: {user_input}", ln=1, align='L')
-    pdf.ln(10)
-    
-    # Body 
-    clean_text = response_text.replace("*", "").encode('latin-1', 'replace').decode('latin-1')
-    pdf.multi_cell(0, 10, txt=clean_text)
-    
-    # Footer
-    pdf.ln(20)
-    pdf.set_font("Arial", 'I', 10)
-    pdf.cell(0, 10, txt="Generated by AI Agent. Consult a Doctor.", ln=1, align='C')
-    
-    return pdf.output(dest='S').encode('latin-1', 'replace')
+import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# --- Helper: API client (one pooled keep-alive session per server process) ---
+API_URL = os.getenv("API_URL", "http://localhost:8000")
+# (connect, read) seconds; the read timeout is the longest silence allowed between stream events
+API_TIMEOUT = (float(os.getenv("API_CONNECT_TIMEOUT", "3.05")), float(os.getenv("API_READ_TIMEOUT", "120")))
+
+@st.cache_resource
+def api_session():
+    """Shared across reruns and browser sessions: connections are reused instead of reopened per prompt."""
+    session = requests.Session()
+    # Connection failures are retried for every method (nothing reached the API); 429/5xx
+    # answers only for idempotent ones, so a /chat question is never sent to the LLM twice
+    retry = Retry(total=3, connect=3, backoff_factor=0.3, status_forcelist=(429, 502, 503, 504),
+                  allowed_methods=frozenset({"GET", "DELETE"}), respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# --- Helper: Confidence chart (specs memoized per chart data, not rebuilt on every rerun) ---
+def compact_chart_data(retrieval):
+    """(disease, score) pairs: small in session state and hashable for the chart cache."""
+    return tuple((match["disease"], round(float(match["score"]), 4)) for match in retrieval)
+
+@st.cache_data(max_entries=1000)
+def chart_spec(chart_data):
+    chart_df = pd.DataFrame(list(chart_data), columns=["Disease", "Confidence"])
+    chart = alt.Chart(chart_df).mark_bar(
+        cornerRadiusTopRight=10,
+        cornerRadiusBottomRight=10,
+        height=20 # Slender bars
+    ).encode(
+        x=alt.X('Confidence', title='Match Probability (0-1)', scale=alt.Scale(domain=[0, 1])),
+        y=alt.Y('Disease', sort='-x', title=None), # Sorted by confidence
+        color=alt.Color('Confidence', scale=alt.Scale(scheme='viridis'), legend=None),
+        tooltip=['Disease', 'Confidence']
+    ).properties(height=200)
+    return chart.to_dict()
+
+def render_chart(chart_data):
+    st.markdown("---")
+    st.caption("📊 **Clinical Confidence Score (Vector Analysis)**")
+    st.vega_lite_chart(chart_spec(chart_data), use_container_width=True)
+
+# --- Helper: Server-Sent Events reader ---
+
+def iter_sse(response):
+    """Yields (event, data) pairs from a text/event-stream response."""
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+
+# --- Helper: Clinical report (rendered and cached by the API, fetched only on demand) ---
+REPORT_TIMEOUT = 60
+REPORT_SYMPTOMS = 8  # symptoms per disease the report lists
+
+def compact_report(query, retrieval):
+    """What /report needs besides the answer and the chart pairs: the query and the symptom names."""
+    return {"query": query,
+            "symptoms": tuple(tuple(s["name"] for s in match.get("symptoms", [])[:REPORT_SYMPTOMS])
+                              for match in retrieval)}
+
+def report_request(message):
+    """The /report body for a stored answer, rebuilt from its compact fields."""
+    chart_data = message.get("chart_data", ())
+    retrieval = [{"disease": disease, "score": score, "symptoms": [{"name": name} for name in symptoms]}
+                 for (disease, score), symptoms in zip(chart_data, message["report"]["symptoms"])]
+    return {"query": message["report"]["query"], "response": message["content"], "retrieval": retrieval}
+
+def fetch_report(report):
+    """PDF bytes from /report; long answers come back as a job, polled until it is done."""
+    session = api_session()
+    response = session.post(f"{API_URL}/report", json=report, timeout=(API_TIMEOUT[0], REPORT_TIMEOUT))
+    response.raise_for_status()
+    if response.status_code != 202:
+        return response.content
+    status_url = f"{API_URL}{response.json()['status_url']}"
+    deadline = time.monotonic() + REPORT_TIMEOUT
+    while time.monotonic() < deadline:
+        job = session.get(status_url, timeout=API_TIMEOUT).json()
+        if job["status"] == "done":
+            download = session.get(f"{API_URL}{job['download_url']}", timeout=(API_TIMEOUT[0], REPORT_TIMEOUT))
+            download.raise_for_status()
+            return download.content
+        if job["status"] == "failed":
+            raise RuntimeError(job["error"])
+        time.sleep(0.5)
+    raise TimeoutError("The report is still being generated.")
+
+def report_controls(index, message):
+    """Report button for one answer: nothing is generated until it is clicked."""
+    pdf_key = f"report_pdf_{index}"
+    if pdf_key in st.session_state:
+        st.download_button(
+            label="📄 Download Clinical Report (PDF)",
+            data=st.session_state[pdf_key],
+            file_name="tanit_report.pdf",
+            mime="application/pdf",
+            key=f"download_{index}",
+        )
+    elif st.button("📄 Prepare Clinical Report (PDF)", key=f"report_{index}"):
+        try:
+            with st.spinner("Generating the report..."):
+                st.session_state[pdf_key] = fetch_report(report_request(message))
+            st.rerun()
+        except Exception as e:
+            st.error(f"Report Error: {e}")
 
 # --- Page Config ---
 st.set_page_config(page_title="Tanit Health AI", page_icon="🩺", layout="centered")
@@ -70,29 +162,20 @@ st.markdown("Describe symptoms below. The **Supervisor Agent** will validate cli
 # --- Chat State ---
 if "messages" not in st.session_state:
     st.session_state.messages = []
+if "session_id" not in st.session_state:
+    # One API session per browser session: follow-up questions keep their context
+    st.session_state.session_id = uuid.uuid4().hex
 
-# --- Render Chat History ---
-for message in st.session_state.messages:
+# --- Render Chat History (compact messages, memoized chart specs, no PDF until asked for) ---
+for index, message in enumerate(st.session_state.messages):
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
-        
+
         if "chart_data" in message:
-            st.markdown("---")
-            st.caption("📊 **Clinical Confidence Score**")
-            
-            # Render the nice Altair chart
-            chart = alt.Chart(message["chart_data"]).mark_bar(
-                cornerRadiusTopRight=10, 
-                cornerRadiusBottomRight=10,
-                height=20
-            ).encode(
-                x=alt.X('Confidence', title='Match Probability (0-1)', scale=alt.Scale(domain=[0, 1])),
-                y=alt.Y('Disease', sort='-x', title=None),
-                color=alt.Color('Confidence', scale=alt.Scale(scheme='viridis'), legend=None),
-                tooltip=['Disease', 'Confidence']
-            ).properties(height=200)
-            
-            st.altair_chart(chart, use_container_width=True)
+            render_chart(message["chart_data"])
+
+        if "report" in message:
+            report_controls(index, message)
 
 if prompt := st.chat_input("E.g., 'I have high fever, chills, and nausea.'"):
     
@@ -101,81 +184,68 @@ if prompt := st.chat_input("E.g., 'I have high fever, chills, and nausea.'"):
     with st.chat_message("user"):
         st.markdown(prompt)
 
-    # 2. Generate Response
+    # 2. Generate Response (streamed: steps and supervisor tokens render as they arrive)
     with st.chat_message("assistant"):
-        with st.spinner("🏥 Intern is querying Neo4j... Supervisor is reviewing..."):
-            try:
-                # Call Backend
-                response = requests.post("http://localhost:8000/chat", json={"query": prompt})
-                
+        try:
+            # --- A. Reasoning Expander (filled live) ---
+            reasoning_box = st.expander("🧠 View Agent Reasoning Process", expanded=False)
+            answer_box = st.empty()
+            answer_box.info("🏥 Intern is querying Neo4j... Supervisor is reviewing...")
+
+            # Call Backend
+            with api_session().post(f"{API_URL}/chat/stream", json={"query": prompt, "session_id": st.session_state.session_id},
+                                    stream=True, timeout=API_TIMEOUT) as response:
                 if response.status_code == 200:
-                    data = response.json()
-                    final_answer = data["response"]
-                    reasoning_log = data["reasoning"]
-
-                    # --- A. Reasoning Expander ---
-                    with st.expander("🧠 View Agent Reasoning Process", expanded=False):
-                        for step in reasoning_log:
-                            if step["type"] == "tool_call":
-                                st.info(f"🛠️ **Action:** `{step['content']}`")
-                            elif step["type"] == "tool_result":
-                                st.code(step['content'], language="markdown")
-                            elif step["type"] == "intern_draft":
-                                st.warning(f"📝 **Intern's Draft:**\n{step['content']}")
-
-                    # --- B. The Text Answer ---
-                    st.markdown(final_answer)
-
-                    # --- C. Data Extraction for Chart ---
-                    diseases = []
-                    scores = []
-                    for step in reasoning_log:
-                        if step["type"] == "tool_result":
-                            # Extract all matches
-                            matches = re.findall(r"Disease Found: (.*?) \(Similarity: (.*?)\)", step["content"])
-                            for match in matches:
-                                diseases.append(match[0])
-                                scores.append(float(match[1]))
-                    
-                    chart_df = None
-                    if diseases:
-                        chart_df = pd.DataFrame({"Disease": diseases, "Confidence": scores})
-                        
-                        # --- D. The Chart (Bottom) ---
-                        st.markdown("---")
-                        st.caption("📊 **Clinical Confidence Score (Vector Analysis)**")
-                        
-                        chart = alt.Chart(chart_df).mark_bar(
-                            cornerRadiusTopRight=10, 
-                            cornerRadiusBottomRight=10,
-                            height=20 # Slender bars
-                        ).encode(
-                            x=alt.X('Confidence', title='Match Probability (0-1)'),
-                            y=alt.Y('Disease', sort='-x', title=None), # Sorted by confidence
-                            color=alt.Color('Confidence', scale=alt.Scale(scheme='viridis'), legend=None),
-                            tooltip=['Disease', 'Confidence']
-                        ).properties(height=200)
-                        
-                        st.altair_chart(chart, use_container_width=True)
-
-                    # --- E. Download Button ---
-                    pdf_bytes = create_pdf(prompt, final_answer)
-                    st.download_button(
-                        label="📄 Download Clinical Report (PDF)",
-                        data=pdf_bytes,
-                        file_name="tanit_report.pdf",
-                        mime="application/pdf"
-                    )
-
-                    # Save to history
-                    msg_data = {"role": "assistant", "content": final_answer}
-                    if chart_df is not None:
-                        msg_data["chart_data"] = chart_df
+                    final_answer = None
+                    retrieval = []
+                    streamed_answer = ""
+                    reasoning_log = []
+
+                    for event, data in iter_sse(response):
+                        if event == "tool_call":
+                            reasoning_box.info(f"🛠️ **Action:** `{data['content']}`")
+                            reasoning_log.append({"type": "tool_call", "content": data["content"]})
+                        elif event == "tool_result":
+                            reasoning_box.code(data['content'], language="markdown")
+                            reasoning_log.append({"type": "tool_result", "content": data["content"]})
+                        elif event == "intern_draft":
+                            reasoning_box.warning(f"📝 **Intern's Draft:**\n{data['content']}")
+                            reasoning_log.append({"type": "intern_draft", "content": data["content"]})
+                        elif event == "token":
+                            # --- B. The Text Answer (typed out as the supervisor writes it) ---
+                            streamed_answer += data["content"]
+                            answer_box.markdown(streamed_answer + "▌")
+                        elif event == "final":
+                            final_answer = data["response"]
+                            retrieval = data.get("retrieval", [])
+                        elif event == "error":
+                            raise RuntimeError(data.get("detail") or data.get("error"))
+
+                    if final_answer is None:
+                        raise RuntimeError("The stream ended before the final answer.")
+                    answer_box.markdown(final_answer)
+
+                    # --- C. Chart Data (structured retrieval records, no text parsing) ---
+                    chart_data = compact_chart_data(retrieval)
+
+                    # --- D. The Chart (Bottom) ---
+                    if chart_data:
+                        render_chart(chart_data)
+
+                    # Compact history entry: chart pairs plus what the report needs on top of them
+                    msg_data = {"role": "assistant", "content": final_answer,
+                                "report": compact_report(prompt, retrieval)}
+                    if chart_data:
+                        msg_data["chart_data"] = chart_data
+
+                    # --- E. Report Button (the PDF is requested from the API on click) ---
+                    report_controls(len(st.session_state.messages), msg_data)
                     st.session_state.messages.append(msg_data)
 
                 else:
+                    answer_box.empty()
                     st.error(f"Backend Error: {response.text}")
 
-            except Exception as e:
-                st.error(f"Connection Error: {e}")
-                st.info("Ensure `python api.py` is running.")
\ No newline at end of file
+        except Exception as e:
+            st.error(f"Connection Error: {e}")
+            st.info("Ensure `python api.py` is running.")
\ No newline at end of file
@@ -0,0 +1,168 @@
+import json
+
+import numpy as np
+
+# Loads every Disease with its embedding and graph neighbours in one pass
+LOAD_QUERY = """
+MATCH (d:Disease) WHERE d.embedding IS NOT NULL
+RETURN d.name AS disease,
+       d.description AS description,
+       d.embedding AS embedding,
+       [(d)-[r:HAS_SYMPTOM]->(s:Symptom) | {name: s.name, weight: r.weight}] AS symptoms,
+       [(d)-[:NEEDS_PRECAUTION]->(p:Precaution) | p.name] AS precautions
+ORDER BY d.name
+"""
+
+# Rows scored per block when the matrix is int8, so the float32 upcast stays small
+_INT8_BLOCK_ROWS = 65_536
+
+
+class LocalVectorIndex:
+    """
+    In-process replacement for `db.index.vector.queryNodes`.
+    All Disease embeddings are L2-normalized into one contiguous matrix, so a
+    top-k cosine search is a single matmul + argpartition. With
+    `quantize=True` the matrix is stored as int8 with one float32 scale per
+    row (about 4x smaller), which is meant for corpora much bigger than ours.
+
+    Scores follow Neo4j's cosine convention, (1 + cos) / 2, so results are
+    interchangeable with the Neo4j backend.
+
+    `normalized=True` takes already L2-normalized float32 rows as they are,
+    without a copy, so a memory-mapped snapshot matrix stays shared.
+    """
+
+    def __init__(self, diseases, descriptions, embeddings, symptoms, precautions, quantize=False, normalized=False):
+        matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2 or len(matrix) != len(diseases):
+            raise ValueError("❌ Error: embeddings must be a (n_diseases, dim) matrix")
+        if not normalized:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix /= np.where(norms == 0, 1, norms)
+
+        self.diseases = list(diseases)
+        self._positions = {name: i for i, name in enumerate(self.diseases)}
+        self.descriptions = list(descriptions)
+        # Symptoms are {"name", "weight"} dicts, as stored on HAS_SYMPTOM
+        self.symptoms = [[dict(sym) for sym in s] for s in symptoms]
+        self.precautions = [list(p) for p in precautions]
+        self.dim = matrix.shape[1]
+        self.quantized = quantize
+
+        if quantize:
+            scales = np.abs(matrix).max(axis=1) / 127
+            scales[scales == 0] = 1
+            self.matrix = np.round(matrix / scales[:, None]).astype(np.int8)
+            self.scales = scales.astype(np.float32)
+        else:
+            self.matrix = matrix
+            self.scales = None
+
+    def __len__(self):
+        return len(self.diseases)
+
+    @property
+    def nbytes(self):
+        return self.matrix.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    # --- Loaders ---
+    @classmethod
+    def from_records(cls, records, quantize=False):
+        """Builds the index from rows shaped like LOAD_QUERY's output."""
+        records = list(records)
+        return cls(
+            [r["disease"] for r in records],
+            [r["description"] for r in records],
+            np.array([r["embedding"] for r in records], dtype=np.float32).reshape(len(records), -1),
+            [r["symptoms"] for r in records],
+            [r["precautions"] for r in records],
+            quantize=quantize,
+        )
+
+    @classmethod
+    def from_neo4j(cls, quantize=False):
+        """Pulls the current graph through the shared driver (refresh source)."""
+        import db
+        return cls.from_records(db.run_query(LOAD_QUERY), quantize=quantize)
+
+    @classmethod
+    def from_json(cls, path, encode, quantize=False):
+        """Builds the index straight from medical_graph_data.json, embedding descriptions with `encode`."""
+        with open(path, "r") as f:
+            data = json.load(f)
+        return cls(
+            [d["name"] for d in data],
+            [d["description"] for d in data],
+            np.asarray(encode([d["description"] for d in data]), dtype=np.float32),
+            [d["symptoms"] for d in data],
+            [d["precautions"] for d in data],
+            quantize=quantize,
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot, quantize=False):
+        """From a snapshot.Snapshot: no JSON parsing, no model, the embedding matrix used in place."""
+        return cls(
+            snapshot.diseases,
+            snapshot.descriptions,
+            snapshot.embeddings,
+            [snapshot.symptoms(i) for i in range(len(snapshot))],
+            [snapshot.precautions(i) for i in range(len(snapshot))],
+            quantize=quantize,
+            normalized=True,
+        )
+
+    # --- Search ---
+    def cosine(self, query_embeddings):
+        """Cosine similarity of each query row against every disease: (n_queries, n_diseases)."""
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        if not self.quantized:
+            return queries @ self.matrix.T
+
+        scores = np.empty((len(queries), len(self)), dtype=np.float32)
+        for start in range(0, len(self), _INT8_BLOCK_ROWS):
+            block = self.matrix[start:start + _INT8_BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + len(block)] = (queries @ block.T) * self.scales[start:start + len(block)]
+        return scores
+
+    def search(self, query_embedding, k=3):
+        """Top-k diseases for one query, best first, as Neo4j-shaped dicts."""
+        return self.search_batch([query_embedding], k)[0]
+
+    def search_batch(self, query_embeddings, k=3):
+        """Top-k for many queries with a single matmul."""
+        scores = (1 + self.cosine(query_embeddings)) / 2
+        k = min(k, len(self))
+        if k == 0:
+            return [[] for _ in scores]
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in zip(scores, top):
+            ranked = candidates[np.argsort(-row[candidates], kind="stable")]
+            results.append([self._record(i, float(row[i])) for i in ranked])
+        return results
+
+    def get(self, disease, score=1.0):
+        """Exact lookup by disease name, shaped like a search result (None if unknown)."""
+        i = self._positions.get(disease)
+        return None if i is None else self._record(i, score)
+
+    def score(self, disease, query_embedding):
+        """Record for `disease` scored against one query embedding (None if unknown)."""
+        i = self._positions.get(disease)
+        if i is None:
+            return None
+        return self._record(i, float((1 + self.cosine(query_embedding)[0, i]) / 2))
+
+    def _record(self, i, score):
+        return {
+            "disease": self.diseases[i],
+            "description": self.descriptions[i],
+            "score": score,
+            "symptoms": self.symptoms[i],
+            "precautions": self.precautions[i],
+        }
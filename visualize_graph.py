@@ -1,72 +1,338 @@
+import argparse
+import hashlib
+import json
 import os
-from dotenv import load_dotenv
-from neo4j import GraphDatabase
-from pyvis.network import Network
-import networkx as nx
-
-# 1. Load Credentials
-load_dotenv()
-URI = os.getenv("NEO4J_URI")
-AUTH = (os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
-
-def generate_interactive_graph():
-    print("⏳ Fetching data from Neo4j...")
-    driver = GraphDatabase.driver(URI, auth=AUTH)
-    
-    # Limit to 100 relationships to keep the visual clean and fast
-    # You can increase the LIMIT if you want to see the whole monster
-    query = """
-    MATCH (source)-[r]->(target)
-    RETURN labels(source)[0] as source_type, source.name as source_name,
-           type(r) as relationship,
-           labels(target)[0] as target_type, target.name as target_name
-    LIMIT 300
-    """
-    
-    # Initialize a NetworkX graph (PyVis uses this internally)
-    G = nx.DiGraph()
-    
-    with driver.session() as session:
-        result = session.run(query)
-        
-        for record in result:
-            src_name = record['source_name']
-            src_type = record['source_type']
-            tgt_name = record['target_name']
-            tgt_type = record['target_type']
-            rel_type = record['relationship']
-            
-            # Add Source Node with Color
-            color_map = {
-                "Disease": "#ff5733",    # Red/Orange
-                "Symptom": "#33ff57",    # Green
-                "Precaution": "#3357ff"  # Blue
-            }
-            
-            # Add nodes
-            G.add_node(src_name, label=src_name, title=src_type, color=color_map.get(src_type, "gray"))
-            G.add_node(tgt_name, label=tgt_name, title=tgt_type, color=color_map.get(tgt_type, "gray"))
-            
-            # Add edge
-            G.add_edge(src_name, tgt_name, title=rel_type)
-
-    driver.close()
-    print(f"✅ Data fetched. Nodes: {G.number_of_nodes()}, Edges: {G.number_of_edges()}")
-
-    # 2. Visualize with PyVis
-    print("🎨 Generating HTML visualization...")
-    net = Network(height="750px", width="100%", bgcolor="#222222", font_color="white", notebook=False)
-    
-    # Convert NetworkX graph to PyVis
-    net.from_nx(G)
-    
-    # Add physics controls (makes it interactive and fun to drag)
-    net.show_buttons(filter_=['physics'])
-    
-    # Save to file
-    output_file = "graph_visualization.html"
-    net.save_graph(output_file)
-    print(f"🚀 Graph saved to '{output_file}'. Open it in your browser!")
+import time
+
+import numpy as np
+
+# Credentials and connection pool live in the shared driver (db.py)
+import db
+
+DATA_FILE = os.path.join("data", "medical_graph_data.json")
+OUTPUT_DIR = "graph_export"
+HTML_FILE = "graph_visualization.html"
+LAYOUT_FILE = os.path.join("data", "graph_layout.npz")
+PAGE_SIZE = 200
+SHARDS = 16
+
+NODE_TYPES = ["Disease", "Symptom", "Precaution"]
+COLORS = ["#ff5733", "#33ff57", "#3357ff"]  # Red/Orange, Green, Blue
+
+# 1. Export: keyset pagination on the unique Disease.name (every relationship starts at a Disease),
+#    so each page is an index seek instead of an ever-growing SKIP
+PAGE_QUERY = """
+MATCH (d:Disease)
+WHERE d.name > $after
+WITH d ORDER BY d.name LIMIT $page_size
+RETURN d.name AS source,
+       [(d)-[r]->(t) | {rel: type(r), type: labels(t)[0], target: t.name, weight: r.weight}] AS edges
+"""
+
+def iter_pages(page_size=PAGE_SIZE):
+    """Streams the graph from Neo4j, one page of diseases (with their edges) at a time."""
+    after = ""
+    while True:
+        rows = db.run_query(PAGE_QUERY, {"after": after, "page_size": page_size})
+        if not rows:
+            return
+        yield rows
+        after = rows[-1]["source"]
+
+def iter_json_pages(path=DATA_FILE, page_size=PAGE_SIZE):
+    """Same pages built from medical_graph_data.json (no database needed)."""
+    with open(path, "r") as f:
+        data = json.load(f)
+    rows = sorted(({
+        "source": entry["name"],
+        "edges": [{"rel": "HAS_SYMPTOM", "type": "Symptom", "target": s["name"], "weight": s["weight"]}
+                  for s in entry["symptoms"]]
+                 + [{"rel": "NEEDS_PRECAUTION", "type": "Precaution", "target": p, "weight": None}
+                    for p in entry["precautions"]],
+    } for entry in data), key=lambda row: row["source"])
+    for i in range(0, len(rows), page_size):
+        yield rows[i:i + page_size]
+
+def build_arrays(pages):
+    """Pages -> node names/types and edge arrays (src, dst, rel, weight), node ids in first-seen order."""
+    ids, names, types = {}, [], []
+    src, dst, rels, weights = [], [], [], []
+    rel_ids = {}
+
+    def node(name, node_type):
+        i = ids.get((node_type, name))
+        if i is None:
+            i = ids[(node_type, name)] = len(names)
+            names.append(name)
+            types.append(NODE_TYPES.index(node_type) if node_type in NODE_TYPES else len(NODE_TYPES))
+        return i
+
+    for page in pages:
+        for row in page:
+            s = node(row["source"], "Disease")
+            for edge in row["edges"]:
+                src.append(s)
+                dst.append(node(edge["target"], edge["type"]))
+                rels.append(rel_ids.setdefault(edge["rel"], len(rel_ids)))
+                weights.append(edge["weight"] if edge["weight"] is not None else 0)
+
+    return {
+        "names": names,
+        "types": np.array(types, dtype=np.uint8),
+        "src": np.array(src, dtype=np.int32),
+        "dst": np.array(dst, dtype=np.int32),
+        "rel": np.array(rels, dtype=np.uint8),
+        "weight": np.array(weights, dtype=np.int16),
+        "rels": list(rel_ids),
+    }
+
+# 2. Layout: Fruchterman-Reingold, vectorized with NumPy, computed once and stored next to the data
+def fingerprint(graph):
+    h = hashlib.sha1("\x1f".join(graph["names"]).encode())
+    h.update(graph["src"].tobytes())
+    h.update(graph["dst"].tobytes())
+    return h.hexdigest()
+
+def force_layout(src, dst, n, iterations=150, seed=7, scale=1000):
+    """(n, 2) positions. Repulsion is computed in row blocks so memory stays O(block x n)."""
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform(-1, 1, (n, 2))
+    k = np.sqrt(4.0 / max(n, 1))
+    block = max(1, 2_000_000 // max(n, 1))
+    temperature = 0.1
+    for _ in range(iterations):
+        disp = np.zeros((n, 2))
+        for start in range(0, n, block):
+            delta = pos[start:start + block, None, :] - pos[None, :, :]
+            dist2 = np.maximum((delta ** 2).sum(-1), 1e-6)
+            disp[start:start + block] = (delta * (k * k / dist2)[..., None]).sum(1)
+        delta = pos[src] - pos[dst]
+        pull = delta * (np.sqrt((delta ** 2).sum(1)) / k)[:, None]
+        for axis in range(2):
+            disp[:, axis] -= np.bincount(src, pull[:, axis], minlength=n)
+            disp[:, axis] += np.bincount(dst, pull[:, axis], minlength=n)
+        length = np.maximum(np.sqrt((disp ** 2).sum(1)), 1e-9)
+        pos += disp / length[:, None] * np.minimum(length, temperature)[:, None]
+        temperature *= 0.97
+    pos -= pos.mean(0)
+    return pos / max(np.abs(pos).max(), 1e-9) * scale
+
+def get_layout(graph, path=LAYOUT_FILE, iterations=150):
+    """Cached layout for this exact graph; recomputed (and saved) when the graph changed."""
+    key = fingerprint(graph)
+    if os.path.exists(path):
+        with np.load(path) as cached:
+            if str(cached["fingerprint"]) == key:
+                return cached["positions"], False
+    positions = force_layout(graph["src"], graph["dst"], len(graph["names"]), iterations)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.savez_compressed(path, positions=positions, fingerprint=key)
+    return positions, True
+
+# 3. Payload: node table up front, neighborhoods sharded so the page loads them on demand
+def write_payload(graph, positions, output_dir=OUTPUT_DIR, shards=SHARDS):
+    """Writes graph.json (columnar nodes + layout) and neighbors/<shard>.json. Returns bytes written."""
+    n = len(graph["names"])
+    src, dst = graph["src"], graph["dst"]
+    degree = np.bincount(np.concatenate([src, dst]), minlength=n)
+    os.makedirs(os.path.join(output_dir, "neighbors"), exist_ok=True)
+    compact = {"separators": (",", ":"), "ensure_ascii": False}
+
+    index = {
+        "generated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "types": NODE_TYPES,
+        "colors": COLORS,
+        "rels": graph["rels"],
+        "shards": shards,
+        "nodes": {
+            "name": graph["names"],
+            "type": graph["types"].tolist(),
+            "x": np.rint(positions[:, 0]).astype(int).tolist(),
+            "y": np.rint(positions[:, 1]).astype(int).tolist(),
+            "degree": degree.tolist(),
+        },
+    }
+    written = 0
+    with open(os.path.join(output_dir, "graph.json"), "w", encoding="utf-8") as f:
+        written += f.write(json.dumps(index, **compact))
+
+    # Adjacency in both directions (a symptom expands to its diseases), grouped by node id % shards
+    ends = np.concatenate([src, dst])
+    others = np.concatenate([dst, src])
+    rel = np.concatenate([graph["rel"], graph["rel"]])
+    weight = np.concatenate([graph["weight"], graph["weight"]])
+    order = np.argsort(ends, kind="stable")
+    ends, others, rel, weight = ends[order], others[order], rel[order], weight[order]
+    bounds = np.searchsorted(ends, np.arange(n + 1))
+    for shard in range(shards):
+        neighbors = {
+            str(i): np.stack([others[bounds[i]:bounds[i + 1]], rel[bounds[i]:bounds[i + 1]],
+                              weight[bounds[i]:bounds[i + 1]]], axis=1).tolist()
+            for i in range(shard, n, shards)
+        }
+        with open(os.path.join(output_dir, "neighbors", f"{shard}.json"), "w", encoding="utf-8") as f:
+            written += f.write(json.dumps(neighbors, **compact))
+    return written
+
+# 4. The page: vis-network (bundled in lib/, works offline) with the stored layout, physics off,
+#    neighborhoods fetched on click
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Tanit Health AI - Knowledge Graph</title>
+<link rel="stylesheet" href="lib/vis-9.1.2/vis-network.css">
+<script src="lib/vis-9.1.2/vis-network.min.js"></script>
+<style>
+  body { margin: 0; background: #222222; color: white; font-family: sans-serif; }
+  #bar { padding: 8px; display: flex; gap: 8px; align-items: center; }
+  #graph { width: 100%; height: calc(100vh - 48px); }
+  #error { padding: 16px; color: #ff8080; white-space: pre-line; }
+</style>
+</head>
+<body>
+<div id="bar">
+  <input id="search" list="names" placeholder="Find a disease, symptom or precaution">
+  <datalist id="names"></datalist>
+  <button id="all">Show everything</button>
+  <button id="reset">Diseases only</button>
+  <label><input id="physics" type="checkbox"> Physics</label>
+  <span id="status"></span>
+</div>
+<div id="error" hidden></div>
+<div id="graph"></div>
+<script>
+const BASE = "__OUTPUT_DIR__/";
+const nodes = new vis.DataSet(), edges = new vis.DataSet();
+const shards = {};
+let graph;
+
+function visNode(i) {
+  const n = graph.nodes, type = n.type[i];
+  return {id: i, label: n.name[i], title: graph.types[type] || "Other", color: graph.colors[type] || "gray",
+          x: n.x[i], y: n.y[i], value: n.degree[i]};
+}
+
+function load(path) {
+  return fetch(BASE + path).then(r => {
+    if (!r.ok) throw new Error(r.status + " " + r.statusText + " for " + BASE + path);
+    return r.json();
+  });
+}
+
+function showError(error) {
+  const box = document.getElementById("error");
+  box.hidden = false;
+  box.textContent = "Could not load the graph data (" + error.message + ").\\n" + (location.protocol === "file:"
+    ? "Browsers block fetch() on file:// pages: run `python -m http.server 8001` in the project folder "
+      + "and open http://localhost:8001/" + location.pathname.split("/").pop()
+    : "Export it first: `python visualize_graph.py --source json` (no database needed) or `python visualize_graph.py`.");
+  status("");
+}
+
+async function shard(i) {
+  const s = i % graph.shards;
+  if (!shards[s]) shards[s] = load("neighbors/" + s + ".json").catch(e => { delete shards[s]; throw e; });
+  return shards[s];
+}
+
+function visEdges(i, neighbors) {
+  return neighbors.map(([j, rel, w]) => ({id: Math.min(i, j) + "-" + Math.max(i, j) + "-" + rel,
+    from: i, to: j, title: graph.rels[rel] + (w ? " (weight " + w + ")" : "")}));
+}
+
+async function expand(i) {
+  const neighbors = (await shard(i))[i] || [];
+  nodes.update(neighbors.map(([j]) => visNode(j)));
+  edges.update(visEdges(i, neighbors));
+  status(neighbors.length + " neighbors of " + graph.nodes.name[i]);
+}
+
+async function showAll() {
+  status("Loading every neighborhood...");
+  const loaded = await Promise.all(Array.from({length: graph.shards}, (_, s) => shard(s)));
+  // Each edge is listed from both ends: keep it once, from its lower id
+  const all = [];
+  loaded.forEach(neighbors => Object.entries(neighbors).forEach(([i, list]) =>
+    all.push(...visEdges(Number(i), list.filter(([j]) => Number(i) < j)))));
+  nodes.update(graph.nodes.name.map((_, i) => visNode(i)));
+  edges.update(all);
+  status(nodes.length + " nodes, " + edges.length + " edges");
+}
+
+function status(text) { document.getElementById("status").textContent = text; }
+
+function diseasesOnly() {
+  nodes.clear(); edges.clear();
+  nodes.add(graph.nodes.type.flatMap((t, i) => t === 0 ? [visNode(i)] : []));
+  status(nodes.length + " of " + graph.nodes.name.length + " nodes - click one to expand it");
+}
+
+load("graph.json").then(data => {
+  graph = data;
+  const options = document.createDocumentFragment();
+  graph.nodes.name.forEach(name => {
+    const option = document.createElement("option");
+    option.value = name;
+    options.appendChild(option);
+  });
+  document.getElementById("names").replaceChildren(options);
+  const network = new vis.Network(document.getElementById("graph"), {nodes, edges}, {
+    physics: {enabled: false},
+    nodes: {shape: "dot", scaling: {min: 6, max: 30}, font: {color: "white"}},
+    edges: {color: {opacity: 0.4}, smooth: false},
+    interaction: {hideEdgesOnDrag: true, tooltipDelay: 200},
+  });
+  network.on("click", e => { if (e.nodes.length) expand(e.nodes[0]).catch(showError); });
+  document.getElementById("physics").onchange = e => network.setOptions({physics: {enabled: e.target.checked}});
+  document.getElementById("reset").onclick = diseasesOnly;
+  document.getElementById("all").onclick = () => showAll().catch(showError);
+  document.getElementById("search").onchange = e => {
+    const i = graph.nodes.name.indexOf(e.target.value);
+    if (i < 0) return;
+    nodes.update(visNode(i));
+    expand(i).then(() => network.focus(i, {scale: 1.2, animation: true})).catch(showError);
+  };
+  diseasesOnly();
+}).catch(showError);
+</script>
+</body>
+</html>
+"""
+
+def write_html(path=HTML_FILE, output_dir=OUTPUT_DIR):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(HTML_TEMPLATE.replace("__OUTPUT_DIR__", output_dir))
+
+def generate_interactive_graph(source="neo4j", page_size=PAGE_SIZE, output_dir=OUTPUT_DIR, relayout=False):
+    print(f"⏳ Exporting the graph from {source} ({page_size} diseases per page)...")
+    start = time.perf_counter()
+    pages = iter_pages(page_size) if source == "neo4j" else iter_json_pages(page_size=page_size)
+    graph = build_arrays(pages)
+    if source == "neo4j":
+        db.close_driver()
+    print(f"✅ Data fetched. Nodes: {len(graph['names'])}, Edges: {len(graph['src'])} "
+          f"({time.perf_counter() - start:.2f}s)")
+
+    print("📐 Computing the layout...")
+    start = time.perf_counter()
+    if relayout and os.path.exists(LAYOUT_FILE):
+        os.remove(LAYOUT_FILE)
+    positions, computed = get_layout(graph)
+    print(f"✅ Layout {'computed' if computed else 'reused from ' + LAYOUT_FILE} ({time.perf_counter() - start:.2f}s)")
+
+    written = write_payload(graph, positions, output_dir)
+    write_html(HTML_FILE, output_dir)
+    print(f"🚀 Graph saved to '{HTML_FILE}' + '{output_dir}/' ({written / 1024:.0f} KB).")
+    print("   The page fetches its data: serve the folder (python -m http.server 8001) and open "
+          f"http://localhost:8001/{HTML_FILE}")
 
 if __name__ == "__main__":
-    generate_interactive_graph()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Export the knowledge graph for the interactive viewer.")
+    parser.add_argument("--source", choices=["neo4j", "json"], default="neo4j",
+                        help="read from Neo4j or from data/medical_graph_data.json")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE, help="diseases per export query")
+    parser.add_argument("--output", default=OUTPUT_DIR)
+    parser.add_argument("--relayout", action="store_true", help="recompute the layout even if the graph is unchanged")
+    args = parser.parse_args()
+    generate_interactive_graph(args.source, args.page_size, args.output, args.relayout)